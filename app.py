@@ -1,71 +1,310 @@
 
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Flask, Blueprint, Response, current_app, request, jsonify, send_from_directory, send_file, stream_with_context
 from flask_cors import CORS
+# Imported eagerly: the limiter decorates views at import time (flask_limiter costs about 55 ms)
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+import threading
+import time
 import logging
+import sys
 from dotenv import load_dotenv
-import csv
-from pymongo import MongoClient
-from bson import ObjectId
 import json
 import uuid
 import traceback
 import atexit
+import importlib.util
+
+# Before the project imports below, several of which read settings at import time
+load_dotenv()
+
+from utils.lazy import lazy_module
+from utils.streaming import should_stream, stream_json_array, get_batch_size
+from utils.rate_limit import SharedMemoryStorage  # registers the shm:// storage scheme
+from utils.metrics import get_pool_stats, init_metrics, observe_file_write, record_rate_limit_rejection
+from utils.profiling import init_profiling
+from utils.spool import WriteSpool
+from utils.circuit_breaker import CircuitOpenError, OPEN, init_deadlines, parse_deadlines
+from utils.events import EventBroker, ChangeStreamRelay, sse_busy, sse_stream, supports_change_streams
+from utils.health import HealthProber, check_writable
+from utils.conditional import versioned
+from utils.idempotency import IdempotencyCache, idempotent
+from utils.columnar import SnapshotCache
+from utils.archive import get_archive, hot_file_lock, in_range, merge_archived, parse_timestamp, write_atomic
+from utils.csv_backup import admission_row, configured_backup
+from utils.contact_archive import get_contact_archiver
+from utils.rollups import GRANULARITIES, SOURCES as ROLLUP_SOURCES, get_rollup_store, query_trends, record_created, record_status_change
 
 # Import database connection and models
 try:
-    from config.database import connect_db, disconnect_db
+    if importlib.util.find_spec('pymongo') is None:
+        raise ImportError('pymongo is not installed')
+    from config.database import connect_db, disconnect_db, get_storage_backend, health_check as database_health_check
+    from config.database import breaker as database_breaker, bump_collection_version, get_analytics_version
     from models.student import Student
-    from models.contact import Contact
-    from routes.students import students_bp
-    from routes.contact import contact_bp
-    MONGODB_AVAILABLE = True
+    from models.contact import Contact, follow_up_scheduler
+    from routes.students import students_bp, init_limiter as init_students_limiter
+    from routes.contact import contact_bp, init_limiter as init_contact_limiter, spam_filter
+    MONGODB_MODULES_AVAILABLE = True
 except ImportError:
     print("MongoDB modules not available, using local storage")
-    MONGODB_AVAILABLE = False
+    MONGODB_MODULES_AVAILABLE = False
 
-# Load environment variables
-load_dotenv()
+# The MongoDB driver loads on first use, not at import (see --startup-report)
+bson = lazy_module('bson')
+pymongo = lazy_module('pymongo')
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
-app.config['MONGODB_URI'] = os.getenv('MONGODB_URI', '')
-
-# CORS configuration
-cors_origins = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
-if os.getenv('NODE_ENV') == 'production':
-    cors_origins = [os.getenv('PRODUCTION_DOMAIN')]
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-CORS(app, origins=cors_origins, supports_credentials=True)
+main_bp = Blueprint('main', __name__)
 
-# Rate limiting
+# Rate limiting (bound to the app in create_app)
 limiter = Limiter(
     key_func=get_remote_address,
-    app=app,
-    default_limits=["100 per 15 minutes"]
+    default_limits=["100 per 15 minutes"],
+    on_breach=record_rate_limit_rejection
 )
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Admissions that could not be written to the database wait here until the replayer drains them
+spool = WriteSpool(
+    os.getenv('SPOOL_DIR', 'spool'),
+    replay_batch=int(os.getenv('SPOOL_REPLAY_BATCH', 500)),
+    backoff_max=float(os.getenv('SPOOL_BACKOFF_MAX', 300))
+)
+
+# admissions.csv, rotated into gzip segments under CSV_BACKUP_DIR (see utils/csv_backup.py)
+admissions_backup = configured_backup()
+
+# Application events for the admin dashboard's live feed. 'local' publishes this
+# worker's own writes; 'changestream' relays MongoDB change streams so every
+# worker sees every write (needs a replica set). 'auto' picks changestream when
+# the MongoDB deployment supports it, since gunicorn runs several workers.
+application_events = EventBroker()
+APPLICATION_EVENTS_SOURCE = os.getenv('APPLICATION_EVENTS_SOURCE', 'auto')
+# Resolved per process by init_resources
+application_events_source = 'local'
+change_stream_relay = None
+FOLLOW_UP_TICK_SECONDS = float(os.getenv('FOLLOW_UP_TICK_SECONDS', 60))
 
-# MongoDB connection
+# Responses to form submissions, replayed to double-clicks and client retries
+idempotency_cache = IdempotencyCache(
+    ttl=float(os.getenv('IDEMPOTENCY_TTL_SECONDS', 300)),
+    max_entries=int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', 10000))
+)
+
+# Readiness checks run in the background; /api/health/ready only reads their results.
+# The database is reported but only gates readiness with READINESS_REQUIRE_DATABASE,
+# since admissions keep flowing through the spool while it is down.
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL_SECONDS', 5))
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT_SECONDS', 2))
+READINESS_REQUIRE_DATABASE = os.getenv('READINESS_REQUIRE_DATABASE', 'false').lower() == 'true'
+READINESS_MIN_FREE_MB = int(os.getenv('READINESS_MIN_FREE_MB', 50))
+health_prober = HealthProber(interval=HEALTH_CHECK_INTERVAL)
+STARTED_AT = time.time()
+
+# Database connection, opened lazily once per process (never shared across fork).
+# STORAGE_BACKEND selects MongoDB (default), the SQLite store or the JSON file;
+# MONGODB_AVAILABLE is true whenever a database-backed store is connected.
+MONGODB_AVAILABLE = False
 client = None
 db = None
 admissions_collection = None
+# Same collection read with the analytics read preference (listings and dashboard)
+admissions_analytics = None
+_resources_pid = None
+
+def init_resources():
+    """Connect to the configured database for the current process"""
+    global MONGODB_AVAILABLE, client, db, admissions_collection, admissions_analytics, _resources_pid, change_stream_relay
+    global application_events_source
+
+    _resources_pid = os.getpid()
+    MONGODB_AVAILABLE = False
+    client = db = admissions_collection = admissions_analytics = None
+    application_events_source = 'local'
+    health_prober.start()
+    if not MONGODB_MODULES_AVAILABLE or get_storage_backend() == 'json':
+        return
 
-if MONGODB_AVAILABLE:
     try:
-        client = MongoClient(app.config['MONGODB_URI'])
-        db = client['AmericanCollege']
-        admissions_collection = db['Admissions']
-        client.admin.command('ping')
-        print("✅ Connected to MongoDB successfully!")
+        import config.database as database
+        db = connect_db(os.getenv('MONGODB_URI', ''))
+        client = database.db_client
+        admissions_collection = database.get_collection('Admissions')
+        admissions_analytics = database.get_collection('Admissions', analytics=True)
+        MONGODB_AVAILABLE = True
+        atexit.register(disconnect_db)
+        spool.start_replayer(
+            lambda: admissions_collection, database_health_check,
+            on_replay=lambda: bump_collection_version('Admissions')
+        )
+        application_events_source = resolve_events_source()
+        if application_events_source == 'changestream':
+            change_stream_relay = ChangeStreamRelay(admissions_collection, application_events, 'application')
+            change_stream_relay.start()
+        follow_up_scheduler.start(
+            on_due=lambda follow_ups: application_events.publish('follow_up.due', follow_ups),
+            interval=FOLLOW_UP_TICK_SECONDS
+        )
+        get_contact_archiver().start()
+        if get_storage_backend() == 'sqlite':
+            print(f"✅ Using SQLite store at {client.path}")
+        else:
+            print("✅ Connected to MongoDB successfully!")
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+
+@main_bp.before_app_request
+def ensure_resources():
+    # Covers the dev server and workers started without the gunicorn post_fork hook
+    if _resources_pid != os.getpid():
+        init_resources()
+
+def database_unavailable(retry_after=None):
+    response = jsonify({'success': False, 'message': 'Database unavailable'})
+    if retry_after:
+        response.headers['Retry-After'] = str(int(retry_after))
+    return response, 503
+
+def database_degraded():
+    """True when admission writes should go straight to the spool"""
+    return spool.degraded or database_breaker.state == OPEN
+
+def require_database():
+    if not MONGODB_AVAILABLE:
+        return database_unavailable()
+    try:
+        database_breaker.check()
+    except CircuitOpenError as e:
+        return database_unavailable(e.retry_after)
+
+def resolve_events_source():
+    """'changestream' or 'local' for this process, from APPLICATION_EVENTS_SOURCE and the deployment"""
+    if get_storage_backend() != 'mongodb' or APPLICATION_EVENTS_SOURCE == 'local':
+        return 'local'
+    if APPLICATION_EVENTS_SOURCE == 'changestream':
+        return 'changestream'
+    try:
+        if supports_change_streams(client):
+            return 'changestream'
     except Exception as e:
-        print(f"❌ MongoDB connection failed: {e}")
-        MONGODB_AVAILABLE = False
+        logger.warning(f'Could not detect change stream support: {str(e)}')
+    logger.warning('MongoDB has no change streams; live dashboard events only cover each worker\'s own writes')
+    return 'local'
+
+def publish_application_event(event_type, data):
+    # With change streams enabled MongoDB writes are published by the relay
+    if application_events_source != 'changestream' or not MONGODB_AVAILABLE:
+        application_events.publish(event_type, data)
+
+def check_database():
+    if not MONGODB_MODULES_AVAILABLE or get_storage_backend() == 'json':
+        return {'backend': 'json'}
+    if not MONGODB_AVAILABLE:
+        raise RuntimeError('Not connected')
+    start = time.perf_counter()
+    if get_storage_backend() == 'sqlite':
+        client.admin.command('ping')
+        return {'backend': 'sqlite', 'pingMs': round((time.perf_counter() - start) * 1000, 2)}
+    with pymongo.timeout(HEALTH_CHECK_TIMEOUT):
+        client.admin.command('ping')
+    return {
+        'backend': 'mongodb',
+        'pingMs': round((time.perf_counter() - start) * 1000, 2),
+        'circuit': database_breaker.state,
+        'pool': get_pool_stats()
+    }
+
+def check_file_store():
+    # applications.json and admissions.csv live in the working directory
+    return check_writable(['.', spool.directory], READINESS_MIN_FREE_MB * 1024 * 1024)
+
+def check_queues():
+    return {'spool': spool.stats(), 'events': {**application_events.stats(), 'source': application_events_source}}
+
+health_prober.add('database', check_database, critical=lambda: READINESS_REQUIRE_DATABASE)
+health_prober.add('fileStore', check_file_store)
+health_prober.add('queues', check_queues, critical=False)
+
+def create_app():
+    """Create and configure the Flask application without touching the network"""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
+    app.config['MONGODB_URI'] = os.getenv('MONGODB_URI', '')
+    app.config['STREAM_RESPONSES'] = os.getenv('STREAM_RESPONSES', 'false').lower() == 'true'
+    app.config['STREAM_BATCH_SIZE'] = int(os.getenv('STREAM_BATCH_SIZE', 500))
+
+    # Rate limit counters live in a shared-memory table so all workers on the host share them
+    app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATELIMIT_STORAGE_URI'] = os.getenv('RATELIMIT_STORAGE_URI', 'shm://acn-ratelimit')
+    app.config['RATELIMIT_STRATEGY'] = os.getenv('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    app.config['ADMISSION_RATE_LIMIT'] = os.getenv('ADMISSION_RATE_LIMIT', '5 per minute')
+    app.config['CONTACT_RATE_LIMIT'] = os.getenv('CONTACT_RATE_LIMIT', '5 per minute')
+
+    # Opt-in request profiling (off unless a token or sample rate is configured)
+    app.config['PROFILE_TOKEN'] = os.getenv('PROFILE_TOKEN', '')
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    app.config['PROFILE_MODE'] = os.getenv('PROFILE_MODE', 'cprofile')  # cprofile, sample
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', 'profiles')
+
+    # Per-endpoint MongoDB time budgets (ms), enforced with pymongo.timeout / maxTimeMS
+    app.config['DB_DEADLINE_MS'] = int(os.getenv('DB_DEADLINE_MS', 2000))
+    app.config['DASHBOARD_CACHE_SECONDS'] = float(os.getenv('DASHBOARD_CACHE_SECONDS', 10))
+    app.config['SSE_HEARTBEAT_SECONDS'] = float(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+    # Each open event stream holds a worker thread: cap them per worker (default half the threads)
+    # and end each one after a while so the browser reconnects, possibly to another worker
+    app.config['SSE_MAX_CONNECTIONS'] = int(os.getenv('SSE_MAX_CONNECTIONS', max(int(os.getenv('GUNICORN_THREADS', 4)) // 2, 1)))
+    app.config['SSE_MAX_STREAM_SECONDS'] = float(os.getenv('SSE_MAX_STREAM_SECONDS', 300))
+    app.config['SSE_BUSY_RETRY_SECONDS'] = float(os.getenv('SSE_BUSY_RETRY_SECONDS', 30))
+    # Serve local-mode listings and dashboard counts from a columnar snapshot of applications.json
+    app.config['COLUMNAR_SNAPSHOT'] = os.getenv('COLUMNAR_SNAPSHOT', 'true').lower() == 'true'
+
+    app.config['DB_DEADLINES_MS'] = {
+        'main.save_admission': 1500,
+        'main.check_email_exists': 500,
+        'main.get_applications': 5000,
+        'main.admin_dashboard': 5000,
+        'students.get_all_students': 5000,
+        'contact.get_all_contacts': 5000,
+        **parse_deadlines(os.getenv('DB_DEADLINES_MS', ''))
+    }
+
+    # CORS configuration
+    cors_origins = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
+    if os.getenv('NODE_ENV') == 'production':
+        cors_origins = [os.getenv('PRODUCTION_DOMAIN')]
+
+    CORS(app, origins=cors_origins, supports_credentials=True)
+    # Metrics hooks go first so requests rejected by the limiter are still timed
+    init_metrics(app)
+    limiter.init_app(app)
+    if 'metrics' in app.view_functions:
+        limiter.exempt(app.view_functions['metrics'])
+    limiter.exempt(application_events_feed)
+    limiter.exempt(liveness)
+    limiter.exempt(readiness)
+    init_profiling(app)
+
+    # App-level routes are registered first so they take precedence on shared paths
+    app.register_blueprint(main_bp)
+
+    if MONGODB_MODULES_AVAILABLE:
+        app.json_encoder = MongoJSONEncoder
+        app.register_blueprint(students_bp, url_prefix='/api/students')
+        app.register_blueprint(contact_bp, url_prefix='/api/contact')
+        app.before_request_funcs.setdefault('students', []).append(require_database)
+        app.before_request_funcs.setdefault('contact', []).append(require_database)
+        init_students_limiter(limiter)
+        init_contact_limiter(limiter)
+        app.view_functions['contact.submit_contact'] = limiter.limit(
+            lambda: current_app.config['CONTACT_RATE_LIMIT']
+        )(idempotent(idempotency_cache)(app.view_functions['contact.submit_contact']))
+
+    init_deadlines(app)
+    return app
 
 # Helpers for local file storage
 def load_applications_from_file():
@@ -75,56 +314,74 @@ def load_applications_from_file():
     except (FileNotFoundError, json.JSONDecodeError):
         return []
 
+# Rebuilt only when applications.json changes (see applications_version)
+application_snapshots = SnapshotCache(lambda: load_applications_from_file())
+
 def save_applications_to_file(applications):
-    with open('applications.json', 'w') as f:
-        json.dump(applications, f, indent=2, default=str)
+    """Replace applications.json atomically; callers hold hot_file_lock() across the read and the save"""
+    with observe_file_write('json'):
+        write_atomic('applications.json', lambda f: json.dump(applications, f, indent=2, default=str))
 
 # Custom encoder
 class MongoJSONEncoder(json.JSONEncoder):
     def default(self, obj):
-        if isinstance(obj, ObjectId):
+        if isinstance(obj, bson.ObjectId):
             return str(obj)
         return super().default(obj)
 
-if MONGODB_AVAILABLE:
-    app.json_encoder = MongoJSONEncoder
-
 # Serve static files
-@app.route('/static/<path:filename>')
+@main_bp.route('/static/<path:filename>')
 def static_files(filename):
     return send_from_directory('static', filename)
 
 # Serve images
-@app.route('/images/<path:filename>')
+@main_bp.route('/images/<path:filename>')
 def images(filename):
     return send_from_directory('images', filename)
 
 # Serve manifest.json
-@app.route('/manifest.json')
+@main_bp.route('/manifest.json')
 def manifest():
     return send_file('manifest.json', mimetype='application/manifest+json')
 
 # Serve main website
-@app.route('/')
+@main_bp.route('/')
 def index():
     return send_file('index.html')
 
 # Serve admin dashboard
-@app.route('/admin.html')
+@main_bp.route('/admin.html')
 def admin():
     return send_file('admin.html')
 
-@app.route('/api/health')
+@main_bp.route('/api/health')
 def health_check():
     return jsonify({
         'success': True,
         'message': 'American College of Nursing API is running',
         'timestamp': datetime.now().isoformat(),
-        'environment': os.getenv('NODE_ENV', 'development')
+        'environment': os.getenv('NODE_ENV', 'development'),
+        'spool': spool.stats(),
+        'circuit': database_breaker.stats() if MONGODB_MODULES_AVAILABLE else None,
+        'followUps': follow_up_scheduler.stats() if MONGODB_MODULES_AVAILABLE else None,
+        'spamFilter': spam_filter.stats() if MONGODB_MODULES_AVAILABLE else None,
+        'idempotency': idempotency_cache.stats(),
+        'readiness': health_prober.readiness()[1]['status']
     })
 
+@main_bp.route('/api/health/live')
+def liveness():
+    """The process is serving requests; checks no dependencies"""
+    return jsonify({'status': 'alive', 'pid': os.getpid(), 'uptimeSeconds': round(time.time() - STARTED_AT, 1)}), 200
+
+@main_bp.route('/api/health/ready')
+def readiness():
+    """Cached background check results; 503 until they pass"""
+    ready, report = health_prober.readiness()
+    return jsonify(report), 200 if ready else 503
+
 # API documentation endpoint
-@app.route('/api')
+@main_bp.route('/api')
 def api_docs():
     return jsonify({
         'success': True,
@@ -140,11 +397,17 @@ def api_docs():
             'contact': {
                 'GET /api/contact/inquiry-types': 'Get inquiry types',
                 'GET /api/contact/stats': 'Get contact statistics'
+            },
+            'admin': {
+                'GET /api/admin/dashboard': 'Application counts by status, course and day, plus recent submissions',
+                'GET /api/admin/trends?from=&to=&granularity=&source=': 'Counts per day, week or month from daily rollups'
             }
         }
     })
 
-@app.route('/save-admission', methods=['POST'])
+@main_bp.route('/save-admission', methods=['POST'])
+@limiter.limit(lambda: current_app.config['ADMISSION_RATE_LIMIT'])
+@idempotent(idempotency_cache)
 def save_admission():
     try:
         data = request.get_json()
@@ -161,12 +424,22 @@ def save_admission():
         
         # Check if phone number already exists
         phone_exists = False
-        if MONGODB_AVAILABLE and admissions_collection:
+        degraded = MONGODB_AVAILABLE and admissions_collection is not None and database_degraded()
+        # True once the application went to the spool instead of the database
+        spooled = False
+        if degraded:
+            # Skip the database round trip during an outage and check every worker's spool;
+            # the answer is provisional until replay, which dedupes on _id
+            phone_exists = not spool.claim(application_id)
+        elif MONGODB_AVAILABLE and admissions_collection is not None:
             existing = admissions_collection.find_one({'phone': application_id})
             phone_exists = existing is not None
         else:
             applications = load_applications_from_file()
             phone_exists = any(app.get('phone') == application_id for app in applications)
+        if not phone_exists and not degraded:
+            # Archived applications keep their phone number
+            phone_exists = application_archive().contains(application_id)
         
         if phone_exists:
             return jsonify({'success': False, 'message': 'Application with this phone number already exists'}), 400
@@ -182,80 +455,98 @@ def save_admission():
             'status': 'pending'
         }
 
-        if MONGODB_AVAILABLE and admissions_collection:
-            try:
-                result = admissions_collection.insert_one(admission_data)
-                application_id = str(result.inserted_id)
-            except Exception as e:
-                admission_data['_id'] = application_id
-                admission_data['timestamp'] = datetime.now().isoformat()
-                applications = load_applications_from_file()
-                applications.append(admission_data)
-                save_applications_to_file(applications)
+        if MONGODB_AVAILABLE and admissions_collection is not None:
+            if degraded:
+                # Fail fast to the spool, and keep spooled writes in order until replayed
+                try:
+                    spool.append(admission_data)
+                except Exception:
+                    spool.release(application_id)
+                    raise
+                spooled = True
+            else:
+                try:
+                    result = admissions_collection.insert_one(admission_data)
+                    application_id = str(result.inserted_id)
+                    bump_collection_version('Admissions')
+                except pymongo.errors.DuplicateKeyError:
+                    return jsonify({'success': False, 'message': 'Application with this phone number already exists'}), 400
+                except Exception as e:
+                    logger.warning(f'Admission insert failed, spooling for replay: {str(e)}')
+                    spool.append(admission_data)
+                    spooled = True
         else:
             admission_data['_id'] = application_id
             admission_data['timestamp'] = datetime.now().isoformat()
-            applications = load_applications_from_file()
-            applications.append(admission_data)
-            save_applications_to_file(applications)
+            with hot_file_lock():
+                version_before = applications_version()
+                applications = load_applications_from_file()
+                applications.append(admission_data)
+                save_applications_to_file(applications)
+                version_after = applications_version()
+            application_snapshots.apply(version_before, version_after, lambda snapshot: snapshot.append(admission_data))
 
         try:
-            file_exists = os.path.isfile('admissions.csv')
-            with open('admissions.csv', 'a', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['Application ID', 'Name', 'Email', 'Phone', 'Course', 'Message', 'Timestamp', 'Status']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                if not file_exists:
-                    writer.writeheader()
-                timestamp_str = admission_data['timestamp']
-                if not isinstance(timestamp_str, str):
-                    timestamp_str = timestamp_str.strftime('%Y-%m-%d %H:%M:%S')
-                writer.writerow({
-                    'Application ID': application_id,
-                    'Name': admission_data['name'],
-                    'Email': admission_data['email'],
-                    'Phone': admission_data['phone'],
-                    'Course': admission_data['course'],
-                    'Message': admission_data['message'],
-                    'Timestamp': timestamp_str,
-                    'Status': admission_data['status']
-                })
+            admissions_backup.append(admission_row(admission_data, application_id))
         except Exception as csv_error:
             print(f"⚠️ CSV backup failed: {csv_error}")
 
+        record_created('applications', admission_data, rollup_store())
+        publish_application_event('application.created', admission_data)
+
+        if spooled:
+            # Accepted but not yet stored; a duplicate of a stored application is dropped at replay
+            return jsonify({
+                'success': True,
+                'applicationId': application_id,
+                'provisional': True,
+                'message': 'Application received and will be confirmed once the database is available'
+            }), 202
         return jsonify({'success': True, 'applicationId': application_id}), 200
     except Exception as e:
         print(traceback.format_exc())
         return jsonify({'success': False, 'message': 'Failed to save application'}), 500
 
-@app.route('/api/students/check-email/<email>', methods=['GET'])
+@main_bp.route('/api/students/check-email/<email>', methods=['GET'])
 def check_email_exists(email):
     try:
         email_exists = False
-        if MONGODB_AVAILABLE and admissions_collection:
+        if MONGODB_AVAILABLE and admissions_collection is not None:
             existing = admissions_collection.find_one({'email': email})
             email_exists = existing is not None
         else:
             applications = load_applications_from_file()
             email_exists = any(app.get('email') == email for app in applications)
         return jsonify({'success': True, 'exists': email_exists}), 200
+    except CircuitOpenError as e:
+        return database_unavailable(e.retry_after)
     except Exception as e:
         print(traceback.format_exc())
         return jsonify({'success': False, 'message': 'Failed to check email'}), 500
 
 # Additional API endpoints that the frontend expects
-@app.route('/api/students/programs', methods=['GET'])
+PROGRAMS = [
+    {'id': 'gnm', 'name': 'General Nursing & Midwifery', 'duration': '3.5 Years'},
+    {'id': 'bsn', 'name': 'Bachelor of Science in Nursing', 'duration': '4 Years'},
+    {'id': 'paramedical', 'name': 'Paramedical in Nursing', 'duration': '2 Years'},
+    {'id': 'mlt', 'name': 'Medical Lab Technician', 'duration': '2 Years'},
+    {'id': 'cardiology', 'name': 'Cardiology Technician', 'duration': '1.5 Years'},
+    {'id': 'mha', 'name': 'Multipurpose Health Assistant', 'duration': '1 Year'}
+]
+
+INQUIRY_TYPES = [
+    {'id': 'admission', 'name': 'Admission Inquiry'},
+    {'id': 'course', 'name': 'Course Information'},
+    {'id': 'fees', 'name': 'Fee Structure'},
+    {'id': 'placement', 'name': 'Placement Assistance'},
+    {'id': 'other', 'name': 'Other'}
+]
+
+@main_bp.route('/api/students/programs', methods=['GET'])
 def get_programs():
-    programs = [
-        {'id': 'gnm', 'name': 'General Nursing & Midwifery', 'duration': '3.5 Years'},
-        {'id': 'bsn', 'name': 'Bachelor of Science in Nursing', 'duration': '4 Years'},
-        {'id': 'paramedical', 'name': 'Paramedical in Nursing', 'duration': '2 Years'},
-        {'id': 'mlt', 'name': 'Medical Lab Technician', 'duration': '2 Years'},
-        {'id': 'cardiology', 'name': 'Cardiology Technician', 'duration': '1.5 Years'},
-        {'id': 'mha', 'name': 'Multipurpose Health Assistant', 'duration': '1 Year'}
-    ]
-    return jsonify({'success': True, 'data': programs})
+    return jsonify({'success': True, 'data': PROGRAMS})
 
-@app.route('/api/students/stats', methods=['GET'])
+@main_bp.route('/api/students/stats', methods=['GET'])
 def get_student_stats():
     stats = {
         'total_students': 3240,
@@ -265,18 +556,11 @@ def get_student_stats():
     }
     return jsonify({'success': True, 'data': stats})
 
-@app.route('/api/contact/inquiry-types', methods=['GET'])
+@main_bp.route('/api/contact/inquiry-types', methods=['GET'])
 def get_inquiry_types():
-    inquiry_types = [
-        {'id': 'admission', 'name': 'Admission Inquiry'},
-        {'id': 'course', 'name': 'Course Information'},
-        {'id': 'fees', 'name': 'Fee Structure'},
-        {'id': 'placement', 'name': 'Placement Assistance'},
-        {'id': 'other', 'name': 'Other'}
-    ]
-    return jsonify({'success': True, 'data': inquiry_types})
+    return jsonify({'success': True, 'data': INQUIRY_TYPES})
 
-@app.route('/api/contact/stats', methods=['GET'])
+@main_bp.route('/api/contact/stats', methods=['GET'])
 def get_contact_stats():
     stats = {
         'total_inquiries': 1250,
@@ -286,64 +570,184 @@ def get_contact_stats():
     }
     return jsonify({'success': True, 'data': stats})
 
-@app.route('/api/applications', methods=['GET'])
+def build_applications_query(search_query, sort_by, sort_order):
+    """Build the MongoDB filter and sort for the applications listing"""
+    query = {}
+    if search_query:
+        query = {
+            '$or': [
+                {'name': {'$regex': search_query, '$options': 'i'}},
+                {'email': {'$regex': search_query, '$options': 'i'}},
+                {'phone': {'$regex': search_query, '$options': 'i'}},
+                {'_id': {'$regex': search_query, '$options': 'i'}}  # Application ID search
+            ]
+        }
+    
+    # Build sort criteria
+    sort_field = 'timestamp'
+    if sort_by == 'name':
+        sort_field = 'name'
+    elif sort_by == 'status':
+        sort_field = 'status'
+    
+    sort_direction = -1 if sort_order == 'desc' else 1
+    return query, sort_field, sort_direction
+
+def applications_version():
+    """Version of the admissions store: database counter, or the JSON file's mtime and size"""
+    if MONGODB_AVAILABLE and admissions_collection is not None:
+        return get_analytics_version('Admissions')
+    try:
+        stat = os.stat('applications.json')
+    except FileNotFoundError:
+        return 0
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
+
+def filter_applications(applications, search_query):
+    """Local-store equivalent of the listing's search filter"""
+    if not search_query:
+        return list(applications)
+    query = search_query.lower()
+    return [
+        app for app in applications
+        if (query in app.get('name', '').lower() or
+            query in app.get('email', '').lower() or
+            query in app.get('phone', '').lower() or
+            query in str(app.get('_id', '')).lower())
+    ]
+
+def sort_applications(applications, sort_by, sort_order):
+    if sort_by == 'name':
+        applications.sort(key=lambda x: x.get('name', '').lower(), reverse=(sort_order == 'desc'))
+    elif sort_by == 'status':
+        applications.sort(key=lambda x: x.get('status', ''), reverse=(sort_order == 'desc'))
+    else:  # date
+        applications.sort(key=lambda x: x.get('timestamp', ''), reverse=(sort_order == 'desc'))
+    return applications
+
+def parse_date_range(date_from, date_to):
+    """[start, end) datetimes for inclusive YYYY-MM-DD bounds; either may be None"""
+    start = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+    end = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1) if date_to else None
+    return start, end
+
+def application_archive():
+    """Archive segments for the store currently serving applications"""
+    return get_archive() if MONGODB_AVAILABLE else get_archive('json')
+
+def rollup_store():
+    """Rollups for the store currently serving applications, so the JSON fallback never connects to MongoDB"""
+    return get_rollup_store() if MONGODB_AVAILABLE else get_rollup_store('json')
+
+def applications_envelope(page, limit, total):
+    envelope = {'success': True}
+    if limit:
+        envelope['pagination'] = {
+            'page': page,
+            'limit': limit,
+            'total': total,
+            'pages': (total + limit - 1) // limit
+        }
+    return envelope
+
+@main_bp.route('/api/applications', methods=['GET'])
+@versioned('Admissions', applications_version)
 def get_applications():
     try:
         # Get query parameters
         search_query = request.args.get('search', '').strip()
         sort_by = request.args.get('sort', 'date')  # date, name, status
         sort_order = request.args.get('order', 'desc')  # asc, desc
+        # Optional pagination; without a limit the whole list is returned
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+        page = max(int(request.args.get('page', 1)), 1)
+        offset = (page - 1) * limit if limit else 0
+        total = None
+        # Optional date range (YYYY-MM-DD, inclusive); only a range reaches archived applications
+        try:
+            date_from, date_to = parse_date_range(request.args.get('from'), request.args.get('to'))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'from and to must be YYYY-MM-DD'}), 400
         
-        if MONGODB_AVAILABLE and admissions_collection:
-            # Build MongoDB query
-            query = {}
-            if search_query:
-                query = {
-                    '$or': [
-                        {'name': {'$regex': search_query, '$options': 'i'}},
-                        {'email': {'$regex': search_query, '$options': 'i'}},
-                        {'phone': {'$regex': search_query, '$options': 'i'}},
-                        {'_id': {'$regex': search_query, '$options': 'i'}}  # Application ID search
-                    ]
+        if MONGODB_AVAILABLE and admissions_collection is not None:
+            query, sort_field, sort_direction = build_applications_query(search_query, sort_by, sort_order)
+            archived = []
+            if date_from or date_to:
+                query['timestamp'] = {
+                    **({'$gte': date_from} if date_from else {}),
+                    **({'$lt': date_to} if date_to else {})
                 }
-            
-            # Build sort criteria
-            sort_field = 'timestamp'
-            if sort_by == 'name':
-                sort_field = 'name'
-            elif sort_by == 'status':
-                sort_field = 'status'
-            
-            sort_direction = -1 if sort_order == 'desc' else 1
-            applications = list(admissions_collection.find(query).sort(sort_field, sort_direction))
+                archived = list(application_archive().iter_range(
+                    date_from, date_to, {key: value for key, value in query.items() if key != 'timestamp'}
+                ))
+            if archived:
+                # The range reaches into archive segments: merge with the hot rows, then page
+                applications = sort_applications(merge_archived(admissions_analytics.find(query), archived), sort_by, sort_order)
+                if limit:
+                    total = len(applications)
+                    applications = applications[offset:offset + limit]
+                return jsonify({**applications_envelope(page, limit, total), 'data': applications}), 200
+            cursor = admissions_analytics.find(query).sort(sort_field, sort_direction)
+            if limit:
+                cursor = cursor.skip(offset).limit(limit)
+                total = admissions_analytics.count_documents(query)
+            if should_stream():
+                return stream_json_array(cursor.batch_size(get_batch_size()), envelope=applications_envelope(page, limit, total))
+            applications = list(cursor)
+        elif current_app.config['COLUMNAR_SNAPSHOT'] and not (date_from or date_to):
+            snapshot = application_snapshots.get(applications_version())
+            indices, total = snapshot.select(search_query, sort_by, sort_order == 'desc', offset, limit)
+            applications = snapshot.rows(indices)
+            if should_stream():
+                return stream_json_array(applications, envelope=applications_envelope(page, limit, total))
+            applications = list(applications)
         else:
-            applications = load_applications_from_file()
+            applications = filter_applications(load_applications_from_file(), search_query)
+            if date_from or date_to:
+                applications = [
+                    app for app in applications
+                    if in_range(app.get('timestamp'), date_from, date_to)
+                ]
+                applications = merge_archived(applications, filter_applications(
+                    application_archive().iter_range(date_from, date_to), search_query
+                ))
+            sort_applications(applications, sort_by, sort_order)
             
-            # Filter applications based on search query
-            if search_query:
-                filtered_apps = []
-                for app in applications:
-                    if (search_query.lower() in app.get('name', '').lower() or
-                        search_query.lower() in app.get('email', '').lower() or
-                        search_query.lower() in app.get('phone', '').lower() or
-                        search_query.lower() in app.get('_id', '').lower()):
-                        filtered_apps.append(app)
-                applications = filtered_apps
-            
-            # Sort applications
-            if sort_by == 'name':
-                applications.sort(key=lambda x: x.get('name', '').lower(), reverse=(sort_order == 'desc'))
-            elif sort_by == 'status':
-                applications.sort(key=lambda x: x.get('status', ''), reverse=(sort_order == 'desc'))
-            else:  # date
-                applications.sort(key=lambda x: x.get('timestamp', ''), reverse=(sort_order == 'desc'))
+            if limit:
+                total = len(applications)
+                applications = applications[offset:offset + limit]
+            if should_stream():
+                return stream_json_array(applications, envelope=applications_envelope(page, limit, total))
         
-        return jsonify({'success': True, 'data': applications}), 200
+        return jsonify({**applications_envelope(page, limit, total), 'data': applications}), 200
+    except CircuitOpenError as e:
+        return database_unavailable(e.retry_after)
     except Exception as e:
         print(traceback.format_exc())
         return jsonify({'success': False, 'message': 'Failed to fetch applications'}), 500
 
-@app.route('/api/applications/<application_id>/status', methods=['PUT'])
+@main_bp.route('/api/applications/events', methods=['GET'])
+def application_events_feed():
+    """Server-sent events: application.created, application.updated, follow_up.due and resync"""
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('lastEventId'))
+    subscription = application_events.subscribe(
+        int(last_event_id) if last_event_id and last_event_id.isdigit() else None,
+        limit=current_app.config['SSE_MAX_CONNECTIONS']
+    )
+    if subscription is None:
+        # Every stream slot in this worker is taken: the client refetches and retries later
+        stream = sse_busy(current_app.json.dumps, current_app.config['SSE_BUSY_RETRY_SECONDS'])
+    else:
+        stream = sse_stream(
+            subscription, current_app.json.dumps,
+            current_app.config['SSE_HEARTBEAT_SECONDS'], current_app.config['SSE_MAX_STREAM_SECONDS']
+        )
+    return Response(stream_with_context(stream), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # keep nginx from buffering the stream
+    })
+
+@main_bp.route('/api/applications/<application_id>/status', methods=['PUT'])
 def update_application_status(application_id):
     try:
         data = request.get_json()
@@ -352,34 +756,251 @@ def update_application_status(application_id):
         if not new_status:
             return jsonify({'success': False, 'message': 'Status is required'}), 400
         
-        if MONGODB_AVAILABLE and admissions_collection:
-            result = admissions_collection.update_one(
+        if MONGODB_AVAILABLE and admissions_collection is not None:
+            # One round trip; the pre-image gives the rollup the status this write replaced,
+            # so concurrent changes each move the counts from the status they overwrote
+            previous = admissions_collection.find_one_and_update(
                 {'_id': application_id},
-                {'$set': {'status': new_status}}
+                {'$set': {'status': new_status}},
+                projection={'status': 1, 'course': 1, 'timestamp': 1},
+                return_document=pymongo.ReturnDocument.BEFORE
             )
-            if result.matched_count == 0:
+            if previous is None:
                 return jsonify({'success': False, 'message': 'Application not found'}), 404
+            bump_collection_version('Admissions')
+            record_status_change('applications', previous, previous.get('status'), new_status, rollup_store())
         else:
-            applications = load_applications_from_file()
-            found = False
-            for app in applications:
-                if app.get('_id') == application_id:
-                    app['status'] = new_status
-                    found = True
-                    break
-            
-            if not found:
-                return jsonify({'success': False, 'message': 'Application not found'}), 404
-            
-            save_applications_to_file(applications)
+            with hot_file_lock():
+                version_before = applications_version()
+                applications = load_applications_from_file()
+                found = False
+                for app in applications:
+                    if app.get('_id') == application_id:
+                        previous_status = app.get('status')
+                        app['status'] = new_status
+                        found = True
+                        break
+                
+                if not found:
+                    return jsonify({'success': False, 'message': 'Application not found'}), 404
+                
+                save_applications_to_file(applications)
+                version_after = applications_version()
+            application_snapshots.apply(
+                version_before, version_after, lambda snapshot: snapshot.set_status(application_id, new_status)
+            )
+            record_status_change('applications', app, previous_status, new_status, rollup_store())
         
+        publish_application_event('application.updated', {'_id': application_id, 'status': new_status})
         return jsonify({'success': True, 'message': 'Status updated successfully'}), 200
+    except CircuitOpenError as e:
+        return database_unavailable(e.retry_after)
     except Exception as e:
         print(traceback.format_exc())
         return jsonify({'success': False, 'message': 'Failed to update status'}), 500
 
+DASHBOARD_DAYS = 30
+DASHBOARD_RECENT = 10
+
+def build_dashboard_pipeline(since, recent_limit=DASHBOARD_RECENT):
+    """One $facet aggregation covering every dashboard widget"""
+    return [{
+        '$facet': {
+            'total': [{'$count': 'count'}],
+            'byStatus': [
+                {'$group': {'_id': '$status', 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1}}
+            ],
+            'byCourse': [
+                {'$group': {'_id': '$course', 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1}}
+            ],
+            'byDay': [
+                {'$match': {'timestamp': {'$gte': since}}},
+                {'$group': {
+                    '_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$timestamp'}},
+                    'count': {'$sum': 1}
+                }}
+            ],
+            'recent': [
+                {'$sort': {'timestamp': -1}},
+                {'$limit': recent_limit}
+            ]
+        }
+    }]
+
+def summarize_applications(applications, since, recent_limit=DASHBOARD_RECENT):
+    """Compute the dashboard facets in a single pass over the local store"""
+    total = 0
+    by_status, by_course, by_day = {}, {}, {}
+    recent = []  # (timestamp, application), kept sorted and short
+    for application in applications:
+        total += 1
+        status = application.get('status')
+        by_status[status] = by_status.get(status, 0) + 1
+        course = application.get('course')
+        by_course[course] = by_course.get(course, 0) + 1
+
+        timestamp = application.get('timestamp')
+        if isinstance(timestamp, str):
+            try:
+                timestamp = datetime.fromisoformat(timestamp)
+            except ValueError:
+                timestamp = None
+        if timestamp is None:
+            continue
+        if timestamp >= since:
+            day = timestamp.strftime('%Y-%m-%d')
+            by_day[day] = by_day.get(day, 0) + 1
+        if len(recent) < recent_limit or timestamp > recent[-1][0]:
+            recent.append((timestamp, application))
+            recent.sort(key=lambda item: item[0], reverse=True)
+            del recent[recent_limit:]
+
+    def counts(groups):
+        return sorted(({'_id': key, 'count': count} for key, count in groups.items()), key=lambda g: -g['count'])
+
+    return {
+        'total': [{'count': total}] if total else [],
+        'byStatus': counts(by_status),
+        'byCourse': counts(by_course),
+        'byDay': [{'_id': day, 'count': count} for day, count in by_day.items()],
+        'recent': [application for _, application in recent]
+    }
+
+def summarize_snapshot(snapshot, since, recent_limit=DASHBOARD_RECENT):
+    """Dashboard facets from a columnar snapshot, without touching the rows"""
+    def counts(groups):
+        return sorted(({'_id': key, 'count': count} for key, count in groups.items()), key=lambda g: -g['count'])
+
+    return {
+        'total': [{'count': snapshot.size}] if snapshot.size else [],
+        'byStatus': counts(snapshot.count_by('status')),
+        'byCourse': counts(snapshot.count_by('course')),
+        'byDay': [{'_id': day, 'count': count} for day, count in snapshot.count_by_day(since).items()],
+        'recent': snapshot.latest(recent_limit)
+    }
+
+def add_archived(facets, since):
+    """Fold archived applications into the hot-store facets, so totals do not drop after an archive run"""
+    archive = application_archive()
+    summary = archive.summary()
+    if not summary['total']:
+        return facets
+
+    def merged(groups, archived):
+        counts = {group['_id']: group['count'] for group in groups}
+        for key, count in archived.items():
+            counts[key] = counts.get(key, 0) + count
+        return sorted(({'_id': key, 'count': count} for key, count in counts.items()), key=lambda g: -g['count'])
+
+    by_day = {group['_id']: group['count'] for group in facets['byDay']}
+    # Usually nothing: segments are older than ARCHIVE_AFTER_DAYS
+    for application in archive.iter_range(since, None):
+        day = parse_timestamp(application.get('timestamp')).strftime('%Y-%m-%d')
+        by_day[day] = by_day.get(day, 0) + 1
+    hot_total = facets['total'][0]['count'] if facets['total'] else 0
+    return {
+        **facets,
+        'total': [{'count': hot_total + summary['total']}],
+        'byStatus': merged(facets['byStatus'], summary['byStatus']),
+        'byCourse': merged(facets['byCourse'], summary['byCourse']),
+        'byDay': [{'_id': day, 'count': count} for day, count in by_day.items()]
+    }
+
+def format_dashboard(facets, since):
+    by_day = {group['_id']: group['count'] for group in facets['byDay']}
+    days = [(since + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(DASHBOARD_DAYS + 1)]
+    return {
+        'total': facets['total'][0]['count'] if facets['total'] else 0,
+        'byStatus': {group['_id'] or 'pending': group['count'] for group in facets['byStatus']},
+        'byCourse': [{'course': group['_id'], 'count': group['count']} for group in facets['byCourse']],
+        'byDay': [{'date': day, 'count': by_day.get(day, 0)} for day in days],
+        'recent': facets['recent'],
+        'generatedAt': datetime.now().isoformat()
+    }
+
+def compute_dashboard():
+    since = (datetime.now() - timedelta(days=DASHBOARD_DAYS)).replace(hour=0, minute=0, second=0, microsecond=0)
+    if MONGODB_AVAILABLE and admissions_collection is not None:
+        if get_storage_backend() == 'mongodb':
+            facets = next(admissions_analytics.aggregate(build_dashboard_pipeline(since)))
+        else:
+            facets = summarize_applications(admissions_analytics.find({}), since)
+    elif current_app.config['COLUMNAR_SNAPSHOT']:
+        facets = summarize_snapshot(application_snapshots.get(applications_version()), since)
+    else:
+        facets = summarize_applications(load_applications_from_file(), since)
+    return format_dashboard(add_archived(facets, since), since)
+
+# Short-lived dashboard cache; the lock makes concurrent misses share one computation
+_dashboard_cache = {'data': None, 'expires': 0.0}
+_dashboard_lock = threading.Lock()
+
+def get_dashboard(ttl):
+    if _dashboard_cache['expires'] > time.monotonic():
+        return _dashboard_cache['data']
+    with _dashboard_lock:
+        if _dashboard_cache['expires'] <= time.monotonic():
+            _dashboard_cache['data'] = compute_dashboard()
+            _dashboard_cache['expires'] = time.monotonic() + ttl
+        return _dashboard_cache['data']
+
+@main_bp.route('/api/admin/dashboard', methods=['GET'])
+def admin_dashboard():
+    try:
+        data = get_dashboard(current_app.config['DASHBOARD_CACHE_SECONDS'])
+        return jsonify({
+            'success': True,
+            'data': {
+                **data,
+                'programs': PROGRAMS,
+                'inquiryTypes': INQUIRY_TYPES
+            }
+        }), 200
+    except CircuitOpenError as e:
+        return database_unavailable(e.retry_after)
+    except Exception as e:
+        print(traceback.format_exc())
+        return jsonify({'success': False, 'message': 'Failed to load dashboard'}), 500
+
+@main_bp.route('/api/admin/trends', methods=['GET'])
+def admin_trends():
+    """Counts per day, week or month from the daily rollups"""
+    try:
+        source = request.args.get('source', 'applications')
+        granularity = request.args.get('granularity', 'day')
+        try:
+            end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else datetime.now().date()
+            start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else end - timedelta(days=29)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'from and to must be YYYY-MM-DD'}), 400
+
+        if source not in ROLLUP_SOURCES:
+            return jsonify({'success': False, 'message': f'source must be one of {list(ROLLUP_SOURCES)}'}), 400
+        if granularity not in GRANULARITIES:
+            return jsonify({'success': False, 'message': f'granularity must be one of {list(GRANULARITIES)}'}), 400
+        if start > end or (end - start).days > 3660:
+            return jsonify({'success': False, 'message': 'Invalid date range'}), 400
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'source': source,
+                'granularity': granularity,
+                'from': start.isoformat(),
+                'to': end.isoformat(),
+                'periods': query_trends(source, start, end, granularity, rollup_store())
+            }
+        }), 200
+    except CircuitOpenError as e:
+        return database_unavailable(e.retry_after)
+    except Exception as e:
+        print(traceback.format_exc())
+        return jsonify({'success': False, 'message': 'Failed to load trends'}), 500
+
 # Error handlers
-@app.errorhandler(404)
+@main_bp.app_errorhandler(404)
 def not_found(error):
     if request.path.startswith('/api/'):
         return jsonify({
@@ -390,19 +1011,23 @@ def not_found(error):
     # For non-API routes, serve index.html (SPA support)
     return send_file('index.html')
 
-@app.errorhandler(Exception)
+@main_bp.app_errorhandler(Exception)
 def handle_error(error):
     logger.error(f'Global error handler: {str(error)}')
     status_code = getattr(error, 'code', 500)
     return jsonify({
         'success': False,
-        'message': str(error) if app.debug else 'Internal server error'
+        'message': str(error) if current_app.debug else 'Internal server error'
     }), status_code
 
-if MONGODB_AVAILABLE:
-    atexit.register(disconnect_db)
+app = create_app()
 
 if __name__ == '__main__':
+    if '--startup-report' in sys.argv:
+        from utils.startup import startup_report
+        sys.exit(startup_report(sys.argv[1:]))
+
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
     port = int(os.getenv('PORT', 3000))
     debug = os.getenv('NODE_ENV') != 'production'
     print(f"🚀 Server running on http://localhost:{port}")
@@ -0,0 +1,194 @@
+# ASGI entry point with an asyncio-native read path
+#
+# The admin statistics aggregations, check-email and the follow-up list are
+# served directly on the async MongoDB driver so one worker can keep many
+# dashboard requests in flight. They use the same read preference, circuit
+# breaker and deadline budget as their WSGI views: statistics read with the
+# analytics read preference, while the duplicate check and follow-ups read the
+# primary. Every other request is handed to the Flask app unchanged, and so is
+# every request while the store is not MongoDB, MongoDB is unreachable or the
+# circuit is open. The applications listing always goes through WSGI for its
+# pagination, archive, ETag and streaming behaviour.
+#
+# Usage: uvicorn asgi:application --workers 4
+import asyncio
+import logging
+import re
+import time
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app
+from config.async_database import connect_async_db, disconnect_async_db, get_async_db
+from config.database import analytics_read_preference, breaker, get_storage_backend
+from models.student import Student
+from models.contact import Contact
+from utils.circuit_breaker import CircuitOpenError
+from utils.lazy import lazy_module
+
+pymongo = lazy_module('pymongo')
+
+logger = logging.getLogger(__name__)
+
+wsgi_application = WsgiToAsgi(flask_app)
+
+def analytics_collection(db, name):
+    return db.get_collection(name, read_preference=analytics_read_preference())
+
+async def guarded(budget_ms, *operations):
+    """Run operations concurrently through the circuit breaker within the endpoint's budget
+
+    `operations` are callables taking maxTimeMS and returning an awaitable,
+    so nothing is sent while the circuit rejects the call.
+    """
+    breaker.allow()
+    start = time.perf_counter()
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(*(operation(budget_ms or None) for operation in operations)),
+            budget_ms / 1000 if budget_ms else None
+        )
+    except asyncio.TimeoutError:
+        breaker.record(time.perf_counter() - start, pymongo.errors.ExecutionTimeout('deadline exceeded'))
+        raise
+    except Exception as e:
+        breaker.record(time.perf_counter() - start, e)
+        raise
+    breaker.record(time.perf_counter() - start)
+    return results
+
+async def student_stats(db, budget_ms):
+    try:
+        collection = analytics_collection(db, 'students')
+        pipeline, program_pipeline = Student.get_statistics_pipelines()
+        # Independent aggregations run concurrently
+        result, program_stats = await guarded(
+            budget_ms,
+            lambda max_time_ms: collection.aggregate(pipeline, maxTimeMS=max_time_ms).to_list(None),
+            lambda max_time_ms: collection.aggregate(program_pipeline, maxTimeMS=max_time_ms).to_list(None)
+        )
+        return {'success': True, 'data': Student.format_statistics(result, program_stats)}, 200
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f'Async get admin stats error: {str(e)}')
+        return {'success': False, 'message': 'Server error occurred'}, 500
+
+async def contact_stats(db, budget_ms):
+    try:
+        collection = analytics_collection(db, 'contacts')
+        pipeline, inquiry_pipeline = Contact.get_statistics_pipelines()
+        result, inquiry_stats = await guarded(
+            budget_ms,
+            lambda max_time_ms: collection.aggregate(pipeline, maxTimeMS=max_time_ms).to_list(None),
+            lambda max_time_ms: collection.aggregate(inquiry_pipeline, maxTimeMS=max_time_ms).to_list(None)
+        )
+        return {'success': True, 'data': Contact.format_statistics(result, inquiry_stats)}, 200
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f'Async get admin contact stats error: {str(e)}')
+        return {'success': False, 'message': 'Server error occurred'}, 500
+
+async def check_email(db, budget_ms, email):
+    try:
+        # A duplicate check, so it reads the primary like the WSGI view
+        collection = db['Admissions']
+        existing, = await guarded(
+            budget_ms,
+            lambda max_time_ms: collection.find_one({'email': email}, {'_id': 1}, max_time_ms=max_time_ms)
+        )
+        return {'success': True, 'exists': existing is not None}, 200
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f'Async check email error: {str(e)}')
+        return {'success': False, 'message': 'Failed to check email'}, 500
+
+async def follow_ups(db, budget_ms):
+    try:
+        # Primary, so a follow-up an admin just set is listed
+        collection = db['contacts']
+        projection = {field: 1 for field in Contact.FOLLOW_UP_FIELDS}
+        documents, = await guarded(
+            budget_ms,
+            lambda max_time_ms: collection.find(
+                Contact.get_follow_up_query(), projection, max_time_ms=max_time_ms
+            ).sort([('followUpDate', 1), ('_id', 1)]).to_list(None)
+        )
+        return {'success': True, 'data': [Contact.follow_up_summary(document) for document in documents]}, 200
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f'Async get follow-ups error: {str(e)}')
+        return {'success': False, 'message': 'Server error occurred'}, 500
+
+# (path pattern, handler, WSGI endpoint whose deadline applies) for GET requests served on the async driver
+ASYNC_ROUTES = [
+    (re.compile(r'^/api/students/check-email/(?P<email>[^/]+)$'), check_email, 'main.check_email_exists'),
+    (re.compile(r'^/api/students/admin/stats$'), student_stats, 'students.get_admin_stats'),
+    (re.compile(r'^/api/contact/admin/stats$'), contact_stats, 'contact.get_admin_stats'),
+    (re.compile(r'^/api/contact/admin/follow-ups$'), follow_ups, 'contact.get_follow_ups'),
+]
+
+def deadline_ms(endpoint):
+    return flask_app.config['DB_DEADLINES_MS'].get(endpoint, flask_app.config['DB_DEADLINE_MS'])
+
+def match_async_route(scope):
+    """(handler, WSGI endpoint, path parameters) for a request served on the async driver"""
+    if scope['method'] != 'GET' or get_storage_backend() != 'mongodb':
+        return None, None, None
+    for pattern, handler, endpoint in ASYNC_ROUTES:
+        match = pattern.match(scope['path'])
+        if match:
+            return handler, endpoint, match.groupdict()
+    return None, None, None
+
+async def send_json(send, payload, status):
+    # Serialize with the Flask provider so bodies match the WSGI responses
+    response = flask_app.json.response(payload)
+    body = response.get_data()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', response.mimetype.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1')),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await connect_async_db()
+            except Exception as e:
+                # Reads fall through to the Flask app (and its local storage fallback)
+                logger.warning(f'Async MongoDB unavailable, serving reads through WSGI: {e}')
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            disconnect_async_db()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    db = get_async_db()
+    if scope['type'] == 'http' and db is not None:
+        handler, endpoint, params = match_async_route(scope)
+        if handler is not None:
+            try:
+                payload, status = await handler(db, deadline_ms(endpoint), **params)
+            except CircuitOpenError:
+                # The WSGI view answers for an open circuit
+                pass
+            else:
+                await send_json(send, payload, status)
+                return
+
+    await wsgi_application(scope, receive, send)
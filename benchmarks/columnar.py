@@ -0,0 +1,156 @@
+# Micro-benchmark: list-of-dicts vs columnar snapshot for local-mode listings
+#
+# Times the /api/applications search and the three sort modes, plus the
+# dashboard's group-by counts, on both representations of the same synthetic
+# data. list_ms starts from already parsed dicts; request_speedup also charges
+# the list path the applications.json parse every local request pays, which
+# the snapshot only pays when the file changes.
+#
+# It also times append() and set_status(), which keep the snapshot's sort
+# indexes current after a write instead of rebuilding them.
+#
+# Example:
+#   python benchmarks/columnar.py --sizes 100000,1000000 --repeat 5
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datasets import generate_applications  # noqa: E402
+from utils.columnar import ApplicationSnapshot  # noqa: E402
+
+def list_select(applications, search_query, sort_by, sort_order):
+    """The local branch of get_applications"""
+    if search_query:
+        query = search_query.lower()
+        applications = [
+            app for app in applications
+            if (query in app.get('name', '').lower() or
+                query in app.get('email', '').lower() or
+                query in app.get('phone', '').lower() or
+                query in app.get('_id', '').lower())
+        ]
+    else:
+        applications = list(applications)
+    if sort_by == 'name':
+        applications.sort(key=lambda x: x.get('name', '').lower(), reverse=(sort_order == 'desc'))
+    elif sort_by == 'status':
+        applications.sort(key=lambda x: x.get('status', ''), reverse=(sort_order == 'desc'))
+    else:
+        applications.sort(key=lambda x: x.get('timestamp', ''), reverse=(sort_order == 'desc'))
+    return applications
+
+def list_group_counts(applications):
+    by_status, by_course = {}, {}
+    for application in applications:
+        status = application.get('status')
+        by_status[status] = by_status.get(status, 0) + 1
+        course = application.get('course')
+        by_course[course] = by_course.get(course, 0) + 1
+    return by_status, by_course
+
+# name, search, sort, order, page size (None = the whole list, as the endpoint returns)
+CASES = [
+    ('search_reddy', 'reddy', 'date', 'desc', None),
+    ('search_rare', '900004', 'date', 'desc', None),
+    ('sort_date', '', 'date', 'desc', None),
+    ('sort_name', '', 'name', 'asc', None),
+    ('sort_status', '', 'status', 'asc', None),
+    ('sort_date_first_50', '', 'date', 'desc', 50),
+]
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run(size, repeat):
+    applications = list(generate_applications(size))
+    result = {'size': size}
+
+    # What every list-path request pays first to read applications.json
+    serialized = json.dumps(applications)
+    parse_s = best_of(1, lambda: json.loads(serialized))
+    result['list_json_parse_s'] = round(parse_s, 4)
+    del serialized
+
+    start = time.perf_counter()
+    snapshot = ApplicationSnapshot(applications)
+    result['snapshot_build_s'] = round(time.perf_counter() - start, 4)
+    for sort_by in ('date', 'name', 'status'):
+        snapshot.select(sort_by=sort_by, limit=1)  # warm, as after the first request
+    result['snapshot_warm_s'] = round(time.perf_counter() - start, 4)
+
+    cases = {}
+    for name, search, sort_by, order, page in CASES:
+        def list_path():
+            rows = list_select(applications, search, sort_by, order)
+            return rows[:page] if page else rows
+
+        def snapshot_path():
+            indices, _ = snapshot.select(search, sort_by, order == 'desc', 0, page)
+            return list(snapshot.rows(indices))
+
+        assert [row['_id'] for row in list_path()] == [row['_id'] for row in snapshot_path()], name
+        list_s = best_of(repeat, list_path)
+        snapshot_s = best_of(repeat, snapshot_path)
+        cases[name] = {
+            'rows': len(list_path()),
+            'list_ms': round(list_s * 1000, 2),
+            'snapshot_ms': round(snapshot_s * 1000, 2),
+            'speedup': round(list_s / snapshot_s, 1) if snapshot_s else None,
+            'request_speedup': round((parse_s + list_s) / snapshot_s, 1) if snapshot_s else None
+        }
+
+    list_s = best_of(repeat, lambda: list_group_counts(applications))
+    snapshot_s = best_of(repeat, lambda: (snapshot.count_by('status'), snapshot.count_by('course')))
+    cases['group_counts'] = {
+        'list_ms': round(list_s * 1000, 2),
+        'snapshot_ms': round(snapshot_s * 1000, 2),
+        'speedup': round(list_s / snapshot_s, 1) if snapshot_s else None
+    }
+    result['cases'] = cases
+
+    # Keeping the snapshot current after a write, instead of rebuilding it
+    new_rows = list(generate_applications(1000, seed=7))
+    for offset, row in enumerate(new_rows):
+        row['_id'] = row['phone'] = f'7{offset:09d}'
+    start = time.perf_counter()
+    for row in new_rows:
+        snapshot.append(row)
+    result['append_us'] = round((time.perf_counter() - start) / len(new_rows) * 1e6, 1)
+    statuses = ['approved', 'rejected']
+    start = time.perf_counter()
+    for offset, row in enumerate(new_rows):
+        snapshot.set_status(row['_id'], statuses[offset % 2])
+    result['set_status_us'] = round((time.perf_counter() - start) / len(new_rows) * 1e6, 1)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare list-of-dicts and columnar listings')
+    parser.add_argument('--sizes', default='100000,1000000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(',')):
+        results.append(run(size, args.repeat))
+        print(json.dumps(results[-1], indent=2), flush=True)
+        gc.collect()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
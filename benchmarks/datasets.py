@@ -0,0 +1,91 @@
+# Synthetic data generators shaped like the documents the app stores
+from datetime import datetime, timedelta
+import random
+
+COURSES = [
+    'General Nursing and Midwifery (GNM)',
+    'Bachelor of Science in Nursing (BSc Nursing)',
+    'Paramedical Courses',
+    'Medical Lab Technician',
+    'Cardiology Technician',
+    'Multipurpose Health Assistant'
+]
+APPLICATION_STATUSES = ['pending', 'approved', 'rejected', 'waitlisted']
+STUDENT_STATUSES = ['Pending', 'Under Review', 'Approved', 'Rejected', 'Waitlisted']
+CONTACT_STATUSES = ['New', 'In Progress', 'Responded', 'Resolved', 'Closed']
+INQUIRY_TYPES = ['General Inquiry', 'Admission Information', 'Course Details', 'Fee Structure', 'Other']
+FIRST_NAMES = ['Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Divya', 'Kiran', 'Meera']
+LAST_NAMES = ['Reddy', 'Sharma', 'Kumar', 'Naidu', 'Rao', 'Patel', 'Iyer', 'Gupta', 'Singh', 'Das']
+
+BASE_DATE = datetime(2025, 1, 1)
+
+def _name(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+def generate_applications(count, seed=42, iso_timestamps=True):
+    """Admission documents as written by /save-admission"""
+    rng = random.Random(seed)
+    for i in range(count):
+        first, last = _name(rng)
+        phone = f'9{i:09d}'
+        timestamp = BASE_DATE + timedelta(seconds=rng.randint(0, 365 * 86400))
+        yield {
+            '_id': phone,
+            'name': f'{first} {last}',
+            'email': f'{first.lower()}.{last.lower()}{i}@example.com',
+            'phone': phone,
+            'course': rng.choice(COURSES),
+            'message': '',
+            'timestamp': timestamp.isoformat() if iso_timestamps else timestamp,
+            'status': rng.choice(APPLICATION_STATUSES)
+        }
+
+def generate_students(count, seed=43):
+    """Student documents as written by Student.create"""
+    rng = random.Random(seed)
+    for i in range(count):
+        first, last = _name(rng)
+        created = BASE_DATE + timedelta(seconds=rng.randint(0, 365 * 86400))
+        yield {
+            'firstName': first,
+            'lastName': last,
+            'email': f'{first.lower()}.{last.lower()}{i}@example.com',
+            'phone': f'8{i:09d}',
+            'dateOfBirth': datetime(2000 + rng.randint(0, 6), rng.randint(1, 12), rng.randint(1, 28)),
+            'gender': rng.choice(['Male', 'Female', 'Other']),
+            'program': rng.choice(COURSES),
+            'admissionYear': 2026,
+            'applicationStatus': rng.choice(STUDENT_STATUSES),
+            'isActive': True,
+            'createdAt': created,
+            'updatedAt': created
+        }
+
+def generate_contacts(count, seed=44):
+    """Contact documents as written by Contact.create"""
+    rng = random.Random(seed)
+    for i in range(count):
+        first, last = _name(rng)
+        created = BASE_DATE + timedelta(seconds=rng.randint(0, 365 * 86400))
+        inquiry_type = rng.choice(INQUIRY_TYPES)
+        follow_up = inquiry_type in ['Admission Information', 'Course Details', 'Fee Structure']
+        contact = {
+            'name': f'{first} {last}',
+            'email': f'{first.lower()}{i}@example.com',
+            'phone': f'7{i:09d}',
+            'subject': 'Question',
+            'message': 'Please share details about the program.',
+            'inquiryType': inquiry_type,
+            'programInterest': rng.choice(COURSES),
+            'status': rng.choice(CONTACT_STATUSES),
+            'priority': 'Medium',
+            'source': 'Website',
+            'isActive': rng.random() > 0.05,
+            'isSpam': False,
+            'followUpRequired': follow_up,
+            'createdAt': created,
+            'updatedAt': created
+        }
+        if follow_up:
+            contact['followUpDate'] = created + timedelta(days=3)
+        yield contact
@@ -0,0 +1,228 @@
+# Load-testing harness for the admissions and admin APIs
+#
+# Seeds a synthetic dataset, drives each endpoint in-process at a fixed
+# concurrency and prints throughput and p50/p95/p99 latency as JSON.
+# Every (backend, size) pair runs in its own subprocess so module state,
+# caches and connections never leak between runs.
+#
+# Examples:
+#   python benchmarks/loadtest.py --backends json,sqlite,mongomock --sizes 1000,100000
+#   python benchmarks/loadtest.py --backends mongodb --mongodb-uri mongodb://localhost:27017 \
+#       --sizes 1000000 --concurrency 16 --output results.json
+#
+# The mongodb backend DROPS and reseeds the Admissions, students and contacts
+# collections of the AmericanCollege database: point it at a disposable mongod.
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKENDS = ['json', 'sqlite', 'mongomock', 'mongodb']
+
+# name, method, path, requires MongoDB
+SCENARIOS = [
+    ('save_admission', 'POST', '/save-admission', False),
+    ('applications_search', 'GET', '/api/applications?search=reddy', False),
+    ('applications_sort_date', 'GET', '/api/applications?sort=date&order=desc', False),
+    ('applications_sort_name', 'GET', '/api/applications?sort=name&order=asc', False),
+    ('applications_sort_status', 'GET', '/api/applications?sort=status&order=asc', False),
+    ('students_admin_all', 'GET', '/api/students/admin/all?page=1&limit=50', True),
+    ('contacts_admin_all', 'GET', '/api/contact/admin/all?page=1&limit=50', True),
+    ('student_stats', 'GET', '/api/students/stats', False),
+    ('contact_stats', 'GET', '/api/contact/stats', False),
+    ('student_admin_stats', 'GET', '/api/students/admin/stats', True),
+    ('contact_admin_stats', 'GET', '/api/contact/admin/stats', True),
+]
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def seed_mongo(db, size, batch=10000):
+    from datasets import generate_applications, generate_students, generate_contacts
+
+    for name, documents in [
+        ('Admissions', generate_applications(size, iso_timestamps=False)),
+        ('students', generate_students(size)),
+        ('contacts', generate_contacts(size)),
+    ]:
+        db[name].drop()
+        chunk = []
+        for document in documents:
+            chunk.append(document)
+            if len(chunk) >= batch:
+                db[name].insert_many(chunk, ordered=False)
+                chunk = []
+        if chunk:
+            db[name].insert_many(chunk, ordered=False)
+
+def prepare_backend(backend, size, mongodb_uri):
+    """Seed data and return the initialized app module"""
+    from datasets import generate_applications
+
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.environ['RATELIMIT_STORAGE_URI'] = 'memory://'
+
+    if backend == 'json':
+        os.environ['MONGODB_URI'] = ''
+        with open('applications.json', 'w') as f:
+            json.dump(list(generate_applications(size)), f)
+    elif backend == 'mongomock':
+        import mongomock
+        import config.database as database
+        database.MongoClient = mongomock.MongoClient
+        os.environ['MONGODB_URI'] = 'mongodb://loadtest-in-memory'
+    elif backend == 'sqlite':
+        os.environ['STORAGE_BACKEND'] = 'sqlite'
+        os.environ['SQLITE_PATH'] = os.path.abspath('loadtest.sqlite3')
+    else:
+        os.environ['MONGODB_URI'] = mongodb_uri
+
+    import app as app_module
+    app_module.init_resources()
+
+    if backend != 'json':
+        if not app_module.MONGODB_AVAILABLE:
+            raise RuntimeError(f'MongoDB not reachable for backend {backend}')
+        seed_mongo(app_module.db, size)
+
+    return app_module
+
+def run_scenario(flask_app, method, path, total, concurrency):
+    phones = itertools.count(6000000000)
+
+    def worker(count):
+        client = flask_app.test_client()
+        samples = []
+        errors = 0
+        received = 0
+        for _ in range(count):
+            start = time.perf_counter()
+            if method == 'POST':
+                phone = str(next(phones))
+                response = client.post(path, json={
+                    'name': 'Load Test', 'email': f'load{phone}@example.com',
+                    'phone': phone, 'course': 'Medical Lab Technician'
+                })
+            else:
+                response = client.get(path)
+            received += len(response.get_data())
+            samples.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+        return samples, errors, received
+
+    shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, [share for share in shares if share]))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(sample for samples, _, _ in results for sample in samples)
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors, _ in results),
+        # A sudden drop here flags truncated or empty result sets, not a speedup
+        'avg_response_bytes': sum(received for _, _, received in results) // max(len(latencies), 1),
+        'duration_s': round(elapsed, 4),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3)
+        }
+    }
+
+def run_one(args):
+    """Run every scenario against one backend and dataset size (subprocess entry)"""
+    workdir = tempfile.mkdtemp(prefix='acn-loadtest-')
+    sys.path[:0] = [REPO_ROOT, os.path.join(REPO_ROOT, 'benchmarks')]
+    os.chdir(workdir)
+
+    seed_start = time.perf_counter()
+    app_module = prepare_backend(args.backend, args.size, args.mongodb_uri)
+    seed_time = time.perf_counter() - seed_start
+
+    scenarios = {}
+    selected = set(args.scenarios.split(',')) if args.scenarios else None
+    for name, method, path, requires_mongo in SCENARIOS:
+        if selected and name not in selected:
+            continue
+        if requires_mongo and not app_module.MONGODB_AVAILABLE:
+            scenarios[name] = {'skipped': 'requires MongoDB'}
+            continue
+        scenarios[name] = run_scenario(app_module.app, method, path, args.requests, args.concurrency)
+
+    return {
+        'backend': args.backend,
+        'size': args.size,
+        'concurrency': args.concurrency,
+        'requests_per_scenario': args.requests,
+        'seed_time_s': round(seed_time, 3),
+        'scenarios': scenarios
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the admissions and admin APIs')
+    parser.add_argument('--backends', default='json,mongomock',
+                        help=f'comma-separated list from {BACKENDS}')
+    parser.add_argument('--sizes', default='1000,100000,1000000',
+                        help='comma-separated dataset sizes (documents per collection)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--scenarios', default='', help='comma-separated subset of scenario names')
+    parser.add_argument('--mongodb-uri', default=os.getenv('LOADTEST_MONGODB_URI', 'mongodb://localhost:27017'))
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--backend', help=argparse.SUPPRESS)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--run-one', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(args)))
+        return
+
+    runs = []
+    for backend in args.backends.split(','):
+        if backend not in BACKENDS:
+            parser.error(f'unknown backend {backend}')
+        for size in (int(size) for size in args.sizes.split(',')):
+            command = [
+                sys.executable, os.path.abspath(__file__), '--run-one',
+                '--backend', backend, '--size', str(size),
+                '--concurrency', str(args.concurrency), '--requests', str(args.requests),
+                '--scenarios', args.scenarios, '--mongodb-uri', args.mongodb_uri
+            ]
+            print(f'running backend={backend} size={size}', file=sys.stderr)
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                runs.append({'backend': backend, 'size': size, 'error': completed.stderr.strip().splitlines()[-1:]})
+                continue
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': runs
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
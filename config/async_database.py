@@ -0,0 +1,70 @@
+import logging
+import os
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Global async database connection (one per event loop / process)
+async_client = None
+async_db = None
+
+async def connect_async_db(mongodb_uri=None, client=None):
+    """Connect to MongoDB with the asyncio driver
+
+    An already constructed client (e.g. an in-memory stand-in for tests)
+    can be passed instead of a URI.
+    """
+    global async_client, async_db
+
+    try:
+        if client is None:
+            # Imported lazily so the WSGI app does not require motor
+            from motor.motor_asyncio import AsyncIOMotorClient
+
+            if not mongodb_uri:
+                mongodb_uri = os.getenv('MONGODB_URI')
+                if not mongodb_uri:
+                    raise ValueError("MONGODB_URI environment variable is required")
+
+            client = AsyncIOMotorClient(
+                mongodb_uri,
+                serverSelectionTimeoutMS=5000,  # 5 second timeout
+                connectTimeoutMS=10000,         # 10 second connection timeout
+                socketTimeoutMS=20000,          # 20 second socket timeout
+                retryWrites=True
+            )
+
+        # Test the connection
+        await client.admin.command('ping')
+
+        async_client = client
+        async_db = client['AmericanCollege']
+
+        logger.info('Async MongoDB Connected')
+        return async_db
+
+    except Exception as error:
+        logger.error(f'Async database connection failed: {str(error)}')
+        raise error
+
+def disconnect_async_db():
+    """Disconnect the async MongoDB client"""
+    global async_client, async_db
+
+    try:
+        if async_client is not None:
+            async_client.close()
+            logger.info('Async MongoDB connection closed')
+    except Exception as error:
+        logger.error(f'Error closing async database connection: {str(error)}')
+    finally:
+        async_client = None
+        async_db = None
+
+def get_async_db():
+    """Get async database instance (None when not connected)"""
+    return async_db
+
+def get_async_collection(collection_name):
+    """Get a specific async collection"""
+    return async_db[collection_name]
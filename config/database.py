@@ -1,7 +1,12 @@
-import pymongo
-from pymongo import MongoClient
 import logging
 import os
+import time
+from utils.lazy import lazy_module
+from utils.metrics import get_mongo_listeners
+from config.sqlite_database import connect_sqlite, bump_sqlite_version, get_sqlite_version
+from utils.circuit_breaker import CircuitBreaker, GuardedCollection
+
+pymongo = lazy_module('pymongo')
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -9,12 +14,57 @@ logger = logging.getLogger(__name__)
 # Global database connection
 db_client = None
 db = None
+# PID that owns db_client; MongoClient must not be reused across fork
+_client_pid = None
+
+# Shared by every MongoDB collection handed out by get_collection
+breaker = CircuitBreaker(
+    'mongodb',
+    failure_rate=float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5)),
+    slow_call_ms=int(os.getenv('CIRCUIT_SLOW_CALL_MS', 1000)),
+    window_seconds=int(os.getenv('CIRCUIT_WINDOW_SECONDS', 30)),
+    min_calls=int(os.getenv('CIRCUIT_MIN_CALLS', 10)),
+    open_seconds=float(os.getenv('CIRCUIT_OPEN_SECONDS', 5))
+)
+
+# Admin listings, statistics and rollups tolerate slightly stale data and may
+# read from secondaries; duplicate checks and read-after-write stay on the primary
+ANALYTICS_READ_PREFERENCE = os.getenv('ANALYTICS_READ_PREFERENCE', 'secondaryPreferred')
+ANALYTICS_MAX_STALENESS_SECONDS = int(os.getenv('ANALYTICS_MAX_STALENESS_SECONDS', 120))
+# MongoDB rejects maxStalenessSeconds below 90 (or below heartbeat interval + 10s)
+MIN_MAX_STALENESS_SECONDS = 90
+
+_READ_PREFERENCES = {
+    'primary': 'Primary',
+    'primarypreferred': 'PrimaryPreferred',
+    'secondary': 'Secondary',
+    'secondarypreferred': 'SecondaryPreferred',
+    'nearest': 'Nearest'
+}
+
+def MongoClient(*args, **kwargs):
+    """pymongo.MongoClient, with the driver imported on first use; harnesses may replace this name"""
+    return pymongo.MongoClient(*args, **kwargs)
+
+def _probe():
+    with pymongo.timeout(2):
+        db_client.admin.command('ping')
+
+def get_storage_backend():
+    """Configured storage backend: mongodb (default), sqlite or json"""
+    return os.getenv('STORAGE_BACKEND', 'mongodb').lower()
 
 def connect_db(mongodb_uri=None):
-    """Connect to MongoDB database"""
-    global db_client, db
+    """Connect to MongoDB database (or the SQLite store when STORAGE_BACKEND=sqlite)"""
+    global db_client, db, _client_pid
     
     try:
+        if get_storage_backend() == 'sqlite':
+            # The SQLite handle answers the same db[name] / admin.command('ping') calls
+            db = db_client = connect_sqlite(os.getenv('SQLITE_PATH'))
+            _client_pid = os.getpid()
+            return db
+
         # Use provided URI or get from environment
         if not mongodb_uri:
             mongodb_uri = os.getenv('MONGODB_URI')
@@ -27,7 +77,8 @@ def connect_db(mongodb_uri=None):
             serverSelectionTimeoutMS=5000,  # 5 second timeout
             connectTimeoutMS=10000,         # 10 second connection timeout
             socketTimeoutMS=20000,          # 20 second socket timeout
-            retryWrites=True
+            retryWrites=True,
+            event_listeners=get_mongo_listeners()
         )
         
         # Test the connection
@@ -40,6 +91,8 @@ def connect_db(mongodb_uri=None):
             db_name = 'AmericanCollege'
             
         db = db_client[db_name]
+        _client_pid = os.getpid()
+        breaker.probe = _probe
         
         logger.info(f'MongoDB Connected: {db_client.address}')
         logger.info(f'Database Name: {db_name}')
@@ -64,23 +117,94 @@ def disconnect_db():
 def get_db():
     """Get database instance"""
     global db
-    if db is None:
+    if db is None or _client_pid != os.getpid():
         connect_db()
     return db
 
-def get_collection(collection_name):
-    """Get a specific collection"""
+def analytics_read_preference():
+    """Read preference for analytics reads (ANALYTICS_READ_PREFERENCE, ANALYTICS_MAX_STALENESS_SECONDS)"""
+    name = _READ_PREFERENCES.get(ANALYTICS_READ_PREFERENCE.lower())
+    if name is None:
+        raise ValueError(f'Unknown ANALYTICS_READ_PREFERENCE: {ANALYTICS_READ_PREFERENCE}')
+    if name == 'Primary':
+        return pymongo.read_preferences.Primary()
+    max_staleness = ANALYTICS_MAX_STALENESS_SECONDS
+    if 0 <= max_staleness < MIN_MAX_STALENESS_SECONDS:
+        logger.warning(f'ANALYTICS_MAX_STALENESS_SECONDS={max_staleness} is below {MIN_MAX_STALENESS_SECONDS}; using {MIN_MAX_STALENESS_SECONDS}')
+        max_staleness = MIN_MAX_STALENESS_SECONDS
+    return getattr(pymongo.read_preferences, name)(max_staleness=max_staleness)
+
+def reads_from_secondaries():
+    """True when analytics reads may be served by a lagging secondary"""
+    return get_storage_backend() == 'mongodb' and ANALYTICS_READ_PREFERENCE.lower() != 'primary'
+
+def get_collection(collection_name, analytics=False):
+    """Get a specific collection (MongoDB collections go through the circuit breaker)
+
+    With `analytics` the MongoDB collection reads with the analytics read
+    preference. Use it only for reads that tolerate staleness, never for
+    duplicate checks or reads that must see the request's own writes.
+    """
     database = get_db()
-    return database[collection_name]
+    if get_storage_backend() == 'sqlite':
+        return database[collection_name]
+    collection = database[collection_name]
+    if analytics:
+        collection = collection.with_options(read_preference=analytics_read_preference())
+    return GuardedCollection(collection, breaker)
 
 # Collection helpers
-def get_students_collection():
+def get_students_collection(analytics=False):
     """Get students collection"""
-    return get_collection('students')
+    return get_collection('students', analytics)
 
-def get_contacts_collection():
+def get_contacts_collection(analytics=False):
     """Get contacts collection"""
-    return get_collection('contacts')
+    return get_collection('contacts', analytics)
+
+# Collection versions (advanced on every write, used for list ETags)
+VERSIONS_COLLECTION = 'collection_versions'
+
+def bump_collection_version(collection_name):
+    """Advance a collection's version after a write"""
+    try:
+        if get_storage_backend() == 'sqlite':
+            get_db()
+            return bump_sqlite_version(collection_name)
+        result = get_collection(VERSIONS_COLLECTION).find_one_and_update(
+            {'_id': collection_name},
+            {'$inc': {'version': 1}},
+            upsert=True,
+            return_document=pymongo.ReturnDocument.AFTER
+        )
+        return result['version']
+    except Exception as error:
+        # The write itself succeeded; the list ETag just changes on the next write
+        logger.error(f'Failed to bump {collection_name} version: {str(error)}')
+        return None
+
+def get_collection_version(collection_name):
+    """Current version of a collection (0 before its first write)"""
+    if get_storage_backend() == 'sqlite':
+        get_db()
+        return get_sqlite_version(collection_name)
+    document = get_collection(VERSIONS_COLLECTION).find_one({'_id': collection_name})
+    return document['version'] if document else 0
+
+def get_analytics_version(collection_name):
+    """ETag version for a view that reads through the analytics read preference
+
+    The primary's counter can be ahead of the secondary that serves the
+    list, and an ETag for the new version on the old rows would keep
+    answering 304 until the next write. Reading the counter from a
+    secondary and adding the current staleness window makes such an ETag
+    expire within the window instead.
+    """
+    if not reads_from_secondaries():
+        return get_collection_version(collection_name)
+    document = get_collection(VERSIONS_COLLECTION, analytics=True).find_one({'_id': collection_name})
+    window = int(time.time()) // max(ANALYTICS_MAX_STALENESS_SECONDS, MIN_MAX_STALENESS_SECONDS)
+    return f"{document['version'] if document else 0}-{window}"
 
 # Database health check
 def health_check():
@@ -0,0 +1,737 @@
+from datetime import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+from utils.lazy import lazy_module
+
+bson = lazy_module('bson')
+pymongo = lazy_module('pymongo')
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Indexed fields (and full-text fields) per collection. Indexes are built on the
+# same json_extract() expressions the query translator emits, so the planner
+# can use them for filters and sorts.
+COLLECTION_SCHEMAS = {
+    'Admissions': {
+        'indexes': ['phone', 'email', 'timestamp', 'status'],
+        'fts': ['name', 'email', 'phone', '_id']
+    },
+    'Admissions_archive': {
+        'indexes': ['phone', 'timestamp', 'status'],
+        'fts': ['name', 'email', 'phone', '_id']
+    },
+    'students': {
+        'indexes': ['email', 'phone', 'createdAt', 'applicationStatus', 'program', 'studentId'],
+        'fts': []
+    },
+    'contacts': {
+        'indexes': ['email', 'phone', 'createdAt', 'status', 'inquiryType', 'followUpDate', 'isActive', 'archivedAt'],
+        'fts': []
+    },
+    'contacts_archive': {
+        'indexes': ['email', 'createdAt', 'deletedAt'],
+        'fts': []
+    }
+}
+
+ISO_DATETIME = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?$')
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$')
+
+# Global SQLite configuration; connections are opened per thread and per process
+db_path = None
+_local = threading.local()
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+class SQLiteDatabase:
+    """Database handle exposing the parts of the pymongo Database/MongoClient API the app uses"""
+
+    def __init__(self, path):
+        global db_path
+        db_path = path
+        self.path = path
+        self.address = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+
+    def __getitem__(self, collection_name):
+        return get_sqlite_collection(collection_name)
+
+    @property
+    def admin(self):
+        return self
+
+    def command(self, name, *args, **kwargs):
+        if name != 'ping':
+            raise NotImplementedError(f'Unsupported command: {name}')
+        get_connection().execute('SELECT 1').fetchone()
+        return {'ok': 1.0}
+
+    def close(self):
+        disconnect_sqlite()
+
+def connect_sqlite(path=None):
+    """Open the SQLite store (WAL mode) and return a database handle"""
+    database = SQLiteDatabase(path or os.getenv('SQLITE_PATH', 'acn.sqlite3'))
+    connection = get_connection()
+    mode = connection.execute('PRAGMA journal_mode').fetchone()[0]
+    logger.info(f'SQLite store ready: {database.path} (journal_mode={mode})')
+    return database
+
+def get_connection():
+    """Get this thread's connection, opening it on first use"""
+    connection = getattr(_local, 'connection', None)
+    if connection is not None and _local.pid == os.getpid() and _local.path == db_path:
+        return connection
+
+    if db_path is None:
+        raise ValueError("SQLite store is not configured")
+
+    # A large statement cache keeps the prepared statements for the
+    # translated queries alive for the lifetime of the connection
+    connection = sqlite3.connect(db_path, timeout=5.0, isolation_level=None, cached_statements=512)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('PRAGMA busy_timeout=5000')
+    connection.create_function('regexp', 2, _regexp, deterministic=True)
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS _collection_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)'
+    )
+
+    _local.connection = connection
+    _local.pid = os.getpid()
+    _local.path = db_path
+    return connection
+
+def bump_sqlite_version(collection_name):
+    """Increment and return a collection's version"""
+    row = get_connection().execute(
+        'INSERT INTO _collection_versions (name, version) VALUES (?, 1) '
+        'ON CONFLICT(name) DO UPDATE SET version = version + 1 RETURNING version',
+        (collection_name,)
+    ).fetchone()
+    return row[0]
+
+def get_sqlite_version(collection_name):
+    row = get_connection().execute(
+        'SELECT version FROM _collection_versions WHERE name = ?', (collection_name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+def disconnect_sqlite():
+    """Close this thread's SQLite connection"""
+    connection = getattr(_local, 'connection', None)
+    if connection is not None:
+        connection.close()
+        _local.connection = None
+
+def get_sqlite_collection(collection_name):
+    """Get a MongoDB-style collection backed by SQLite"""
+    return SQLiteCollection(collection_name)
+
+def _regexp(pattern, value):
+    if value is None:
+        return False
+    return re.search(pattern, str(value)) is not None
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bson.ObjectId):
+        return str(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bson.ObjectId):
+        return str(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def _revive(document):
+    # Timestamps are stored as ISO strings; turn them back into datetimes
+    for key, value in document.items():
+        if isinstance(value, str) and ISO_DATETIME.match(value):
+            try:
+                document[key] = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return document
+
+def encode_document(document):
+    return json.dumps(document, default=_json_default, separators=(',', ':'))
+
+def decode_document(text):
+    return json.loads(text, object_hook=_revive)
+
+def _field_sql(name):
+    if name == '_id':
+        return '_id'
+    if not FIELD_NAME.match(name):
+        raise ValueError(f'Unsupported field name: {name}')
+    return f"json_extract(data, '$.{name}')"
+
+def _get_path(document, path):
+    value = document
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _set_path(document, path, value):
+    parts = path.split('.')
+    node = document
+    for part in parts[:-1]:
+        node = node.setdefault(part, {})
+    node[parts[-1]] = value
+
+def _check_update(update):
+    unsupported = set(update) - {'$set', '$unset', '$inc'}
+    if unsupported:
+        raise NotImplementedError(f'Unsupported update operators: {unsupported}')
+
+def _apply_update(document, update):
+    for path, value in update.get('$set', {}).items():
+        _set_path(document, path, value)
+    for path in update.get('$unset', {}):
+        parent = _get_path(document, path.rsplit('.', 1)[0]) if '.' in path else document
+        if isinstance(parent, dict):
+            parent.pop(path.rsplit('.', 1)[-1], None)
+    for path, amount in update.get('$inc', {}).items():
+        _set_path(document, path, (_get_path(document, path) or 0) + amount)
+
+def _project(document, projection):
+    if not projection:
+        return document
+    included = {key for key, value in projection.items() if value}
+    if included:
+        projected = {key: document[key] for key in included if key in document}
+        if projection.get('_id', 1):
+            projected['_id'] = document.get('_id')
+        return projected
+    return {key: value for key, value in document.items() if key not in projection}
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+class SQLiteCollection:
+    """Subset of the pymongo Collection API used by the app and the models"""
+
+    def __init__(self, name):
+        if not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', name):
+            raise ValueError(f'Invalid collection name: {name}')
+        self.name = name
+        self.schema = COLLECTION_SCHEMAS.get(name, {'indexes': [], 'fts': []})
+        self._ensure_schema()
+
+    @property
+    def connection(self):
+        return get_connection()
+
+    def _ensure_schema(self):
+        key = (db_path, self.name)
+        if key in _schema_ready:
+            return
+        with _schema_lock:
+            if key in _schema_ready:
+                return
+            connection = self.connection
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.name}" '
+                f'(rowid INTEGER PRIMARY KEY, _id TEXT NOT NULL UNIQUE, data TEXT NOT NULL)'
+            )
+            for field in self.schema['indexes']:
+                index_name = f'idx_{self.name}_{field.replace(".", "_")}'
+                connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{self.name}"({_field_sql(field)})'
+                )
+            if self.schema['fts']:
+                self._ensure_fts(connection)
+            _schema_ready.add(key)
+
+    def _ensure_fts(self, connection):
+        fields = self.schema['fts']
+        columns = ', '.join(fields)
+        values = ', '.join(
+            'new._id' if field == '_id' else f"json_extract(new.data, '$.{field}')" for field in fields
+        )
+        table = f'{self.name}_fts'
+        # Trigram tokens give case-insensitive substring search like the $regex it replaces
+        connection.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{table}" USING fts5({columns}, tokenize="trigram")'
+        )
+        connection.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{table}_ai" AFTER INSERT ON "{self.name}" BEGIN '
+            f'INSERT INTO "{table}"(rowid, {columns}) VALUES (new.rowid, {values}); END'
+        )
+        connection.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{table}_ad" AFTER DELETE ON "{self.name}" BEGIN '
+            f'DELETE FROM "{table}" WHERE rowid = old.rowid; END'
+        )
+        connection.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{table}_au" AFTER UPDATE ON "{self.name}" BEGIN '
+            f'DELETE FROM "{table}" WHERE rowid = old.rowid; '
+            f'INSERT INTO "{table}"(rowid, {columns}) VALUES (new.rowid, {values}); END'
+        )
+
+    # Query translation
+
+    def _fts_search(self, clauses):
+        """Translate an $or of case-insensitive $regex over FTS fields to MATCH"""
+        fields = self.schema['fts']
+        patterns = set()
+        for clause in clauses:
+            if len(clause) != 1:
+                return None
+            field, condition = next(iter(clause.items()))
+            if field not in fields or not isinstance(condition, dict):
+                return None
+            if set(condition) - {'$regex', '$options'} or 'i' not in condition.get('$options', ''):
+                return None
+            patterns.add(condition['$regex'])
+        if len(patterns) != 1:
+            return None
+        term = re.sub(r'\\(.)', r'\1', patterns.pop())
+        if len(term) < 3 or re.search(r'[.^$*+?()\[\]{}|]', term):
+            # Trigram MATCH needs 3+ literal characters; leave the rest to REGEXP
+            return None
+        phrase = '"' + term.replace('"', '""') + '"'
+        sql = f'rowid IN (SELECT rowid FROM "{self.name}_fts" WHERE "{self.name}_fts" MATCH ?)'
+        return sql, [phrase]
+
+    def _condition_sql(self, field, condition):
+        column = _field_sql(field)
+        if not isinstance(condition, dict) or not any(key.startswith('$') for key in condition):
+            if condition is None:
+                return f'{column} IS NULL', []
+            return f'{column} = ?', [_encode_value(condition)]
+
+        parts, params = [], []
+        for operator, value in condition.items():
+            if operator == '$eq':
+                sql, extra = self._condition_sql(field, value)
+                parts.append(sql)
+                params.extend(extra)
+            elif operator == '$ne':
+                if value is None:
+                    parts.append(f'{column} IS NOT NULL')
+                else:
+                    parts.append(f'({column} IS NULL OR {column} != ?)')
+                    params.append(_encode_value(value))
+            elif operator in ('$gt', '$gte', '$lt', '$lte'):
+                symbol = {'$gt': '>', '$gte': '>=', '$lt': '<', '$lte': '<='}[operator]
+                parts.append(f'{column} {symbol} ?')
+                params.append(_encode_value(value))
+            elif operator in ('$in', '$nin'):
+                values = [_encode_value(item) for item in value]
+                placeholders = ', '.join('?' for _ in values) or 'NULL'
+                if operator == '$in':
+                    parts.append(f'{column} IN ({placeholders})')
+                else:
+                    parts.append(f'({column} IS NULL OR {column} NOT IN ({placeholders}))')
+                params.extend(values)
+            elif operator == '$exists':
+                parts.append(f'{column} IS NOT NULL' if value else f'{column} IS NULL')
+            elif operator == '$regex':
+                pattern = value if isinstance(value, str) else value.pattern
+                if 'i' in condition.get('$options', ''):
+                    pattern = '(?i)' + pattern
+                parts.append(f'{column} REGEXP ?')
+                params.append(pattern)
+            elif operator == '$options':
+                continue
+            else:
+                raise NotImplementedError(f'Unsupported query operator: {operator}')
+        return ' AND '.join(parts) or '1', params
+
+    def _where(self, query):
+        parts, params = [], []
+        for key, value in (query or {}).items():
+            if key in ('$or', '$and', '$nor'):
+                if key == '$or' and self.schema['fts']:
+                    fts = self._fts_search(value)
+                    if fts:
+                        parts.append(fts[0])
+                        params.extend(fts[1])
+                        continue
+                sub_parts = []
+                for clause in value:
+                    sql, extra = self._where(clause)
+                    sub_parts.append(f'({sql})')
+                    params.extend(extra)
+                joiner = ' AND ' if key == '$and' else ' OR '
+                sql = joiner.join(sub_parts) or '1'
+                parts.append(f'NOT ({sql})' if key == '$nor' else f'({sql})')
+            else:
+                sql, extra = self._condition_sql(key, value)
+                parts.append(sql)
+                params.extend(extra)
+        return ' AND '.join(parts) or '1', params
+
+    def _select(self, query, sort=None, skip=0, limit=0, projection=None):
+        where, params = self._where(query)
+        sql = f'SELECT data FROM "{self.name}" WHERE {where}'
+        if sort:
+            sql += ' ORDER BY ' + ', '.join(
+                f'{_field_sql(field)} {"DESC" if direction == -1 else "ASC"}' for field, direction in sort
+            )
+        if limit or skip:
+            sql += ' LIMIT ? OFFSET ?'
+            params = params + [limit or -1, skip]
+        return sql, params
+
+    # Collection API
+
+    def find(self, query=None, projection=None):
+        return SQLiteCursor(self, query or {}, projection)
+
+    def find_one(self, query=None, projection=None, sort=None):
+        for document in self.find(query, projection).sort(sort or []).limit(1):
+            return document
+        return None
+
+    def count_documents(self, query=None):
+        where, params = self._where(query or {})
+        return self.connection.execute(f'SELECT COUNT(*) FROM "{self.name}" WHERE {where}', params).fetchone()[0]
+
+    def insert_one(self, document):
+        if '_id' not in document:
+            document['_id'] = bson.ObjectId()
+        try:
+            self.connection.execute(
+                f'INSERT INTO "{self.name}" (_id, data) VALUES (?, ?)',
+                (str(document['_id']), encode_document(document))
+            )
+        except sqlite3.IntegrityError as error:
+            raise pymongo.errors.DuplicateKeyError(str(error))
+        return _Result(inserted_id=document['_id'], acknowledged=True)
+
+    def insert_many(self, documents, ordered=True):
+        documents = list(documents)
+        for document in documents:
+            document.setdefault('_id', bson.ObjectId())
+        connection = self.connection
+        inserted_ids, write_errors = [], []
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for index, document in enumerate(documents):
+                try:
+                    connection.execute(
+                        f'INSERT INTO "{self.name}" (_id, data) VALUES (?, ?)',
+                        (str(document['_id']), encode_document(document))
+                    )
+                    inserted_ids.append(document['_id'])
+                except sqlite3.IntegrityError as error:
+                    # Same contract as MongoDB: ordered stops at the first error, unordered keeps going
+                    write_errors.append({'index': index, 'code': 11000, 'errmsg': str(error), 'op': document})
+                    if ordered:
+                        break
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        if write_errors:
+            raise pymongo.errors.BulkWriteError({
+                'writeErrors': write_errors, 'writeConcernErrors': [], 'nInserted': len(inserted_ids),
+                'nUpserted': 0, 'nMatched': 0, 'nModified': 0, 'nRemoved': 0, 'upserted': []
+            })
+        return _Result(inserted_ids=inserted_ids, acknowledged=True)
+
+    def _update(self, query, update, many):
+        _check_update(update)
+        connection = self.connection
+        matched = modified = 0
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            sql, params = self._select(query, limit=0 if many else 1)
+            sql = sql.replace('SELECT data', 'SELECT rowid, data', 1)
+            for rowid, text in connection.execute(sql, params).fetchall():
+                document = decode_document(text)
+                before = encode_document(document)
+                _apply_update(document, update)
+                after = encode_document(document)
+                matched += 1
+                if after != before:
+                    connection.execute(f'UPDATE "{self.name}" SET data = ? WHERE rowid = ?', (after, rowid))
+                    modified += 1
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return _Result(matched_count=matched, modified_count=modified, acknowledged=True)
+
+    def update_one(self, query, update):
+        return self._update(query, update, many=False)
+
+    def replace_one(self, query, replacement, upsert=False):
+        """Replace one matching document in a single transaction; with upsert, insert it if none matches"""
+        document = dict(replacement)
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            sql, params = self._select(query, limit=1)
+            sql = sql.replace('SELECT data', 'SELECT rowid, data', 1)
+            row = connection.execute(sql, params).fetchone()
+            if row is not None:
+                document['_id'] = decode_document(row[1])['_id']
+                connection.execute(f'UPDATE "{self.name}" SET data = ? WHERE rowid = ?', (encode_document(document), row[0]))
+                result = _Result(matched_count=1, modified_count=1, upserted_id=None, acknowledged=True)
+            elif upsert:
+                if '_id' not in document:
+                    query_id = query.get('_id')
+                    document['_id'] = query_id if query_id is not None and not isinstance(query_id, dict) else bson.ObjectId()
+                connection.execute(
+                    f'INSERT INTO "{self.name}" (_id, data) VALUES (?, ?)',
+                    (str(document['_id']), encode_document(document))
+                )
+                result = _Result(matched_count=0, modified_count=0, upserted_id=document['_id'], acknowledged=True)
+            else:
+                result = _Result(matched_count=0, modified_count=0, upserted_id=None, acknowledged=True)
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return result
+
+    def find_one_and_update(self, query, update, projection=None, sort=None, return_document=False):
+        """Update one document in a single transaction; returns it before (default) or after the update"""
+        _check_update(update)
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            sql, params = self._select(query, sort, limit=1)
+            sql = sql.replace('SELECT data', 'SELECT rowid, data', 1)
+            row = connection.execute(sql, params).fetchone()
+            if row is None:
+                connection.execute('COMMIT')
+                return None
+            rowid, text = row
+            before = decode_document(text)
+            after = decode_document(text)
+            _apply_update(after, update)
+            if encode_document(after) != encode_document(before):
+                connection.execute(f'UPDATE "{self.name}" SET data = ? WHERE rowid = ?', (encode_document(after), rowid))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        # pymongo's ReturnDocument.AFTER is True
+        return _project(after if return_document else before, projection)
+
+    def update_many(self, query, update):
+        return self._update(query, update, many=True)
+
+    def delete_one(self, query):
+        where, params = self._where(query)
+        cursor = self.connection.execute(
+            f'DELETE FROM "{self.name}" WHERE rowid = (SELECT rowid FROM "{self.name}" WHERE {where} LIMIT 1)', params
+        )
+        return _Result(deleted_count=cursor.rowcount, acknowledged=True)
+
+    def delete_many(self, query):
+        where, params = self._where(query)
+        cursor = self.connection.execute(f'DELETE FROM "{self.name}" WHERE {where}', params)
+        return _Result(deleted_count=cursor.rowcount, acknowledged=True)
+
+    def drop(self):
+        connection = self.connection
+        connection.execute(f'DELETE FROM "{self.name}"')
+
+    def aggregate(self, pipeline):
+        """Evaluate a pipeline: a leading $match runs in SQL, later stages in Python"""
+        stages = list(pipeline)
+        query = {}
+        if stages and '$match' in stages[0]:
+            query = stages.pop(0)['$match']
+        documents = iter(self.find(query))
+        for stage in stages:
+            documents = _apply_stage(stage, documents)
+        return iter(list(documents))
+
+class SQLiteCursor:
+    """Lazy cursor mirroring pymongo's chaining API"""
+
+    def __init__(self, collection, query, projection=None):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._batch_size = 100
+
+    def sort(self, key_or_list, direction=None):
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction or 1)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, count):
+        self._batch_size = count or 100
+        return self
+
+    def _project(self, document):
+        return _project(document, self.projection)
+
+    def __iter__(self):
+        sql, params = self.collection._select(self.query, self._sort, self._skip, self._limit)
+        cursor = self.collection.connection.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(self._batch_size)
+            if not rows:
+                return
+            for (text,) in rows:
+                yield self._project(decode_document(text))
+
+# Aggregation helpers (used by the local store only)
+
+def _evaluate(expression, document):
+    if isinstance(expression, str) and expression.startswith('$'):
+        return _get_path(document, expression[1:])
+    if isinstance(expression, list):
+        return [_evaluate(item, document) for item in expression]
+    if not isinstance(expression, dict) or not expression:
+        return expression
+
+    operator, args = next(iter(expression.items()))
+    if not operator.startswith('$'):
+        return {key: _evaluate(value, document) for key, value in expression.items()}
+    if operator == '$cond':
+        if isinstance(args, dict):
+            args = [args['if'], args['then'], args['else']]
+        return _evaluate(args[1] if _evaluate(args[0], document) else args[2], document)
+    if operator == '$ifNull':
+        value = _evaluate(args[0], document)
+        return value if value is not None else _evaluate(args[1], document)
+    values = [_evaluate(arg, document) for arg in (args if isinstance(args, list) else [args])]
+    if operator == '$eq':
+        return values[0] == values[1]
+    if operator == '$ne':
+        return values[0] != values[1]
+    if operator in ('$gt', '$gte', '$lt', '$lte'):
+        if values[0] is None or values[1] is None:
+            return False
+        return {
+            '$gt': values[0] > values[1], '$gte': values[0] >= values[1],
+            '$lt': values[0] < values[1], '$lte': values[0] <= values[1]
+        }[operator]
+    if operator == '$and':
+        return all(values)
+    if operator == '$or':
+        return any(values)
+    if operator == '$subtract':
+        if values[0] is None or values[1] is None:
+            return None
+        difference = values[0] - values[1]
+        # Date differences are milliseconds in MongoDB
+        return difference.total_seconds() * 1000 if hasattr(difference, 'total_seconds') else difference
+    if operator == '$add':
+        return sum(value for value in values if value is not None)
+    if operator == '$dateToString':
+        value = _evaluate(args['date'], document)
+        if value is None:
+            return None
+        fmt = args.get('format', '%Y-%m-%dT%H:%M:%S.%LZ').replace('%L', '000')
+        return value.strftime(fmt)
+    raise NotImplementedError(f'Unsupported aggregation operator: {operator}')
+
+def _apply_group(spec, documents):
+    groups = {}
+    order = []
+    for document in documents:
+        key = _evaluate(spec['_id'], document)
+        hashable = json.dumps(key, default=_json_default, sort_keys=True)
+        if hashable not in groups:
+            groups[hashable] = {'_id': key, '__state': {}}
+            order.append(hashable)
+        state = groups[hashable]['__state']
+        for field, accumulator in spec.items():
+            if field == '_id':
+                continue
+            operator, expression = next(iter(accumulator.items()))
+            value = _evaluate(expression, document)
+            entry = state.setdefault(field, {'sum': 0, 'count': 0, 'value': None})
+            if operator == '$sum':
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    entry['sum'] += value
+            elif operator == '$avg':
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    entry['sum'] += value
+                    entry['count'] += 1
+            elif operator in ('$min', '$max'):
+                if value is not None and (
+                    entry['value'] is None
+                    or (operator == '$min' and value < entry['value'])
+                    or (operator == '$max' and value > entry['value'])
+                ):
+                    entry['value'] = value
+            elif operator == '$first':
+                if 'first' not in entry:
+                    entry['first'] = value
+            elif operator == '$push':
+                entry.setdefault('items', []).append(value)
+            else:
+                raise NotImplementedError(f'Unsupported accumulator: {operator}')
+
+    for hashable in order:
+        group = groups[hashable]
+        state = group.pop('__state')
+        for field, accumulator in spec.items():
+            if field == '_id':
+                continue
+            operator = next(iter(accumulator))
+            entry = state.get(field, {'sum': 0, 'count': 0, 'value': None})
+            if operator == '$sum':
+                group[field] = entry['sum']
+            elif operator == '$avg':
+                group[field] = entry['sum'] / entry['count'] if entry['count'] else None
+            elif operator in ('$min', '$max'):
+                group[field] = entry['value']
+            elif operator == '$first':
+                group[field] = entry.get('first')
+            elif operator == '$push':
+                group[field] = entry.get('items', [])
+        yield group
+
+def _sort_key(value):
+    # None sorts first, as in MongoDB
+    return (value is not None, value)
+
+def _apply_stage(stage, documents):
+    operator, spec = next(iter(stage.items()))
+    if operator == '$group':
+        return _apply_group(spec, documents)
+    if operator == '$sort':
+        documents = list(documents)
+        for field, direction in reversed(list(spec.items())):
+            documents.sort(key=lambda document: _sort_key(_get_path(document, field)), reverse=direction == -1)
+        return iter(documents)
+    if operator == '$limit':
+        return iter(list(documents)[:spec])
+    if operator == '$skip':
+        return iter(list(documents)[spec:])
+    if operator == '$project':
+        return ({
+            key: (_get_path(document, key) if value in (1, True) else _evaluate(value, document))
+            for key, value in spec.items() if value not in (0, False)
+        } | ({'_id': document.get('_id')} if spec.get('_id', 1) not in (0, False) else {})
+            for document in documents)
+    raise NotImplementedError(f'Unsupported aggregation stage: {operator}')
@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
-from bson import ObjectId
 import re
-from email_validator import validate_email, EmailNotValidError
-from config.database import get_contacts_collection
+from config.database import get_contacts_collection, bump_collection_version, get_collection_version
+from utils.follow_ups import FollowUpScheduler
+from utils.lazy import lazy_module
+from utils.rollups import record_created, record_status_change
+
+bson = lazy_module('bson')
+email_validator = lazy_module('email_validator')
 
 class ValidationError(Exception):
     def __init__(self, message, errors=None):
@@ -44,6 +48,12 @@ class Contact:
     # Source choices
     SOURCE_CHOICES = ['Website', 'Phone', 'Email', 'Walk-in', 'Social Media', 'Referral']
     
+    # Statuses that end a follow-up
+    FOLLOW_UP_CLOSED_STATUSES = ['Resolved', 'Closed']
+    
+    # Fields the follow-up list needs
+    FOLLOW_UP_FIELDS = ['name', 'email', 'inquiryType', 'priority', 'followUpDate', 'createdAt']
+    
     def __init__(self, data=None):
         self.collection = get_contacts_collection()
         if data:
@@ -54,8 +64,8 @@ class Contact:
             self._id = None
     
     @classmethod
-    def create(cls, contact_data, request_info=None):
-        """Create a new contact submission"""
+    def create(cls, contact_data, request_info=None, is_spam=False):
+        """Create a new contact submission (is_spam: tagged by the spam filter)"""
         contact = cls()
         
         # Validate data
@@ -64,7 +74,7 @@ class Contact:
             raise ValidationError("Validation failed", errors)
         
         # Prepare data for insertion
-        contact.data = contact._prepare_data(contact_data, request_info)
+        contact.data = contact._prepare_data(contact_data, request_info, is_spam)
         contact.data['createdAt'] = datetime.utcnow()
         contact.data['updatedAt'] = datetime.utcnow()
         
@@ -72,6 +82,8 @@ class Contact:
         result = contact.collection.insert_one(contact.data)
         contact._id = result.inserted_id
         contact.data['_id'] = result.inserted_id
+        follow_up_scheduler.track(contact.data, bump_collection_version('contacts'))
+        record_created('contacts', contact.data)
         
         return contact
     
@@ -80,7 +92,7 @@ class Contact:
         """Find contact by ID"""
         collection = get_contacts_collection()
         try:
-            data = collection.find_one({'_id': ObjectId(contact_id)})
+            data = collection.find_one({'_id': bson.ObjectId(contact_id)})
             if data:
                 return cls(data)
             return None
@@ -90,7 +102,7 @@ class Contact:
     @classmethod
     def get_all(cls, filters=None, page=1, limit=10):
         """Get all contacts with pagination and filters"""
-        collection = get_contacts_collection()
+        collection = get_contacts_collection(analytics=True)
         
         # Build query
         query = filters or {}
@@ -115,10 +127,29 @@ class Contact:
         }
     
     @classmethod
-    def get_statistics(cls):
-        """Get contact statistics"""
-        collection = get_contacts_collection()
+    def iter_all(cls, filters=None, page=1, limit=10, batch_size=100):
+        """Lazily iterate active contacts, fetching from the cursor in batches"""
+        collection = get_contacts_collection(analytics=True)
         
+        query = dict(filters or {})
+        query['isActive'] = True  # Only active contacts
+        skip = (page - 1) * limit
+        
+        cursor = collection.find(query).sort('createdAt', -1).skip(skip).limit(limit).batch_size(batch_size)
+        for data in cursor:
+            yield cls(data)
+    
+    @classmethod
+    def count(cls, filters=None):
+        """Count active contacts matching filters"""
+        collection = get_contacts_collection(analytics=True)
+        query = dict(filters or {})
+        query['isActive'] = True
+        return collection.count_documents(query)
+    
+    @classmethod
+    def get_statistics_pipelines(cls):
+        """Get the overview and inquiry distribution aggregation pipelines"""
         pipeline = [
             {'$match': {'isActive': True}},
             {
@@ -144,14 +175,6 @@ class Contact:
             }
         ]
         
-        result = list(collection.aggregate(pipeline))
-        overview = result[0] if result else {
-            'totalContacts': 0,
-            'newContacts': 0,
-            'resolvedContacts': 0,
-            'avgResponseTime': 0
-        }
-        
         # Inquiry type distribution
         inquiry_pipeline = [
             {'$match': {'isActive': True}},
@@ -164,7 +187,17 @@ class Contact:
             {'$sort': {'count': -1}}
         ]
         
-        inquiry_stats = list(collection.aggregate(inquiry_pipeline))
+        return pipeline, inquiry_pipeline
+    
+    @classmethod
+    def format_statistics(cls, result, inquiry_stats):
+        """Shape aggregation results into the statistics payload"""
+        overview = result[0] if result else {
+            'totalContacts': 0,
+            'newContacts': 0,
+            'resolvedContacts': 0,
+            'avgResponseTime': 0
+        }
         
         return {
             'overview': overview,
@@ -172,21 +205,69 @@ class Contact:
         }
     
     @classmethod
-    def get_follow_ups(cls):
-        """Get contacts requiring follow-up"""
-        collection = get_contacts_collection()
+    def get_statistics(cls):
+        """Get contact statistics"""
+        collection = get_contacts_collection(analytics=True)
+        pipeline, inquiry_pipeline = cls.get_statistics_pipelines()
         
-        today = datetime.utcnow().replace(hour=23, minute=59, second=59, microsecond=999999)
+        result = list(collection.aggregate(pipeline))
+        inquiry_stats = list(collection.aggregate(inquiry_pipeline))
         
-        query = {
+        return cls.format_statistics(result, inquiry_stats)
+    
+    @classmethod
+    def get_pending_follow_up_query(cls):
+        """Get the filter for contacts with an open follow-up, due or not"""
+        return {
             'followUpRequired': True,
-            'followUpDate': {'$lte': today},
-            'status': {'$nin': ['Resolved', 'Closed']},
+            'followUpDate': {'$ne': None},
+            'status': {'$nin': cls.FOLLOW_UP_CLOSED_STATUSES},
             'isActive': True
         }
+    
+    @classmethod
+    def get_follow_up_query(cls):
+        """Get the filter for contacts due for follow-up today"""
+        today = datetime.utcnow().replace(hour=23, minute=59, second=59, microsecond=999999)
         
-        cursor = collection.find(query).sort('followUpDate', 1)
-        return [cls(data) for data in cursor]
+        query = cls.get_pending_follow_up_query()
+        query['followUpDate'] = {'$lte': today}
+        return query
+    
+    @classmethod
+    def has_pending_follow_up(cls, data):
+        """Python twin of get_pending_follow_up_query for a single document"""
+        return (
+            data.get('followUpRequired') is True
+            and isinstance(data.get('followUpDate'), datetime)
+            and data.get('status') not in cls.FOLLOW_UP_CLOSED_STATUSES
+            and data.get('isActive') is True
+        )
+    
+    @classmethod
+    def iter_pending_follow_ups(cls):
+        """Raw documents with an open follow-up, limited to the summary fields"""
+        collection = get_contacts_collection()
+        projection = {field: 1 for field in cls.FOLLOW_UP_FIELDS}
+        return collection.find(cls.get_pending_follow_up_query(), projection).batch_size(1000)
+    
+    @classmethod
+    def get_follow_ups(cls):
+        """Get summaries of contacts requiring follow-up, earliest first"""
+        return follow_up_scheduler.due()
+    
+    @classmethod
+    def follow_up_summary(cls, data):
+        """Limited view of a raw contact document for the follow-up list"""
+        return {
+            '_id': str(data['_id']),
+            'name': data['name'],
+            'email': data['email'],
+            'inquiryType': data['inquiryType'],
+            'priority': data['priority'],
+            'followUpDate': data['followUpDate'].isoformat(),
+            'createdAt': data['createdAt'].isoformat()
+        }
     
     def save(self):
         """Save contact data"""
@@ -205,6 +286,7 @@ class Contact:
             self._id = result.inserted_id
             self.data['_id'] = result.inserted_id
         
+        follow_up_scheduler.track(self.data, bump_collection_version('contacts'))
         return self
     
     def update_status(self, status, priority=None, notes=None):
@@ -215,6 +297,7 @@ class Contact:
         if priority and priority not in self.PRIORITY_CHOICES:
             raise ValidationError(f"Invalid priority: {priority}")
         
+        previous_status = self.data.get('status')
         self.data['status'] = status
         if priority:
             self.data['priority'] = priority
@@ -230,6 +313,7 @@ class Contact:
             })
         
         self.save()
+        record_status_change('contacts', self.data, previous_status, status)
         return self
     
     def add_response(self, response_content, responded_by='Admin'):
@@ -239,16 +323,18 @@ class Contact:
             'respondedBy': responded_by,
             'respondedAt': datetime.utcnow()
         }
+        previous_status = self.data.get('status')
         self.data['status'] = 'Responded'
         self.data['updatedAt'] = datetime.utcnow()
         
         self.save()
+        record_status_change('contacts', self.data, previous_status, 'Responded')
         return self
     
     def soft_delete(self):
-        """Soft delete contact"""
+        """Soft delete contact; utils/contact_archive.py archives and later purges it"""
         self.data['isActive'] = False
-        self.data['updatedAt'] = datetime.utcnow()
+        self.data['deletedAt'] = self.data['updatedAt'] = datetime.utcnow()
         self.save()
         return self
     
@@ -305,8 +391,8 @@ class Contact:
         # Email validation
         if data.get('email'):
             try:
-                validate_email(data['email'])
-            except EmailNotValidError:
+                email_validator.validate_email(data['email'])
+            except email_validator.EmailNotValidError:
                 errors.append("Please provide a valid email")
         
         # Phone validation
@@ -334,7 +420,7 @@ class Contact:
         
         return errors
     
-    def _prepare_data(self, data, request_info=None):
+    def _prepare_data(self, data, request_info=None, is_spam=False):
         """Prepare data for database insertion"""
         prepared = data.copy()
         
@@ -348,7 +434,7 @@ class Contact:
         prepared['status'] = 'New'
         prepared['source'] = 'Website'
         prepared['isActive'] = True
-        prepared['isSpam'] = False
+        prepared['isSpam'] = is_spam
         prepared['followUpRequired'] = False
         
         # Set priority based on inquiry type
@@ -360,8 +446,8 @@ class Contact:
         else:
             prepared['priority'] = 'Medium'
         
-        # Set follow-up for certain inquiry types
-        if inquiry_type in ['Admission Information', 'Course Details', 'Fee Structure']:
+        # Set follow-up for certain inquiry types (suspected spam waits for review instead)
+        if inquiry_type in ['Admission Information', 'Course Details', 'Fee Structure'] and not is_spam:
             prepared['followUpRequired'] = True
             prepared['followUpDate'] = datetime.utcnow() + timedelta(days=3)
         
@@ -426,4 +512,12 @@ class Contact:
                 'label': 'Other',
                 'description': 'Other inquiries not listed above'
             }
-        ] 
\ No newline at end of file
+        ] 
+
+# One per process; loaded at startup and kept current by Contact writes
+follow_up_scheduler = FollowUpScheduler(
+    load=Contact.iter_pending_follow_ups,
+    get_version=lambda: get_collection_version('contacts'),
+    is_pending=Contact.has_pending_follow_up,
+    summarize=Contact.follow_up_summary
+)
@@ -1,8 +1,11 @@
 from datetime import datetime, date
-from bson import ObjectId
 import re
-from email_validator import validate_email, EmailNotValidError
-from config.database import get_students_collection
+from config.database import get_students_collection, bump_collection_version
+from utils.lazy import lazy_module
+from utils.rollups import record_created, record_status_change
+
+bson = lazy_module('bson')
+email_validator = lazy_module('email_validator')
 
 class ValidationError(Exception):
     def __init__(self, message, errors=None):
@@ -59,6 +62,8 @@ class Student:
         result = student.collection.insert_one(student.data)
         student._id = result.inserted_id
         student.data['_id'] = result.inserted_id
+        bump_collection_version('students')
+        record_created('students', student.data)
         
         return student
     
@@ -67,7 +72,7 @@ class Student:
         """Find student by ID"""
         collection = get_students_collection()
         try:
-            data = collection.find_one({'_id': ObjectId(student_id)})
+            data = collection.find_one({'_id': bson.ObjectId(student_id)})
             if data:
                 return cls(data)
             return None
@@ -86,7 +91,7 @@ class Student:
     @classmethod
     def get_all(cls, filters=None, page=1, limit=10):
         """Get all students with pagination and filters"""
-        collection = get_students_collection()
+        collection = get_students_collection(analytics=True)
         
         # Build query
         query = filters or {}
@@ -110,10 +115,26 @@ class Student:
         }
     
     @classmethod
-    def get_statistics(cls):
-        """Get student statistics"""
-        collection = get_students_collection()
+    def iter_all(cls, filters=None, page=1, limit=10, batch_size=100):
+        """Lazily iterate students, fetching from the cursor in batches"""
+        collection = get_students_collection(analytics=True)
         
+        query = filters or {}
+        skip = (page - 1) * limit
+        
+        cursor = collection.find(query).sort('createdAt', -1).skip(skip).limit(limit).batch_size(batch_size)
+        for data in cursor:
+            yield cls(data)
+    
+    @classmethod
+    def count(cls, filters=None):
+        """Count students matching filters"""
+        collection = get_students_collection(analytics=True)
+        return collection.count_documents(filters or {})
+    
+    @classmethod
+    def get_statistics_pipelines(cls):
+        """Get the overview and program distribution aggregation pipelines"""
         pipeline = [
             {
                 '$group': {
@@ -129,13 +150,6 @@ class Student:
             }
         ]
         
-        result = list(collection.aggregate(pipeline))
-        overview = result[0] if result else {
-            'totalApplications': 0,
-            'approvedStudents': 0,
-            'pendingApplications': 0
-        }
-        
         # Program distribution
         program_pipeline = [
             {
@@ -147,13 +161,33 @@ class Student:
             {'$sort': {'count': -1}}
         ]
         
-        program_stats = list(collection.aggregate(program_pipeline))
+        return pipeline, program_pipeline
+    
+    @classmethod
+    def format_statistics(cls, result, program_stats):
+        """Shape aggregation results into the statistics payload"""
+        overview = result[0] if result else {
+            'totalApplications': 0,
+            'approvedStudents': 0,
+            'pendingApplications': 0
+        }
         
         return {
             'overview': overview,
             'programDistribution': program_stats
         }
     
+    @classmethod
+    def get_statistics(cls):
+        """Get student statistics"""
+        collection = get_students_collection(analytics=True)
+        pipeline, program_pipeline = cls.get_statistics_pipelines()
+        
+        result = list(collection.aggregate(pipeline))
+        program_stats = list(collection.aggregate(program_pipeline))
+        
+        return cls.format_statistics(result, program_stats)
+    
     def save(self):
         """Save student data"""
         if self._id:
@@ -171,6 +205,7 @@ class Student:
             self._id = result.inserted_id
             self.data['_id'] = result.inserted_id
         
+        bump_collection_version('students')
         return self
     
     def update_status(self, status, notes=None):
@@ -178,6 +213,7 @@ class Student:
         if status not in self.STATUS_CHOICES:
             raise ValidationError(f"Invalid status: {status}")
         
+        previous_status = self.data.get('applicationStatus')
         self.data['applicationStatus'] = status
         self.data['updatedAt'] = datetime.utcnow()
         
@@ -195,6 +231,7 @@ class Student:
             self.data['studentId'] = self._generate_student_id()
         
         self.save()
+        record_status_change('students', self.data, previous_status, status)
         return self
     
     def to_dict(self, include_sensitive=False):
@@ -259,8 +296,8 @@ class Student:
         # Email validation
         if data.get('email'):
             try:
-                validate_email(data['email'])
-            except EmailNotValidError:
+                email_validator.validate_email(data['email'])
+            except email_validator.EmailNotValidError:
                 errors.append("Please provide a valid email")
         
         # Phone validation
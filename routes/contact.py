@@ -2,7 +2,12 @@ from flask import Blueprint, request, jsonify
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import logging
+import os
 from models.contact import Contact, ValidationError
+from utils.spam_filter import SpamFilter, REJECT, TAG
+from utils.streaming import should_stream, stream_json_array, get_batch_size
+from utils.conditional import versioned
+from config.database import get_analytics_version
 
 # Create blueprint
 contact_bp = Blueprint('contact', __name__)
@@ -13,6 +18,14 @@ logger = logging.getLogger(__name__)
 # Rate limiter (will be configured in main app)
 limiter = None
 
+# Runs before validation and the insert; per process, like the rate limiter's memory storage
+spam_filter = SpamFilter.from_blocklist_file(
+    os.getenv('SPAM_BLOCKLIST_PATH', 'spam_blocklist.txt'),
+    duplicate_ttl=float(os.getenv('SPAM_DUPLICATE_TTL_SECONDS', 3600)),
+    tag_score=int(os.getenv('SPAM_TAG_SCORE', 3)),
+    reject_score=int(os.getenv('SPAM_REJECT_SCORE', 6))
+)
+
 def init_limiter(app_limiter):
     global limiter
     limiter = app_limiter
@@ -37,8 +50,17 @@ def submit_contact():
             'user_agent': request.headers.get('User-Agent')
         }
         
+        verdict = spam_filter.check(data, request_info)
+        if verdict.action == REJECT:
+            logger.info(f'Rejected contact submission as spam: {", ".join(verdict.reasons)}')
+            return jsonify({
+                'success': False,
+                'message': 'Your message could not be accepted'
+            }), 400
+        
         # Create contact submission
-        contact = Contact.create(data, request_info)
+        contact = Contact.create(data, request_info, is_spam=verdict.action == TAG)
+        spam_filter.remember(verdict)
         
         return jsonify({
             'success': True,
@@ -105,6 +127,7 @@ def get_stats():
 # @desc    Get all contact submissions (admin only)
 # @access  Private (admin)
 @contact_bp.route('/admin/all', methods=['GET'])
+@versioned('contacts', lambda: get_analytics_version('contacts'))
 def get_all_contacts():
     try:
         page = int(request.args.get('page', 1))
@@ -122,6 +145,25 @@ def get_all_contacts():
         if priority:
             filters['priority'] = priority
         
+        if should_stream():
+            total = Contact.count(filters)
+            contacts = Contact.iter_all(filters, page, limit, batch_size=get_batch_size())
+            return stream_json_array(
+                (contact.to_dict(include_sensitive=True) for contact in contacts),
+                envelope={
+                    'success': True,
+                    'data': {
+                        'pagination': {
+                            'current': page,
+                            'pages': (total + limit - 1) // limit,
+                            'total': total,
+                            'limit': limit
+                        }
+                    }
+                },
+                path=('data', 'contacts')
+            )
+        
         result = Contact.get_all(filters, page, limit)
         
         # Convert contacts to dictionaries
@@ -147,6 +189,26 @@ def get_all_contacts():
             'message': 'Server error occurred'
         }), 500
 
+# @route   GET /api/contact/admin/stats
+# @desc    Get full contact statistics (admin only)
+# @access  Private (admin)
+@contact_bp.route('/admin/stats', methods=['GET'])
+def get_admin_stats():
+    try:
+        stats = Contact.get_statistics()
+        
+        return jsonify({
+            'success': True,
+            'data': stats
+        })
+        
+    except Exception as e:
+        logger.error(f'Get admin contact stats error: {str(e)}')
+        return jsonify({
+            'success': False,
+            'message': 'Server error occurred'
+        }), 500
+
 # @route   GET /api/contact/admin/<id>
 # @desc    Get detailed contact information (admin only)
 # @access  Private (admin)
@@ -266,20 +328,8 @@ def add_response(contact_id):
 @contact_bp.route('/admin/follow-ups', methods=['GET'])
 def get_follow_ups():
     try:
-        follow_ups = Contact.get_follow_ups()
-        
-        # Convert to dictionaries with limited fields
-        follow_ups_data = []
-        for contact in follow_ups:
-            follow_ups_data.append({
-                '_id': str(contact._id),
-                'name': contact.data['name'],
-                'email': contact.data['email'],
-                'inquiryType': contact.data['inquiryType'],
-                'priority': contact.data['priority'],
-                'followUpDate': contact.data['followUpDate'].isoformat(),
-                'createdAt': contact.data['createdAt'].isoformat()
-            })
+        # Already limited to the summary fields by the scheduler
+        follow_ups_data = Contact.get_follow_ups()
         
         return jsonify({
             'success': True,
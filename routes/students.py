@@ -3,6 +3,9 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import logging
 from models.student import Student, ValidationError
+from utils.streaming import should_stream, stream_json_array, get_batch_size
+from utils.conditional import versioned
+from config.database import get_analytics_version
 
 # Create blueprint
 students_bp = Blueprint('students', __name__)
@@ -189,6 +192,7 @@ def get_stats():
 # @desc    Get all students (admin only)
 # @access  Private (admin)
 @students_bp.route('/admin/all', methods=['GET'])
+@versioned('students', lambda: get_analytics_version('students'))
 def get_all_students():
     try:
         page = int(request.args.get('page', 1))
@@ -203,6 +207,25 @@ def get_all_students():
         if program:
             filters['program'] = program
         
+        if should_stream():
+            total = Student.count(filters)
+            students = Student.iter_all(filters, page, limit, batch_size=get_batch_size())
+            return stream_json_array(
+                (student.to_dict(include_sensitive=True) for student in students),
+                envelope={
+                    'success': True,
+                    'data': {
+                        'pagination': {
+                            'current': page,
+                            'pages': (total + limit - 1) // limit,
+                            'total': total,
+                            'limit': limit
+                        }
+                    }
+                },
+                path=('data', 'students')
+            )
+        
         result = Student.get_all(filters, page, limit)
         
         # Convert students to dictionaries
@@ -228,6 +251,26 @@ def get_all_students():
             'message': 'Server error occurred'
         }), 500
 
+# @route   GET /api/students/admin/stats
+# @desc    Get full student statistics (admin only)
+# @access  Private (admin)
+@students_bp.route('/admin/stats', methods=['GET'])
+def get_admin_stats():
+    try:
+        stats = Student.get_statistics()
+        
+        return jsonify({
+            'success': True,
+            'data': stats
+        })
+        
+    except Exception as e:
+        logger.error(f'Get admin stats error: {str(e)}')
+        return jsonify({
+            'success': False,
+            'message': 'Server error occurred'
+        }), 500
+
 # @route   PUT /api/students/admin/<id>/status
 # @desc    Update student application status (admin only)
 # @access  Private (admin)
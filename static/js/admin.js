@@ -192,6 +192,7 @@ let adminDashboard = {
         if (tabName === 'admissions') {
             this.loadApplications();
             this.setupAdmissionsEventListeners();
+            this.connectApplicationEvents();
         }
 
         // Update page title
@@ -497,7 +498,8 @@ let adminDashboard = {
             }
             
             const data = await response.json();
-            this.displayApplications(data.data || []);
+            this.applications = data.data || [];
+            this.displayApplications(this.applications);
             
         } catch (error) {
             console.error('Error loading applications:', error);
@@ -505,6 +507,97 @@ let adminDashboard = {
         }
     },
 
+    // Live updates: apply server-sent events to the loaded list instead of refetching it
+    connectApplicationEvents(lastEventId) {
+        if (this.applicationEvents || this.applicationEventsRetry || !window.EventSource) return;
+
+        // After being turned away, resume from the last event seen: the server replays
+        // what was missed, or sends resync when it cannot
+        const query = lastEventId ? `?lastEventId=${encodeURIComponent(lastEventId)}` : '';
+        const source = new EventSource(`${window.location.origin}/api/applications/events${query}`);
+        const remember = (e) => {
+            if (e.lastEventId) this.lastApplicationEventId = e.lastEventId;
+        };
+        // A busy reply arrives right after opening; a stream that stays up resets the backoff
+        source.addEventListener('open', () => {
+            clearTimeout(this.applicationEventsSettled);
+            this.applicationEventsSettled = setTimeout(() => {
+                this.applicationEventsBackoff = 0;
+            }, 5000);
+        });
+        source.addEventListener('application.created', (e) => {
+            remember(e);
+            const application = JSON.parse(e.data);
+            if (!this.matchesApplicationSearch(application)) return;
+            this.applications = (this.applications || []).filter(app => app._id !== application._id);
+            this.applications.push(application);
+            this.refreshApplicationsView();
+        });
+        source.addEventListener('application.updated', (e) => {
+            remember(e);
+            this.applyApplicationUpdate(JSON.parse(e.data));
+        });
+        // Sent when this dashboard fell behind and missed events
+        source.addEventListener('resync', () => this.scheduleApplicationsRefetch());
+        // Sent when the server has no stream slot free. Stop the browser's own retries and
+        // come back later with exponential backoff; the list stays as loaded until then
+        source.addEventListener('busy', (e) => {
+            clearTimeout(this.applicationEventsSettled);
+            source.close();
+            this.applicationEvents = null;
+            const { retryAfter } = JSON.parse(e.data);
+            this.applicationEventsBackoff = Math.min((this.applicationEventsBackoff || retryAfter / 2) * 2, 600);
+            const delay = this.applicationEventsBackoff * (0.5 + Math.random() / 2) * 1000;
+            this.applicationEventsRetry = setTimeout(() => {
+                this.applicationEventsRetry = null;
+                // '0' matches no event, so a dashboard that saw none is told to resync once
+                this.connectApplicationEvents(this.lastApplicationEventId || '0');
+            }, delay);
+        });
+        this.applicationEvents = source;
+    },
+
+    scheduleApplicationsRefetch() {
+        // At most one full refetch every 30 seconds, however often the server asks
+        if (this.applicationsRefetch) return;
+        const wait = Math.max(0, (this.applicationsRefetchedAt || 0) + 30000 - Date.now());
+        this.applicationsRefetch = setTimeout(() => {
+            this.applicationsRefetch = null;
+            this.applicationsRefetchedAt = Date.now();
+            this.loadApplications();
+        }, wait);
+    },
+
+    applyApplicationUpdate(update) {
+        const application = (this.applications || []).find(app => app._id === update._id);
+        if (!application) return;
+        Object.assign(application, update);
+        this.refreshApplicationsView();
+    },
+
+    matchesApplicationSearch(application) {
+        const searchQuery = (document.getElementById('searchApplications')?.value || '').trim().toLowerCase();
+        if (!searchQuery) return true;
+        return ['name', 'email', 'phone', '_id'].some(field =>
+            String(application[field] || '').toLowerCase().includes(searchQuery)
+        );
+    },
+
+    refreshApplicationsView() {
+        const sortBy = document.getElementById('sortBy')?.value || 'date';
+        const sortOrder = document.getElementById('sortOrder')?.value || 'desc';
+        const value = (app) => {
+            if (sortBy === 'name') return (app.name || '').toLowerCase();
+            if (sortBy === 'status') return app.status || '';
+            return new Date(app.timestamp).getTime() || 0;
+        };
+        this.applications.sort((a, b) => {
+            const order = value(a) < value(b) ? -1 : value(a) > value(b) ? 1 : 0;
+            return sortOrder === 'desc' ? -order : order;
+        });
+        this.displayApplications(this.applications);
+    },
+
     displayApplications(applications) {
         const tbody = document.getElementById('applicationsTableBody');
         const totalElement = document.getElementById('totalApplications');
@@ -614,7 +707,7 @@ let adminDashboard = {
             }
 
             this.showNotification(`Application ${status} successfully`, 'success');
-            this.loadApplications(); // Refresh the list
+            this.applyApplicationUpdate({ _id: applicationId, status });
 
         } catch (error) {
             console.error('Error updating application status:', error);
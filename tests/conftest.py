@@ -0,0 +1,48 @@
+# Test configuration: the app runs against an in-memory MongoDB stand-in
+# (mongomock) and writes its spool, archive and CSV backup under a temporary
+# directory. Run from the repository root with:
+#
+#   python -m pytest -q
+import os
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix='acn-tests-')
+
+# Read at import time by app.py and the utils modules, so set before importing them
+os.environ.update({
+    'STORAGE_BACKEND': 'mongodb',
+    'MONGODB_URI': 'mongodb://localhost:27017',
+    'RATELIMIT_ENABLED': 'false',
+    'RATELIMIT_STORAGE_URI': 'memory://',
+    'APPLICATION_EVENTS_SOURCE': 'local',
+    'CONTACT_ARCHIVE_INTERVAL_SECONDS': '0',
+    'CONTACT_ARCHIVE_LOCK': os.path.join(WORKDIR, 'contact_archive.lock'),
+    'SPOOL_DIR': os.path.join(WORKDIR, 'spool'),
+    'ARCHIVE_DIR': os.path.join(WORKDIR, 'archive'),
+    'CSV_BACKUP_PATH': os.path.join(WORKDIR, 'admissions.csv'),
+    'CSV_BACKUP_DIR': os.path.join(WORKDIR, 'csv_backups'),
+    'DASHBOARD_CACHE_SECONDS': '0',
+})
+
+import mongomock
+import pytest
+
+import config.database as database
+
+database.MongoClient = mongomock.MongoClient
+
+import app as app_module
+
+@pytest.fixture
+def app():
+    """The Flask app connected to a fresh in-memory database"""
+    app_module.ensure_resources()
+    yield app_module.app
+    db = database.get_db()
+    for name in db.list_collection_names():
+        db.drop_collection(name)
+
+@pytest.fixture
+def mongo(app):
+    """The in-memory database behind the app"""
+    return database.get_db()
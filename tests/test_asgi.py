@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timedelta
+import json
+import time
+
+from mongomock_motor import AsyncMongoMockClient
+import pytest
+
+import asgi
+from config.async_database import connect_async_db, disconnect_async_db
+import config.database as database
+from utils.circuit_breaker import OPEN
+
+async def _request(path):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi.application({
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+        'root_path': '', 'headers': [], 'server': ('testserver', 80), 'client': ('127.0.0.1', 50000)
+    }, receive, send)
+    body = b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+    return messages[0]['status'], json.loads(body)
+
+def get(path):
+    return asyncio.run(_request(path))
+
+@pytest.fixture
+def async_db(mongo):
+    # Same in-memory server as the WSGI app, so both paths read the same documents
+    asyncio.run(connect_async_db(client=AsyncMongoMockClient(mock_mongo_client=mongo.client)))
+    yield
+    disconnect_async_db()
+
+@pytest.fixture
+def no_wsgi(monkeypatch):
+    """Fail any request that falls through to the Flask app"""
+    async def wsgi_application(scope, receive, send):
+        raise AssertionError(f"{scope['path']} fell through to WSGI")
+    monkeypatch.setattr(asgi, 'wsgi_application', wsgi_application)
+
+def seed(mongo):
+    now = datetime.utcnow()
+    mongo['students'].insert_many([
+        {'program': program, 'applicationStatus': status}
+        for program, status, count in [('GNM', 'Approved', 3), ('BSN', 'Pending', 2), ('MLT', 'Pending', 1)]
+        for _ in range(count)
+    ])
+    mongo['contacts'].insert_many([
+        {
+            'name': f'Contact {i}', 'email': f'contact{i}@example.com', 'inquiryType': inquiry,
+            'priority': 'Medium', 'status': status, 'isActive': True, 'createdAt': now - timedelta(days=i + 1),
+            'followUpRequired': True, 'followUpDate': now - timedelta(hours=i + 1)
+        }
+        for i, (inquiry, status) in enumerate([
+            ('Admission Inquiry', 'New'), ('Admission Inquiry', 'New'),
+            ('Fee Structure', 'In Progress'), ('Course Information', 'Resolved')
+        ])
+    ])
+    mongo['Admissions'].insert_one({
+        '_id': '9876543210', 'name': 'Asha', 'email': 'asha@example.com', 'phone': '9876543210',
+        'course': 'bsn', 'timestamp': datetime.now(), 'status': 'pending'
+    })
+    # As the models do after a write, so the WSGI follow-up scheduler reloads
+    database.bump_collection_version('contacts')
+
+ASYNC_PATHS = [
+    '/api/students/admin/stats',
+    '/api/contact/admin/stats',
+    '/api/contact/admin/follow-ups',
+    '/api/students/check-email/asha@example.com',
+    '/api/students/check-email/nobody@example.com',
+]
+
+@pytest.mark.parametrize('path', ASYNC_PATHS)
+def test_async_routes_match_wsgi(app, client, mongo, async_db, no_wsgi, path):
+    seed(mongo)
+    expected = client.get(path)
+    assert get(path) == (expected.status_code, expected.get_json())
+
+def test_stats_read_with_the_analytics_read_preference(app, mongo, async_db, monkeypatch):
+    collections = []
+    analytics_collection = asgi.analytics_collection
+
+    def recording(db, name):
+        collection = analytics_collection(db, name)
+        collections.append(collection)
+        return collection
+
+    monkeypatch.setattr(asgi, 'analytics_collection', recording)
+    get('/api/students/admin/stats')
+    assert [collection.read_preference for collection in collections] == [database.analytics_read_preference()]
+
+def test_non_mongodb_backends_fall_through_to_wsgi(app, async_db, monkeypatch):
+    monkeypatch.setattr(asgi, 'get_storage_backend', lambda: 'sqlite')
+    for path in ASYNC_PATHS:
+        assert asgi.match_async_route({'method': 'GET', 'path': path}) == (None, None, None)
+
+def test_open_circuit_falls_through_to_wsgi(app, async_db, monkeypatch):
+    monkeypatch.setattr(database.breaker, 'state', OPEN)
+    monkeypatch.setattr(database.breaker, 'opened_at', time.monotonic())
+    status, body = get('/api/students/admin/stats')
+    assert status == 503
+    assert body['success'] is False
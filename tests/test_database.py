@@ -0,0 +1,83 @@
+from pymongo.read_preferences import Primary, SecondaryPreferred
+import pytest
+
+import app as app_module
+import config.database as database
+from models.student import Student
+
+class RecordingCollection:
+    """Collection proxy that records each call with the read preference it ran under"""
+
+    def __init__(self, collection, calls):
+        self._collection = collection
+        self._calls = calls
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if not callable(attribute):
+            return attribute
+
+        def record(*args, **kwargs):
+            self._calls.append((name, self._collection.read_preference))
+            return attribute(*args, **kwargs)
+        return record
+
+def test_analytics_reads_prefer_secondaries_within_the_staleness_bound(app):
+    expected = SecondaryPreferred(max_staleness=database.ANALYTICS_MAX_STALENESS_SECONDS)
+    assert database.analytics_read_preference() == expected
+    assert database.get_collection('students', analytics=True).read_preference == expected
+    assert database.get_contacts_collection(analytics=True).read_preference == expected
+    assert app_module.admissions_analytics.read_preference == expected
+    assert database.reads_from_secondaries()
+
+def test_other_reads_stay_on_the_primary(app):
+    assert database.get_collection('students').read_preference == Primary()
+    assert database.get_contacts_collection().read_preference == Primary()
+    assert app_module.admissions_collection.read_preference == Primary()
+
+@pytest.mark.parametrize('configured, expected', [
+    (120, SecondaryPreferred(max_staleness=120)),
+    (30, SecondaryPreferred(max_staleness=database.MIN_MAX_STALENESS_SECONDS)),
+    (-1, SecondaryPreferred()),
+])
+def test_max_staleness_is_configurable_and_clamped(monkeypatch, configured, expected):
+    monkeypatch.setattr(database, 'ANALYTICS_MAX_STALENESS_SECONDS', configured)
+    assert database.analytics_read_preference() == expected
+
+def test_primary_analytics_preference(app, monkeypatch):
+    monkeypatch.setattr(database, 'ANALYTICS_READ_PREFERENCE', 'primary')
+    assert database.analytics_read_preference() == Primary()
+    assert not database.reads_from_secondaries()
+
+def test_unknown_analytics_preference_is_rejected(monkeypatch):
+    monkeypatch.setattr(database, 'ANALYTICS_READ_PREFERENCE', 'fastest')
+    with pytest.raises(ValueError):
+        database.analytics_read_preference()
+
+def test_duplicate_check_and_status_update_read_the_primary(app, client, monkeypatch):
+    primary_calls, analytics_calls = [], []
+    monkeypatch.setattr(app_module, 'admissions_collection', RecordingCollection(app_module.admissions_collection, primary_calls))
+    monkeypatch.setattr(app_module, 'admissions_analytics', RecordingCollection(app_module.admissions_analytics, analytics_calls))
+    admission = {'name': 'Ravi', 'email': 'ravi@example.com', 'phone': '9000000100', 'course': 'gnm'}
+
+    assert client.post('/save-admission', json=admission).status_code == 200
+    # The same phone again, as a new request: the duplicate must be seen right away
+    assert client.post('/save-admission', json={**admission, 'message': 'again'}).status_code == 400
+    assert client.put('/api/applications/9000000100/status', json={'status': 'approved'}).status_code == 200
+
+    assert analytics_calls == []
+    assert ('find_one', Primary()) in primary_calls
+    assert ('find_one_and_update', Primary()) in primary_calls
+    assert all(read_preference == Primary() for _, read_preference in primary_calls)
+
+def test_student_email_check_reads_the_primary(app, mongo, monkeypatch):
+    calls = []
+    get_collection = database.get_collection
+
+    def recording(name, analytics=False):
+        return RecordingCollection(get_collection(name, analytics), calls)
+
+    monkeypatch.setattr(database, 'get_collection', recording)
+    mongo['students'].insert_one({'email': 'meera@example.com', 'program': 'GNM'})
+    assert Student.find_by_email('Meera@example.com') is not None
+    assert calls == [('find_one', Primary())]
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from utils.events import sse_stream
+
+@pytest.fixture
+def events_app(app, monkeypatch):
+    # Short streams, so a read returns once the stream ends
+    monkeypatch.setitem(app.config, 'SSE_HEARTBEAT_SECONDS', 0.05)
+    monkeypatch.setitem(app.config, 'SSE_MAX_STREAM_SECONDS', 0.5)
+    return app
+
+def parse_sse(body):
+    """(retry, events) from a server-sent events body; keepalive comments are skipped"""
+    retry, events = None, []
+    for block in body.split('\n\n'):
+        fields = {}
+        for line in block.splitlines():
+            if line.startswith(':'):
+                continue
+            name, _, value = line.partition(': ')
+            fields[name] = fields.get(name, '') + value if name == 'data' else value
+        if 'retry' in fields:
+            retry = int(fields['retry'])
+        if 'event' in fields:
+            event_id = int(fields['id']) if 'id' in fields else None
+            events.append({'id': event_id, 'event': fields['event'], 'data': json.loads(fields['data'])})
+    return retry, events
+
+def read_events(client, last_event_id=None):
+    headers = {'Last-Event-ID': str(last_event_id)} if last_event_id is not None else {}
+    response = client.get('/api/applications/events', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    return parse_sse(response.get_data(as_text=True))
+
+def admission(phone):
+    return {'name': f'Applicant {phone}', 'email': f'{phone}@example.com', 'phone': phone, 'course': 'bsn'}
+
+def test_writes_are_published_to_open_streams(events_app, client):
+    result = {}
+
+    def read():
+        with events_app.test_client() as listener:
+            result['retry'], result['events'] = read_events(listener)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    deadline = time.monotonic() + 2
+    while app_module.application_events.subscriber_count == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert client.post('/save-admission', json=admission('9000000001')).status_code == 200
+    assert client.put('/api/applications/9000000001/status', json={'status': 'approved'}).status_code == 200
+    reader.join()
+
+    events = result['events']
+    assert result['retry'] == 3000
+    assert [event['event'] for event in events] == ['application.created', 'application.updated']
+    assert events[0]['data']['_id'] == '9000000001'
+    assert events[1]['data'] == {'_id': '9000000001', 'status': 'approved'}
+    assert events[0]['id'] < events[1]['id']
+    assert app_module.application_events.subscriber_count == 0
+
+def test_last_event_id_replays_missed_events(events_app, client):
+    assert client.post('/save-admission', json=admission('9000000002')).status_code == 200
+    assert client.put('/api/applications/9000000002/status', json={'status': 'rejected'}).status_code == 200
+    assert client.put('/api/applications/9000000002/status', json={'status': 'approved'}).status_code == 200
+
+    _, events = read_events(client, last_event_id=0)
+    # Unknown id: the client is told to refetch instead of getting a partial replay. The
+    # event has no id, so the browser's Last-Event-ID is left alone
+    assert [(event['event'], event['id']) for event in events] == [('resync', None)]
+
+    history = list(app_module.application_events._history)
+    created = next(event for event in reversed(history) if event['event'] == 'application.created')
+    _, events = read_events(client, last_event_id=created['id'])
+    assert [(event['event'], event['data']['status']) for event in events] == [
+        ('application.updated', 'rejected'), ('application.updated', 'approved')
+    ]
+    assert all(event['id'] > created['id'] for event in events)
+
+def test_overflowing_subscriber_gets_resync(events_app, monkeypatch):
+    monkeypatch.setattr(app_module.application_events, 'queue_size', 1)
+    subscription = app_module.application_events.subscribe()
+    app_module.application_events.publish('application.updated', {'_id': '1', 'status': 'approved'})
+    app_module.application_events.publish('application.updated', {'_id': '2', 'status': 'approved'})
+    assert subscription.overflowed
+
+    # The stream the endpoint serves tells the client to refetch, then carries on
+    _, events = parse_sse(''.join(sse_stream(subscription, json.dumps, heartbeat=0.05, max_seconds=0.2)))
+    assert [event['event'] for event in events] == ['resync', 'application.updated']
+    assert events[1]['data']['_id'] == '1'
+    assert app_module.application_events.subscriber_count == 0
+
+def test_streams_over_the_cap_are_turned_away(events_app, client, monkeypatch):
+    monkeypatch.setitem(events_app.config, 'SSE_MAX_CONNECTIONS', 1)
+    monkeypatch.setitem(events_app.config, 'SSE_BUSY_RETRY_SECONDS', 30)
+    held = app_module.application_events.subscribe()
+    try:
+        retry, events = read_events(client)
+    finally:
+        held.close()
+    assert retry == 30000
+    assert [(event['event'], event['id'], event['data']) for event in events] == [('busy', None, {'retryAfter': 30})]
+
+    # A slot is free again once the other stream closes
+    _, events = read_events(client)
+    assert [event['event'] for event in events] == []
@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+
+from limits import parse
+from limits.strategies import FixedWindowRateLimiter, SlidingWindowCounterRateLimiter
+import pytest
+
+from utils.rate_limit import SharedMemoryStorage
+
+WORKERS = 4
+ATTEMPTS = 40
+LIMIT = '50 per minute'
+STRATEGIES = {'fixed-window': FixedWindowRateLimiter, 'sliding-window-counter': SlidingWindowCounterRateLimiter}
+
+def hammer(uri, strategy, start, results):
+    """One worker process: hit the shared limit ATTEMPTS times and report how many were allowed"""
+    limiter = STRATEGIES[strategy](SharedMemoryStorage(uri))
+    item = parse(LIMIT)
+    start.wait()
+    results.put(sum(limiter.hit(item, 'client', '/save-admission') for _ in range(ATTEMPTS)))
+
+@pytest.mark.parametrize('strategy', sorted(STRATEGIES))
+@pytest.mark.parametrize('start_method', ['fork', 'spawn'])
+def test_processes_share_one_limit(tmp_path, strategy, start_method):
+    uri = f"shm://{tmp_path / 'ratelimit'}?slots=256"
+    # Opened here first, so forked workers inherit a mapping they must replace
+    parent = SharedMemoryStorage(uri)
+    assert parent.check()
+
+    context = multiprocessing.get_context(start_method)
+    start, results = context.Event(), context.Queue()
+    workers = [context.Process(target=hammer, args=(uri, strategy, start, results)) for _ in range(WORKERS)]
+    for worker in workers:
+        worker.start()
+    start.set()
+    allowed = [results.get(timeout=30) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    # WORKERS * ATTEMPTS hits against one limit of 50: exactly 50 get through in total
+    assert sum(allowed) == parse(LIMIT).amount
+    assert STRATEGIES[strategy](parent).test(parse(LIMIT), 'client', '/save-admission') is False
+
+def test_forked_worker_replaces_the_inherited_mapping(tmp_path):
+    storage = SharedMemoryStorage(f"shm://{tmp_path / 'ratelimit'}?slots=64")
+    storage.incr('key', 60)
+    inherited = storage._map
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            storage.incr('key', 60)
+            code = 0 if inherited.closed and storage._map is not inherited else 1
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert not inherited.closed
+    assert storage.get('key') == 2
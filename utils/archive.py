@@ -0,0 +1,400 @@
+# Monthly archive segments for old applications
+#
+# Applications older than ARCHIVE_AFTER_DAYS move out of the hot store into
+# immutable monthly segments: gzip NDJSON files under ARCHIVE_DIR for the
+# JSON store, or the Admissions_archive collection for MongoDB and SQLite.
+# Each segment carries a small index (row count, first and last timestamp,
+# and for files a Bloom filter of ids), so listings only open segments that
+# overlap the requested date range. Move old applications with:
+#
+#   python -m utils.archive run [--older-than-days 365]
+#   python -m utils.archive list
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import fcntl
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from utils.bloom import BloomFilter
+from utils.lazy import lazy_module
+
+logger = logging.getLogger(__name__)
+
+pymongo = lazy_module('pymongo')
+
+ARCHIVE_COLLECTION = 'Admissions_archive'
+SEGMENTS_COLLECTION = 'archive_segments'
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))
+MANIFEST_FILE = 'index.json'
+
+@contextmanager
+def hot_file_lock(path='applications.json'):
+    """Exclusive lock held around every read-modify-write of the JSON hot store"""
+    with open(path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+def write_atomic(path, write, mode='w'):
+    """Write through a temporary file and rename, so readers never see a partial file"""
+    with tempfile.NamedTemporaryFile(mode, dir=os.path.dirname(os.path.abspath(path)), delete=False) as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f.name, path)
+
+def merge_archived(hot, archived):
+    """Hot rows plus archived rows not also in the hot store (an interrupted run leaves both)"""
+    hot = list(hot)
+    ids = {str(document.get('_id')) for document in hot}
+    return hot + [document for document in archived if str(document.get('_id')) not in ids]
+
+def parse_timestamp(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value if isinstance(value, datetime) else None
+
+def month_bounds(month):
+    start = datetime.strptime(month, '%Y-%m')
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+def overlaps(segment, start, end):
+    """True when a segment's [first, last] timestamps meet the range [start, end)"""
+    first, last = parse_timestamp(segment['first']), parse_timestamp(segment['last'])
+    return (end is None or first < end) and (start is None or last >= start)
+
+def in_range(timestamp, start, end):
+    """True when a timestamp (datetime or ISO string) falls in [start, end)"""
+    timestamp = parse_timestamp(timestamp)
+    return timestamp is not None and (start is None or timestamp >= start) and (end is None or timestamp < end)
+
+def tally(documents):
+    """Status and course counts as [value, count] pairs, since either value may be null"""
+    by_status, by_course = {}, {}
+    for document in documents:
+        status, course = document.get('status'), document.get('course')
+        by_status[status] = by_status.get(status, 0) + 1
+        by_course[course] = by_course.get(course, 0) + 1
+    return {'byStatus': [list(pair) for pair in by_status.items()], 'byCourse': [list(pair) for pair in by_course.items()]}
+
+def summarize_segments(segments, recount):
+    """Row, status and course counts over all segments; `recount` tallies segments written without them"""
+    total, by_status, by_course = 0, {}, {}
+    for segment in segments:
+        facets = segment if 'byStatus' in segment else recount(segment)
+        total += segment['count']
+        for key, groups in (('byStatus', by_status), ('byCourse', by_course)):
+            for value, count in facets[key]:
+                groups[value] = groups.get(value, 0) + count
+    return {'total': total, 'byStatus': by_status, 'byCourse': by_course}
+
+class FileArchive:
+    """gzip NDJSON segments of old applications.json entries
+
+    Segment files are written once and never modified; a later run for the
+    same month adds another part. index.json lists every segment with its
+    row count, status and course counts, timestamp range, checksum and a
+    Bloom filter of its ids.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR, hot_path='applications.json'):
+        self.directory = directory
+        self.hot_path = hot_path
+        self._manifest = {'key': None, 'segments': [], 'blooms': []}
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def segments(self):
+        """Manifest entries, reloaded only when index.json changes"""
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return []
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._manifest['key'] != key:
+            with open(self.manifest_path, 'r') as f:
+                segments = json.load(f)['segments']
+            self._manifest = {
+                'key': key,
+                'segments': segments,
+                'blooms': [BloomFilter.from_dict(segment['ids']) for segment in segments]
+            }
+        return self._manifest['segments']
+
+    def _read(self, segment):
+        with gzip.open(os.path.join(self.directory, segment['file']), 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def _write_segment(self, month, part, documents):
+        documents.sort(key=lambda document: parse_timestamp(document.get('timestamp')))
+        name = f'applications-{month}.{part:04d}.ndjson.gz'
+        payload = gzip.compress(''.join(
+            json.dumps(document, default=str, separators=(',', ':')) + '\n' for document in documents
+        ).encode('utf-8'))
+        write_atomic(os.path.join(self.directory, name), lambda f: f.write(payload), 'wb')
+        ids = BloomFilter(len(documents), 0.001)
+        for document in documents:
+            ids.add(str(document['_id']))
+        return {
+            'file': name,
+            'month': month,
+            'count': len(documents),
+            'first': documents[0]['timestamp'],
+            'last': documents[-1]['timestamp'],
+            'bytes': len(payload),
+            'sha256': hashlib.sha256(payload).hexdigest(),
+            'ids': ids.to_dict(),
+            **tally(documents)
+        }
+
+    def _load_hot(self, missing_ok=True):
+        """Rows of applications.json; an unreadable file raises instead of reading as empty"""
+        try:
+            with open(self.hot_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            if missing_ok:
+                return []
+            raise
+
+    def archive_before(self, cutoff):
+        """Move applications older than `cutoff` into segments; returns rows moved per month
+
+        Segments and the manifest are written before applications.json is
+        rewritten, so an interrupted run leaves rows in both places and the
+        next run skips the copies already archived. The rewrite happens under
+        hot_file_lock, the lock the app holds while it updates the file, and
+        the run aborts if applications.json cannot be parsed.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            by_month = {}
+            for document in self._load_hot():
+                timestamp = parse_timestamp(document.get('timestamp'))
+                if timestamp is not None and timestamp < cutoff:
+                    by_month.setdefault(timestamp.strftime('%Y-%m'), []).append(document)
+            if not by_month:
+                return {}
+
+            segments = list(self.segments())
+            archived, moved = set(), {}
+            for month, documents in sorted(by_month.items()):
+                parts = [segment for segment in segments if segment['month'] == month]
+                existing = {str(row['_id']) for segment in parts for row in self._read(segment)}
+                fresh = [document for document in documents if str(document['_id']) not in existing]
+                if fresh:
+                    segments.append(self._write_segment(month, len(parts), fresh))
+                    moved[month] = len(fresh)
+                archived.update(str(document['_id']) for document in documents)
+            write_atomic(self.manifest_path, lambda f: json.dump({'segments': segments}, f))
+
+            # Re-read under the writers' lock so admissions saved meanwhile are kept
+            with hot_file_lock(self.hot_path):
+                remaining = [
+                    document for document in self._load_hot(missing_ok=False)
+                    if str(document.get('_id')) not in archived
+                    or not in_range(document.get('timestamp'), None, cutoff)
+                ]
+                write_atomic(self.hot_path, lambda f: json.dump(remaining, f, indent=2, default=str))
+            return moved
+
+    def iter_range(self, start=None, end=None):
+        """Archived applications with start <= timestamp < end, opening only overlapping segments"""
+        for segment in self.segments():
+            if not overlaps(segment, start, end):
+                continue
+            for document in self._read(segment):
+                if in_range(document.get('timestamp'), start, end):
+                    yield document
+
+    def summary(self):
+        return summarize_segments(self.segments(), lambda segment: tally(self._read(segment)))
+
+    def contains(self, application_id):
+        application_id = str(application_id)
+        segments = self.segments()
+        for segment, bloom in zip(segments, self._manifest['blooms']):
+            if application_id in bloom and any(str(row['_id']) == application_id for row in self._read(segment)):
+                return True
+        return False
+
+class CollectionArchive:
+    """Old applications moved from Admissions into Admissions_archive
+
+    archive_segments holds one row per month (count, status and course
+    counts, first and last timestamp), so a listing queries the archive only when its range
+    overlaps a segment. On MongoDB the archive collection is created with
+    zstd block compression.
+    """
+
+    def __init__(self, hot, archive, segments, create_archive=None):
+        self.hot = hot
+        self.archive = archive
+        self.segments_collection = segments
+        self._create_archive = create_archive
+
+    def segments(self):
+        return list(self.segments_collection.find({}).sort('_id', 1))
+
+    def _copy(self, documents):
+        """Insert into the archive; returns the ids safe to delete from the hot collection"""
+        try:
+            self.archive.insert_many(documents, ordered=False)
+            return [document['_id'] for document in documents]
+        except pymongo.errors.BulkWriteError as error:
+            failed = set()
+            for write_error in error.details['writeErrors']:
+                if write_error['code'] != 11000:
+                    raise
+                document = documents[write_error['index']]
+                # Already archived by an interrupted run: only delete if it is the same row
+                if self.archive.find_one({'_id': document['_id']}) != document:
+                    logger.warning(f"Application {document['_id']} differs from its archived copy; left in place")
+                    failed.add(document['_id'])
+            return [document['_id'] for document in documents if document['_id'] not in failed]
+
+    def _refresh_segment(self, month):
+        start, end = month_bounds(month)
+        query = {'timestamp': {'$gte': start, '$lt': end}}
+        count = self.archive.count_documents(query)
+        self.segments_collection.delete_one({'_id': month})
+        if not count:
+            return
+        first = self.archive.find_one(query, {'timestamp': 1}, sort=[('timestamp', 1)])
+        last = self.archive.find_one(query, {'timestamp': 1}, sort=[('timestamp', -1)])
+        self.segments_collection.insert_one({
+            '_id': month,
+            'count': count,
+            'first': first['timestamp'],
+            'last': last['timestamp'],
+            **tally(self.archive.find(query, {'status': 1, 'course': 1})),
+            'updatedAt': datetime.utcnow()
+        })
+
+    def _recount(self, segment):
+        """Tally a segment stored before the counts existed, and keep the result"""
+        start, end = month_bounds(segment['_id'])
+        facets = tally(self.archive.find({'timestamp': {'$gte': start, '$lt': end}}, {'status': 1, 'course': 1}))
+        self.segments_collection.update_one({'_id': segment['_id']}, {'$set': facets})
+        return facets
+
+    def archive_before(self, cutoff, batch_size=1000):
+        """Move applications older than `cutoff` in batches; returns rows moved per month"""
+        from config.database import bump_collection_version
+        if self._create_archive is not None:
+            self._create_archive()
+        moved, left = {}, []
+        while True:
+            query = {'timestamp': {'$lt': cutoff}}
+            if left:
+                query['_id'] = {'$nin': left}
+            documents = list(self.hot.find(query).sort('timestamp', 1).limit(batch_size))
+            if not documents:
+                break
+            ids = set(self._copy(documents))
+            left.extend(document['_id'] for document in documents if document['_id'] not in ids)
+            if ids:
+                self.hot.delete_many({'_id': {'$in': list(ids)}})
+            for document in documents:
+                if document['_id'] in ids:
+                    month = parse_timestamp(document['timestamp']).strftime('%Y-%m')
+                    moved[month] = moved.get(month, 0) + 1
+        for month in moved:
+            self._refresh_segment(month)
+        if moved:
+            bump_collection_version('Admissions')
+        return moved
+
+    def iter_range(self, start=None, end=None, query=None):
+        """Cursor over archived applications in [start, end), or [] when no segment overlaps"""
+        if not any(overlaps(segment, start, end) for segment in self.segments()):
+            return []
+        query = dict(query or {})
+        if start is not None or end is not None:
+            query['timestamp'] = {
+                **({'$gte': start} if start is not None else {}),
+                **({'$lt': end} if end is not None else {})
+            }
+        return self.archive.find(query)
+
+    def summary(self):
+        return summarize_segments(self.segments(), self._recount)
+
+    def contains(self, application_id):
+        return self.archive.find_one({'_id': application_id}, {'_id': 1}) is not None
+
+def _create_compressed_archive():
+    from config.database import get_db
+    database = get_db()
+    try:
+        database.create_collection(
+            ARCHIVE_COLLECTION,
+            storageEngine={'wiredTiger': {'configString': 'block_compressor=zstd'}}
+        )
+    except pymongo.errors.CollectionInvalid:
+        pass  # already exists
+    database[ARCHIVE_COLLECTION].create_index('timestamp')
+
+_archive = {'key': None, 'archive': None}
+
+def get_archive(backend=None):
+    """Archive matching the storage backend (one per process); pass 'json' for the local file store"""
+    from config.database import get_storage_backend, get_collection
+    backend = backend or get_storage_backend()
+    if _archive['key'] == (backend, os.getpid()):
+        return _archive['archive']
+    if backend == 'json':
+        archive = FileArchive()
+    else:
+        archive = CollectionArchive(
+            get_collection('Admissions'),
+            get_collection(ARCHIVE_COLLECTION),
+            get_collection(SEGMENTS_COLLECTION),
+            create_archive=_create_compressed_archive if backend == 'mongodb' else None
+        )
+    _archive.update(key=(backend, os.getpid()), archive=archive)
+    return archive
+
+def main():
+    from dotenv import load_dotenv
+    from config.database import connect_db, get_storage_backend
+
+    parser = argparse.ArgumentParser(description='Archive old applications into monthly segments')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    run_parser = subcommands.add_parser('run', help='move applications older than the cutoff into the archive')
+    run_parser.add_argument('--older-than-days', type=int, default=ARCHIVE_AFTER_DAYS)
+    subcommands.add_parser('list', help='show archive segments')
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    if get_storage_backend() != 'json':
+        connect_db()
+
+    archive = get_archive()
+    if args.command == 'run':
+        cutoff = datetime.now() - timedelta(days=args.older_than_days)
+        moved = archive.archive_before(cutoff)
+        for month, count in sorted(moved.items()):
+            print(f'{month}: archived {count} applications')
+        print(f'Archived {sum(moved.values())} applications older than {cutoff.date().isoformat()}')
+    else:
+        for segment in archive.segments():
+            print(f"{segment.get('month', segment.get('_id'))}: {segment['count']} applications, "
+                  f"{segment['first']} .. {segment['last']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import base64
+import hashlib
+import math
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (false positives, never false negatives)"""
+
+    def __init__(self, capacity, error_rate=0.0001):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def to_dict(self):
+        return {
+            'size': self.size,
+            'hashes': self.hashes,
+            'count': self.count,
+            'bits': base64.b64encode(bytes(self._bits)).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        bloom = cls.__new__(cls)
+        bloom.size = data['size']
+        bloom.hashes = data['hashes']
+        bloom.count = data['count']
+        bloom._bits = bytearray(base64.b64decode(data['bits']))
+        return bloom
+
+    @classmethod
+    def from_file(cls, path, error_rate=0.0001):
+        """One IP, email or @domain per line; blank lines and # comments are ignored"""
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = [line.split('#', 1)[0].strip().lower() for line in f]
+        entries = [entry for entry in entries if entry]
+        bloom = cls(len(entries), error_rate)
+        for entry in entries:
+            bloom.add(entry)
+        return bloom
@@ -0,0 +1,298 @@
+from collections import deque
+from functools import wraps
+import inspect
+import logging
+import threading
+import time
+
+from flask import g
+
+from utils.lazy import lazy_module
+
+pymongo = lazy_module('pymongo')
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the database while the circuit is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f'{name} circuit is open')
+        self.retry_after = retry_after
+
+def is_outage_error(error):
+    # Connection problems and timeouts (server selection, socket, maxTimeMS)
+    # say the database is unhealthy; duplicate keys or bad queries do not
+    return isinstance(error, pymongo.errors.ConnectionFailure) or (
+        isinstance(error, pymongo.errors.PyMongoError) and getattr(error, 'timeout', False)
+    )
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker
+
+    Trips open when, over the last `window_seconds` and at least `min_calls`
+    calls, the failure rate reaches `failure_rate` or the share of calls
+    slower than `slow_call_ms` reaches `slow_call_rate`. While open, calls
+    fail immediately with CircuitOpenError. After `open_seconds` a
+    background thread pings the database; once a probe succeeds the circuit
+    goes half-open and lets `half_open_calls` trial calls through, closing
+    once all of them have succeeded and reopening on any failure.
+    """
+
+    def __init__(self, name, failure_rate=0.5, slow_call_ms=1000, slow_call_rate=0.8,
+                 window_seconds=30, min_calls=10, open_seconds=5, half_open_calls=5):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.slow_call_rate = slow_call_rate
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.probe = None
+
+        self.state = CLOSED
+        self.opened_at = None
+        self.trips = 0
+        self.rejected = 0
+        self._calls = deque()  # (timestamp, failed, slow)
+        self._trial_calls = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+        self._prober = None
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go to the database now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self._trial_calls < self.half_open_calls:
+                self._trial_calls += 1
+                return
+            self.rejected += 1
+            retry_after = max(self.open_seconds - (time.monotonic() - (self.opened_at or 0)), 1)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def check(self):
+        """Raise CircuitOpenError while open, without taking a half-open trial slot"""
+        with self._lock:
+            if self.state != OPEN:
+                return
+            self.rejected += 1
+            retry_after = max(self.open_seconds - (time.monotonic() - self.opened_at), 1)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, duration, error=None):
+        failed = error is not None and is_outage_error(error)
+        slow = duration * 1000 >= self.slow_call_ms
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed or slow:
+                    self._trip(now)
+                else:
+                    # Slots are not handed back, so every trial slot has to succeed
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_calls:
+                        self._close()
+                return
+            if self.state == OPEN:
+                return
+
+            self._calls.append((now, failed, slow))
+            while self._calls and self._calls[0][0] < now - self.window_seconds:
+                self._calls.popleft()
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            failures = sum(1 for _, f, _ in self._calls if f)
+            slow_calls = sum(1 for _, _, s in self._calls if s)
+            if failures / total >= self.failure_rate or slow_calls / total >= self.slow_call_rate:
+                self._trip(now)
+
+    def _trip(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+        self._trial_calls = 0
+        self._trial_successes = 0
+        self._calls.clear()
+        logger.warning(f'{self.name} circuit opened')
+        if self.probe is not None and (self._prober is None or not self._prober.is_alive()):
+            self._prober = threading.Thread(target=self._probe_loop, name=f'{self.name}-probe', daemon=True)
+            self._prober.start()
+
+    def _close(self):
+        self.state = CLOSED
+        self.opened_at = None
+        self._calls.clear()
+        logger.info(f'{self.name} circuit closed')
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.open_seconds)
+            with self._lock:
+                if self.state != OPEN:
+                    return
+            try:
+                self.probe()
+            except Exception as e:
+                logger.info(f'{self.name} probe failed: {str(e)}')
+                with self._lock:
+                    self.opened_at = time.monotonic()
+                continue
+            with self._lock:
+                if self.state == OPEN:
+                    self.state = HALF_OPEN
+                    self._trial_calls = 0
+                    self._trial_successes = 0
+            return
+
+    def call(self, fn, *args, **kwargs):
+        self.allow()
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(time.perf_counter() - start, e)
+            raise
+        self.record(time.perf_counter() - start)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, 'trips': self.trips, 'rejected': self.rejected}
+
+class GuardedCursor:
+    """Cursor proxy that runs fetches through the circuit breaker"""
+
+    def __init__(self, cursor, breaker):
+        self._cursor = cursor
+        self._breaker = breaker
+
+    def __getattr__(self, name):
+        attribute = getattr(self._cursor, name)
+        if not callable(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def chained(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            # sort/skip/limit/batch_size return the cursor itself; keep it guarded
+            return self if result is self._cursor else result
+        return chained
+
+    def __iter__(self):
+        iterator = iter(self._cursor)
+        # Only the first fetch is timed; later documents mostly come from the
+        # buffered batch and would dilute the window with free successes
+        try:
+            document = self._breaker.call(next, iterator)
+        except StopIteration:
+            return
+        yield document
+        while True:
+            try:
+                document = next(iterator)
+            except StopIteration:
+                return
+            except Exception as e:
+                self._breaker.record(0, e)
+                raise
+            yield document
+
+    def __next__(self):
+        return self._breaker.call(next, self._cursor)
+
+class GuardedCollection:
+    """Collection proxy that fails fast while the breaker is open"""
+
+    def __init__(self, collection, breaker):
+        self._collection = collection
+        self._breaker = breaker
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        # Read preferences and other options are callable objects, not database calls
+        if not inspect.ismethod(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def guarded(*args, **kwargs):
+            if name == 'find':
+                # find() is lazy: the breaker is applied when the cursor fetches
+                self._breaker.check()
+                return GuardedCursor(attribute(*args, **kwargs), self._breaker)
+            result = self._breaker.call(attribute, *args, **kwargs)
+            if isinstance(result, (pymongo.cursor.Cursor, pymongo.command_cursor.CommandCursor)):
+                return GuardedCursor(result, self._breaker)
+            return result
+        return guarded
+
+    def __getitem__(self, name):
+        return GuardedCollection(self._collection[name], self._breaker)
+
+def parse_deadlines(value):
+    """Parse 'endpoint=ms,endpoint=ms' into a dict"""
+    deadlines = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        endpoint, _, ms = item.partition('=')
+        deadlines[endpoint.strip()] = int(ms)
+    return deadlines
+
+def within_deadline(items):
+    """Iterate `items` with every fetch under the current view's deadline
+
+    A streamed body is iterated after the view has returned, outside the
+    pymongo.timeout() block of init_deadlines, so each cursor batch fetch
+    re-enters it here. Call inside the request (before returning).
+    """
+    budget_ms = g.get('db_deadline_ms')
+    if not budget_ms:
+        return iter(items)
+    return _iter_with_timeout(iter(items), budget_ms / 1000)
+
+_END = object()
+
+def _iter_with_timeout(iterator, seconds):
+    while True:
+        if pymongo.loaded:
+            with pymongo.timeout(seconds):
+                item = next(iterator, _END)
+        else:
+            item = next(iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+def init_deadlines(app):
+    """Run every view under a pymongo.timeout() budget
+
+    Inside the block pymongo bounds server selection and socket waits by the
+    remaining budget and sends it to the server as maxTimeMS, so a slow
+    query is cancelled server-side instead of holding a worker thread.
+    Budgets come from DB_DEADLINES_MS per endpoint, else DB_DEADLINE_MS.
+    """
+    default = app.config['DB_DEADLINE_MS']
+    deadlines = app.config['DB_DEADLINES_MS']
+
+    def with_deadline(view, budget_ms):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            # Streamed responses read it again while their body is iterated (see within_deadline)
+            g.db_deadline_ms = budget_ms
+            if not pymongo.loaded:
+                # No driver loaded (JSON store, or not connected yet), so no query to bound
+                return view(*args, **kwargs)
+            with pymongo.timeout(budget_ms / 1000):
+                return view(*args, **kwargs)
+        return wrapped
+
+    for endpoint, view in list(app.view_functions.items()):
+        budget_ms = deadlines.get(endpoint, default)
+        if budget_ms:
+            app.view_functions[endpoint] = with_deadline(view, budget_ms)
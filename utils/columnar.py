@@ -0,0 +1,379 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+import threading
+
+# Fields stored as columns; anything else a document carries is kept per row
+COLUMN_FIELDS = ('_id', 'name', 'email', 'phone', 'course', 'status', 'message', 'timestamp')
+SEARCH_FIELDS = ('name', 'email', 'phone', '_id')
+SORT_MODES = ('date', 'name', 'status')
+SEARCH_CHUNK_ROWS = 8192
+
+MISSING_TIMESTAMP = -(2 ** 63)
+DAY_MICROS = 86400 * 1000000
+_EPOCH = datetime(1970, 1, 1)
+
+def _timestamp_micros(value):
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return MISSING_TIMESTAMP
+    if not isinstance(value, datetime):
+        return MISSING_TIMESTAMP
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def _search_line(document):
+    return '\t'.join(str(document.get(field) or '') for field in SEARCH_FIELDS).lower().replace('\n', ' ')
+
+class _Dictionary:
+    """Dictionary encoding; codes follow the sorted order of the initial values"""
+
+    def __init__(self, values):
+        self.values = sorted(set(values), key=lambda value: (value is not None, value or ''))
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def add(self, value):
+        # New values get the next code, which no longer follows value order
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+class _SearchChunk:
+    """Lowercase search lines for a run of rows, joined into one string on demand"""
+
+    def __init__(self, first_row, lines):
+        self.first_row = first_row
+        self.lines = lines
+        self._text = None
+        self._starts = None
+
+    def append(self, line):
+        self.lines.append(line)
+        self._text = None
+
+    def text(self):
+        if self._text is None:
+            starts, offset = array('q'), 0
+            for line in self.lines:
+                starts.append(offset)
+                offset += len(line) + 1
+            self._text, self._starts = '\n'.join(self.lines), starts
+        return self._text, self._starts
+
+class _SortIndex:
+    """Rows in ascending (key, row) order, as parallel key and row sequences
+
+    Inserts and removals find their slot by bisection. Descending listings
+    walk the same sequences backwards but keep ties in row order, matching
+    list.sort(reverse=True) on the file's order.
+    """
+
+    def __init__(self, key_of, size, typecode=None):
+        order = sorted(range(size), key=key_of)
+        keys = [key_of(i) for i in order]
+        self.keys = array(typecode, keys) if typecode else keys
+        self.rows = array('q', order)
+        self._descending_rows = None  # full descending order, kept until the next change
+
+    def _position(self, key, row):
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        return bisect_left(self.rows, row, lo, hi)
+
+    def insert(self, key, row):
+        position = self._position(key, row)
+        self.keys.insert(position, key)
+        self.rows.insert(position, row)
+        self._descending_rows = None
+
+    def remove(self, key, row):
+        position = self._position(key, row)
+        del self.keys[position]
+        del self.rows[position]
+        self._descending_rows = None
+
+    def slice(self, start, count=None, descending=False):
+        """Rows at listing positions [start, start + count) in O(log n + count)"""
+        size = len(self.rows)
+        stop = size if count is None else min(size, start + count)
+        if start >= stop:
+            return []
+        if not descending:
+            return list(self.rows[start:stop])
+        if self._descending_rows is not None:
+            return list(self._descending_rows[start:stop])
+        if start == 0 and stop == size:
+            self._descending_rows = array('q', self._descending(0, size))
+            return list(self._descending_rows)
+        # Listing positions [start, stop) hold ascending indices [lo, hi), reordered within ties
+        lo, hi = size - stop, size - start
+        group_lo = bisect_left(self.keys, self.keys[lo], 0, lo)
+        group_hi = bisect_right(self.keys, self.keys[hi - 1], hi - 1)
+        if group_hi - group_lo > 2 * (hi - lo) + 64:
+            return self._walk(start, stop)  # cut through a large tie group
+        skip = start - (size - group_hi)
+        return self._descending(group_lo, group_hi)[skip:skip + stop - start]
+
+    def _descending(self, lo, hi):
+        """Listing order of the complete tie groups at ascending indices [lo, hi)"""
+        rows = list(reversed(self.rows[lo:hi]))
+        keys = self.keys[lo:hi]
+        if len(set(keys)) == len(keys):
+            return rows
+        position = 0
+        for _, group in groupby(reversed(keys)):
+            length = len(list(group))
+            if length > 1:
+                rows[position:position + length] = rows[position:position + length][::-1]
+            position += length
+        return rows
+
+    def _walk(self, start, stop):
+        keys, rows, result = self.keys, self.rows, []
+        size = len(rows)
+        position = start
+        while position < stop:
+            # Listing position p falls in the tie group holding ascending index size-1-p
+            j = size - 1 - position
+            key = keys[j]
+            lo = j if j == 0 or keys[j - 1] != key else bisect_left(keys, key, 0, j)
+            hi = j + 1 if j + 1 == size or keys[j + 1] != key else bisect_right(keys, key, j)
+            offset = position - (size - hi)
+            take = min(hi - lo - offset, stop - position)
+            result.extend(rows[lo + offset:lo + offset + take])
+            position += take
+        return result
+
+class ApplicationSnapshot:
+    """Column-oriented copy of the local application store
+
+    course and status are dictionary-encoded into small-int arrays and
+    timestamps are kept as int64 microseconds. Search runs str.find over
+    chunked lowercase text, each sort mode keeps a presorted index, and
+    group-by counts run over the code arrays. Only the rows a request
+    returns are turned back into dicts. append() and set_status() keep it
+    current after this process's own writes.
+    """
+
+    def __init__(self, applications):
+        applications = list(applications)
+        self.size = len(applications)
+        self.ids = [application.get('_id') for application in applications]
+        self.names = [application.get('name') for application in applications]
+        self.emails = [application.get('email') for application in applications]
+        self.phones = [application.get('phone') for application in applications]
+        self.messages = [application.get('message') for application in applications]
+        self.timestamps_raw = [application.get('timestamp') for application in applications]
+        self.timestamps = array('q', (_timestamp_micros(value) for value in self.timestamps_raw))
+
+        self.courses = _Dictionary(application.get('course') for application in applications)
+        self.statuses = _Dictionary(application.get('status') for application in applications)
+        self.course_codes = array('H', (self.courses.codes[application.get('course')] for application in applications))
+        self.status_codes = array('H', (self.statuses.codes[application.get('status')] for application in applications))
+
+        # Per-row exceptions: fields beyond the columns, or columns the document lacks
+        self.irregular = {}
+        for i, application in enumerate(applications):
+            self._note_irregular(i, application)
+
+        lines = [_search_line(application) for application in applications]
+        self._chunks = [
+            _SearchChunk(first, lines[first:first + SEARCH_CHUNK_ROWS])
+            for first in range(0, self.size, SEARCH_CHUNK_ROWS)
+        ]
+
+        self._indexes = {}
+        self._positions = None
+        self._lock = threading.RLock()
+
+    def _note_irregular(self, i, document):
+        extra = {key: value for key, value in document.items() if key not in COLUMN_FIELDS}
+        missing = [field for field in COLUMN_FIELDS if field not in document]
+        if extra or missing:
+            self.irregular[i] = (extra, missing)
+
+    def _sort_key(self, sort_by):
+        if sort_by == 'name':
+            names = self.names
+            return lambda i: (names[i] or '').lower()
+        if sort_by == 'status':
+            return self.status_codes.__getitem__
+        return self.timestamps.__getitem__
+
+    def _index(self, sort_by):
+        index = self._indexes.get(sort_by)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(sort_by)
+                if index is None:
+                    typecode = {'date': 'q', 'status': 'H'}.get(sort_by)
+                    index = _SortIndex(self._sort_key(sort_by), self.size, typecode)
+                    self._indexes[sort_by] = index
+        return index
+
+    def search(self, query):
+        """Rows whose name, email, phone or id contains the query (case-insensitive)"""
+        needle = query.lower()
+        if not needle:
+            return None
+        if '\n' in needle or '\t' in needle:
+            return []  # would only match across field or row boundaries
+        rows = []
+        for chunk in self._chunks:
+            text, starts = chunk.text()
+            count = len(starts)
+            position = text.find(needle)
+            while position != -1:
+                row = bisect_right(starts, position) - 1
+                rows.append(chunk.first_row + row)
+                # Skip to the next row: one match per row is enough
+                position = text.find(needle, starts[row + 1]) if row + 1 < count else -1
+        return rows
+
+    def select(self, search=None, sort_by='date', descending=True, offset=0, limit=None):
+        """(indices of one page of matching rows in listing order, total matches)"""
+        sort_by = sort_by if sort_by in SORT_MODES else 'date'
+        with self._lock:
+            rows = self.search(search) if search else None
+            if rows is None:
+                return self._index(sort_by).slice(offset, limit, descending), self.size
+            if len(rows) * 8 < self.size:
+                # Few matches: sorting them beats walking the whole index.
+                # rows are ascending, so reverse=True keeps ties in file order
+                ordered = sorted(rows, key=self._sort_key(sort_by), reverse=descending)
+            else:
+                mask = bytearray(self.size)
+                for row in rows:
+                    mask[row] = 1
+                ordered = [row for row in self._index(sort_by).slice(0, None, descending) if mask[row]]
+        stop = None if limit is None else offset + limit
+        return ordered[offset:stop], len(rows)
+
+    def rows(self, indices):
+        """Materialize only the selected rows, lazily"""
+        ids, names, emails, phones, messages = self.ids, self.names, self.emails, self.phones, self.messages
+        courses, course_codes = self.courses.values, self.course_codes
+        statuses, status_codes = self.statuses.values, self.status_codes
+        timestamps, irregular = self.timestamps_raw, self.irregular
+        for i in indices:
+            document = {
+                '_id': ids[i],
+                'name': names[i],
+                'email': emails[i],
+                'phone': phones[i],
+                'course': courses[course_codes[i]],
+                'status': statuses[status_codes[i]],
+                'message': messages[i],
+                'timestamp': timestamps[i]
+            }
+            if irregular and i in irregular:
+                extra, missing = irregular[i]
+                for field in missing:
+                    del document[field]
+                document.update(extra)
+            yield document
+
+    def append(self, document):
+        """Add a newly saved application; False if the snapshot must be rebuilt instead"""
+        with self._lock:
+            if document.get('status') not in self.statuses.codes:
+                return False  # a new status would break the order of status codes
+            i = self.size
+            self.ids.append(document.get('_id'))
+            self.names.append(document.get('name'))
+            self.emails.append(document.get('email'))
+            self.phones.append(document.get('phone'))
+            self.messages.append(document.get('message'))
+            self.timestamps_raw.append(document.get('timestamp'))
+            self.timestamps.append(_timestamp_micros(document.get('timestamp')))
+            self.course_codes.append(self.courses.add(document.get('course')))
+            self.status_codes.append(self.statuses.codes[document.get('status')])
+            self._note_irregular(i, document)
+
+            if not self._chunks or len(self._chunks[-1].lines) >= SEARCH_CHUNK_ROWS:
+                self._chunks.append(_SearchChunk(i, []))
+            self._chunks[-1].append(_search_line(document))
+
+            for sort_by, index in self._indexes.items():
+                index.insert(self._sort_key(sort_by)(i), i)
+            if self._positions is not None:
+                self._positions.setdefault(self.ids[i], i)
+            self.size += 1
+            return True
+
+    def set_status(self, application_id, status):
+        """Reposition an application after a status change; False if a rebuild is needed"""
+        with self._lock:
+            if self._positions is None:
+                self._positions = {}
+                for i, value in enumerate(self.ids):
+                    self._positions.setdefault(value, i)
+            i = self._positions.get(application_id)
+            if i is None or status not in self.statuses.codes:
+                return False
+            index = self._indexes.get('status')
+            if index is not None:
+                index.remove(self.status_codes[i], i)
+            self.status_codes[i] = self.statuses.codes[status]
+            if index is not None:
+                index.insert(self.status_codes[i], i)
+            return True
+
+    def count_by(self, field, indices=None):
+        """{value: count} for course or status over all rows or a selection"""
+        dictionary, codes = (self.courses, self.course_codes) if field == 'course' else (self.statuses, self.status_codes)
+        counts = Counter(codes) if indices is None else Counter(map(codes.__getitem__, indices))
+        return {dictionary.values[code]: count for code, count in counts.items()}
+
+    def count_by_day(self, since):
+        """{YYYY-MM-DD: count} for rows timestamped at or after `since`"""
+        with self._lock:
+            timestamps = self._index('date').keys
+            start = bisect_left(timestamps, _timestamp_micros(since))
+            days = Counter(value // DAY_MICROS for value in timestamps[start:])
+        return {(_EPOCH + timedelta(days=day)).strftime('%Y-%m-%d'): count for day, count in sorted(days.items())}
+
+    def latest(self, limit):
+        """The `limit` most recent rows that have a timestamp"""
+        indices, _ = self.select(sort_by='date', descending=True, limit=limit)
+        return list(self.rows(i for i in indices if self.timestamps[i] != MISSING_TIMESTAMP))
+
+class SnapshotCache:
+    """Keeps one snapshot per store version
+
+    Writes made by this process are applied in place with apply(); a
+    version it did not produce (another worker wrote the file) triggers a
+    rebuild on the next get().
+    """
+
+    def __init__(self, load):
+        self._load = load
+        self._version = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self, version):
+        if self._snapshot is not None and self._version == version:
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is None or self._version != version:
+                self._snapshot = ApplicationSnapshot(self._load())
+                self._version = version
+            return self._snapshot
+
+    def apply(self, version_before, version_after, change):
+        """Apply `change(snapshot)` for a write that moved the store between versions"""
+        with self._lock:
+            if self._snapshot is None:
+                return
+            if self._version == version_before and change(self._snapshot) is not False:
+                self._version = version_after
+            else:
+                self._snapshot = None
@@ -0,0 +1,45 @@
+from functools import wraps
+import hashlib
+import logging
+
+from flask import current_app, request
+
+logger = logging.getLogger(__name__)
+
+def collection_etag(collection, version):
+    """ETag for a list view: collection version plus the request's query parameters"""
+    args = sorted(request.args.items(multi=True))
+    key = repr((collection, version, args)).encode()
+    return hashlib.blake2b(key, digest_size=12).hexdigest()
+
+def versioned(collection, get_version):
+    """Answer If-None-Match with 304 while the collection version is unchanged
+
+    The version is read before the view runs, so a 304 costs one version
+    lookup and no query or serialization. If the version cannot be read
+    the view runs without an ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            try:
+                version = get_version()
+            except Exception as e:
+                logger.warning(f'Could not read {collection} version: {str(e)}')
+                version = None
+            if version is None:
+                return view(*args, **kwargs)
+
+            etag = collection_etag(collection, version)
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Browsers may keep the body but must revalidate before reusing it
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,230 @@
+# Archival and purge of soft-deleted contacts
+#
+# Contact.soft_delete() stamps deletedAt. A background job copies
+# soft-deleted contacts into contacts_archive every
+# CONTACT_ARCHIVE_INTERVAL_SECONDS and stamps archivedAt on the hot copy.
+# Every worker starts the job, but only the one holding CONTACT_ARCHIVE_LOCK
+# runs it, so there is one archiver per host. Set the interval to 0 to leave
+# the job to cron and the CLI below.
+# CONTACT_PURGE_AFTER_DAYS later the hot copy is removed, on MongoDB by a TTL
+# index on archivedAt and on SQLite by the job itself. Expiry keys on
+# archivedAt, not deletedAt, so a contact never leaves the hot collection
+# before its archived copy exists. Run the job or inspect it with:
+#
+#   python -m utils.contact_archive run
+#   python -m utils.contact_archive status
+import argparse
+import fcntl
+from datetime import datetime, timedelta
+import logging
+import os
+import threading
+
+from utils.lazy import lazy_module
+
+logger = logging.getLogger(__name__)
+
+pymongo = lazy_module('pymongo')
+
+CONTACTS_COLLECTION = 'contacts'
+CONTACTS_ARCHIVE_COLLECTION = 'contacts_archive'
+CONTACT_PURGE_AFTER_DAYS = float(os.getenv('CONTACT_PURGE_AFTER_DAYS', 30))
+CONTACT_ARCHIVE_INTERVAL_SECONDS = float(os.getenv('CONTACT_ARCHIVE_INTERVAL_SECONDS', 300))
+CONTACT_ARCHIVE_LOCK = os.getenv('CONTACT_ARCHIVE_LOCK', 'contact_archive.lock')
+TTL_INDEX = 'archivedAt_ttl'
+# Error codes for an existing index whose options differ
+INDEX_OPTIONS_CONFLICT = (85, 86)
+
+class ContactArchiver:
+    """Moves soft-deleted contacts out of the hot collection
+
+    Soft-deleted contacts not yet stamped with archivedAt are copied to
+    the archive in batches, then stamped. A copy that already exists (a
+    run interrupted before stamping, or another worker) is replaced with
+    the current document. With `ttl_index` the database purges stamped
+    contacts itself; otherwise purge_expired deletes them.
+    """
+
+    def __init__(self, hot, archive, purge_after_days=CONTACT_PURGE_AFTER_DAYS, ensure_indexes=None):
+        self.hot = hot
+        self.archive = archive
+        self.purge_after = timedelta(days=purge_after_days)
+        self._ensure_indexes = ensure_indexes
+        self._indexes_ready = False
+        self._pid = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = None
+        self._lock_pid = None
+
+    @property
+    def ttl_index(self):
+        return self._ensure_indexes is not None
+
+    def _copy(self, documents):
+        try:
+            self.archive.insert_many(documents, ordered=False)
+        except pymongo.errors.BulkWriteError as error:
+            for write_error in error.details['writeErrors']:
+                if write_error['code'] != 11000:
+                    raise
+                document = documents[write_error['index']]
+                # In place, so the archived copy never disappears in between
+                self.archive.replace_one({'_id': document['_id']}, document, upsert=True)
+
+    def archive_deleted(self, batch_size=500):
+        """Copy soft-deleted contacts to the archive and stamp them; returns the number archived"""
+        if self._ensure_indexes is not None and not self._indexes_ready:
+            self._ensure_indexes(self.purge_after)
+            self._indexes_ready = True
+        archived = 0
+        while True:
+            documents = list(self.hot.find(
+                {'isActive': False, 'archivedAt': {'$exists': False}}
+            ).limit(batch_size))
+            if not documents:
+                return archived
+            now = datetime.utcnow()
+            for document in documents:
+                # Contacts deleted before deletedAt existed count from their last update
+                document.setdefault('deletedAt', document.get('updatedAt') or now)
+                document['archivedAt'] = now
+            self._copy(documents)
+            for document in documents:
+                self.hot.update_one(
+                    {'_id': document['_id'], 'isActive': False},
+                    {'$set': {'deletedAt': document['deletedAt'], 'archivedAt': now}}
+                )
+            archived += len(documents)
+
+    def purge_expired(self):
+        """Delete archived contacts past the purge age; a no-op where a TTL index does it"""
+        if self.ttl_index:
+            return 0
+        cutoff = datetime.utcnow() - self.purge_after
+        return self.hot.delete_many({'isActive': False, 'archivedAt': {'$lt': cutoff}}).deleted_count
+
+    def run_once(self):
+        return {'archived': self.archive_deleted(), 'purged': self.purge_expired()}
+
+    def iter_archived(self, projection=None):
+        return self.archive.find({}, projection)
+
+    def stats(self):
+        return {
+            'pendingArchive': self.hot.count_documents({'isActive': False, 'archivedAt': {'$exists': False}}),
+            'awaitingPurge': self.hot.count_documents({'isActive': False, 'archivedAt': {'$exists': True}}),
+            'archived': self.archive.count_documents({}),
+            'purgeAfterDays': self.purge_after.total_seconds() / 86400,
+            'ttlIndex': self.ttl_index
+        }
+
+    def acquire(self, path=CONTACT_ARCHIVE_LOCK):
+        """Try to become this host's archiver; the lock is held until the process exits"""
+        if self._lock is not None:
+            if self._lock_pid == os.getpid():
+                return True
+            # Inherited across fork: the lock stays with the parent's handle
+            self._lock.close()
+            self._lock = None
+        lock = open(path, 'a')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        self._lock, self._lock_pid = lock, os.getpid()
+        return True
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            # Workers without the lock keep asking, so one takes over if the owner exits
+            if not self.acquire():
+                continue
+            try:
+                result = self.run_once()
+                if result['archived'] or result['purged']:
+                    logger.info(f"Archived {result['archived']} and purged {result['purged']} deleted contacts")
+            except Exception as e:
+                logger.error(f'Contact archival failed: {str(e)}')
+
+    def start(self, interval=CONTACT_ARCHIVE_INTERVAL_SECONDS):
+        """Run the job every `interval` seconds while this process holds the host lock
+
+        Threads do not survive fork, so each worker calls this after forking.
+        An interval of 0 disables the in-process job.
+        """
+        if interval <= 0:
+            return
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name='contact-archiver', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+def _ensure_mongo_indexes(purge_after):
+    """TTL index on archivedAt, and listing indexes that only cover live contacts"""
+    from config.database import get_db
+    database = get_db()
+    contacts = database[CONTACTS_COLLECTION]
+    expire_after = int(purge_after.total_seconds())
+    try:
+        contacts.create_index('archivedAt', name=TTL_INDEX, expireAfterSeconds=expire_after)
+    except pymongo.errors.OperationFailure as error:
+        if error.code not in INDEX_OPTIONS_CONFLICT:
+            raise
+        # CONTACT_PURGE_AFTER_DAYS changed since the index was built
+        database.command('collMod', CONTACTS_COLLECTION, index={'name': TTL_INDEX, 'expireAfterSeconds': expire_after})
+    live = {'isActive': True}
+    contacts.create_index([('createdAt', -1)], name='live_createdAt', partialFilterExpression=live)
+    contacts.create_index([('status', 1), ('createdAt', -1)], name='live_status_createdAt', partialFilterExpression=live)
+    database[CONTACTS_ARCHIVE_COLLECTION].create_index('deletedAt')
+
+_archiver = {'key': None, 'archiver': None}
+
+def get_contact_archiver():
+    """Archiver for the configured database (one per process)"""
+    from config.database import get_storage_backend, get_collection
+    backend = get_storage_backend()
+    if _archiver['key'] == (backend, os.getpid()):
+        return _archiver['archiver']
+    archiver = ContactArchiver(
+        get_collection(CONTACTS_COLLECTION),
+        get_collection(CONTACTS_ARCHIVE_COLLECTION),
+        ensure_indexes=_ensure_mongo_indexes if backend == 'mongodb' else None
+    )
+    _archiver.update(key=(backend, os.getpid()), archiver=archiver)
+    return archiver
+
+def main():
+    from dotenv import load_dotenv
+    from config.database import connect_db
+
+    parser = argparse.ArgumentParser(description='Archive and purge soft-deleted contacts')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('run', help='archive soft-deleted contacts and purge expired ones now')
+    subcommands.add_parser('status', help='show contacts waiting to be archived or purged')
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    connect_db()
+
+    archiver = get_contact_archiver()
+    if args.command == 'run':
+        if not archiver.acquire():
+            raise SystemExit(f'Another process holds {CONTACT_ARCHIVE_LOCK}; contact archival is already running')
+        result = archiver.run_once()
+        print(f"Archived {result['archived']} deleted contacts, purged {result['purged']}")
+    else:
+        for key, value in archiver.stats().items():
+            print(f'{key}: {value}')
+
+if __name__ == '__main__':
+    main()
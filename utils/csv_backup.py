@@ -0,0 +1,425 @@
+# CSV backup of admissions, rotated into compressed segments
+#
+# Every admission is appended to admissions.csv. When the file passes
+# CSV_ROTATE_BYTES or its first row belongs to an earlier CSV_ROTATE_PERIOD,
+# it is gzipped into CSV_BACKUP_DIR with a single header row. index.json in
+# that directory records each segment's row count, timestamp range and one
+# hash per day: the sum (mod 2**256) of its row digests, so days, months and
+# the whole backup combine by addition. Check the backup against the primary
+# store (MongoDB, SQLite or applications.json, plus archived applications):
+#
+#   python -m utils.csv_backup reconcile [--from 2026-01-01] [--to 2026-12-31]
+#   python -m utils.csv_backup rotate
+#
+# Reconciliation compares the totals first and only descends into months,
+# then days, then rows where the hashes differ.
+import argparse
+import csv
+from datetime import datetime, timedelta
+import fcntl
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from utils.metrics import observe_file_write
+
+logger = logging.getLogger(__name__)
+
+CSV_FIELDS = ['Application ID', 'Name', 'Email', 'Phone', 'Course', 'Message', 'Timestamp', 'Status']
+# Status changes after submission and the backup is write-once, so it is not hashed
+HASHED_FIELDS = CSV_FIELDS[:-1]
+MANIFEST_FILE = 'index.json'
+HASH_MODULUS = 2 ** 256
+
+def normalize_timestamp(value):
+    """Second-precision 'YYYY-MM-DD HH:MM:SS' for datetimes and both CSV timestamp formats"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return ''
+
+def admission_row(admission_data, application_id):
+    timestamp = admission_data['timestamp']
+    if not isinstance(timestamp, str):
+        timestamp = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+    return {
+        'Application ID': application_id,
+        'Name': admission_data.get('name'),
+        'Email': admission_data.get('email'),
+        'Phone': admission_data.get('phone'),
+        'Course': admission_data.get('course'),
+        'Message': admission_data.get('message', ''),
+        'Timestamp': timestamp,
+        'Status': admission_data.get('status')
+    }
+
+def row_digest(row):
+    """(day, application id, digest) of a CSV row"""
+    values = [str(row.get(field) or '') for field in HASHED_FIELDS]
+    values[HASHED_FIELDS.index('Timestamp')] = normalize_timestamp(row.get('Timestamp'))
+    digest = hashlib.sha256('\x1f'.join(values).encode('utf-8')).digest()
+    return values[HASHED_FIELDS.index('Timestamp')][:10], values[0], int.from_bytes(digest, 'big')
+
+class RangeHashes:
+    """Order-independent row-count and hash-sum per day"""
+
+    def __init__(self, days=None):
+        self.days = days or {}  # day -> [count, hash sum]
+
+    def add(self, day, digest):
+        entry = self.days.setdefault(day, [0, 0])
+        entry[0] += 1
+        entry[1] = (entry[1] + digest) % HASH_MODULUS
+
+    def merge(self, other):
+        for day, (count, total) in other.days.items():
+            entry = self.days.setdefault(day, [0, 0])
+            entry[0] += count
+            entry[1] = (entry[1] + total) % HASH_MODULUS
+        return self
+
+    def rollup(self, width):
+        """Combine days into ranges keyed by the first `width` characters (7 = months, 0 = all)"""
+        ranges = {}
+        for day, (count, total) in self.days.items():
+            entry = ranges.setdefault(day[:width], [0, 0])
+            entry[0] += count
+            entry[1] = (entry[1] + total) % HASH_MODULUS
+        return ranges
+
+    def to_dict(self):
+        return {day: [count, format(total, 'x')] for day, (count, total) in self.days.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({day: [count, int(total, 16)] for day, (count, total) in data.items()})
+
+def _period(timestamp, period):
+    if period == 'none' or not timestamp:
+        return None
+    if period == 'week':
+        day = datetime.strptime(timestamp[:10], '%Y-%m-%d').date()
+        return (day - timedelta(days=day.weekday())).isoformat()
+    return timestamp[:10] if period == 'day' else timestamp[:7]
+
+def read_rows(f):
+    """Data rows of a CSV backup file, skipping repeated header rows"""
+    for row in csv.reader(f):
+        if not row or row == CSV_FIELDS:
+            continue
+        yield dict(zip(CSV_FIELDS, row))
+
+class CsvBackup:
+    """admissions.csv plus its rotated, gzip-compressed segments"""
+
+    def __init__(self, path='admissions.csv', directory='csv_backups', max_bytes=10 * 1024 * 1024, period='month'):
+        self.path = path
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.period = period
+        self._first = {'inode': None, 'period': None}
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _lock(self):
+        lock = open(self.path + '.lock', 'w')
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def _first_period(self, stat, reread=False):
+        # Read once per file: the period of its first row decides date-based rotation
+        if reread or self._first['inode'] != stat.st_ino:
+            period = None
+            with open(self.path, 'r', newline='', encoding='utf-8') as f:
+                for row in read_rows(f):
+                    period = _period(normalize_timestamp(row['Timestamp']), self.period)
+                    break
+            self._first = {'inode': stat.st_ino, 'period': period}
+        return self._first['period']
+
+    def _should_rotate(self, stat, timestamp):
+        if stat.st_size == 0:
+            return False
+        if self.max_bytes and stat.st_size >= self.max_bytes:
+            return True
+        current = _period(normalize_timestamp(timestamp), self.period)
+        if current is None or self._first_period(stat) in (None, current):
+            return False
+        # A recreated file can reuse the inode (after another worker rotated it),
+        # so confirm against the file before sealing it
+        return self._first_period(stat, reread=True) not in (None, current)
+
+    def append(self, row):
+        """Append one admission row, rotating first when the active file is full or out of period"""
+        with self._lock():
+            try:
+                stat = os.stat(self.path)
+                if self._should_rotate(stat, row['Timestamp']):
+                    self._rotate()
+            except FileNotFoundError:
+                pass
+            with observe_file_write('csv'), open(self.path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+                if f.tell() == 0:
+                    writer.writeheader()  # under the lock, so exactly one header per file
+                writer.writerow(row)
+
+    def rotate(self):
+        """Seal the active file into a segment now; returns the segment entry or None"""
+        with self._lock():
+            return self._rotate()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'segments': []}
+
+    def _write_atomic(self, path, data, mode):
+        with tempfile.NamedTemporaryFile(mode, dir=self.directory, delete=False) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f.name, path)
+
+    def _rotate(self):
+        try:
+            with open(self.path, 'r', newline='', encoding='utf-8') as f:
+                rows = list(read_rows(f))
+        except FileNotFoundError:
+            return None
+        if not rows:
+            os.remove(self.path)
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        hashes = RangeHashes()
+        for row in rows:
+            day, _, digest = row_digest(row)
+            hashes.add(day, digest)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+        payload = gzip.compress(buffer.getvalue().encode('utf-8'))
+
+        manifest = self._load_manifest()
+        name = f"admissions-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{len(manifest['segments']):04d}.csv.gz"
+        self._write_atomic(os.path.join(self.directory, name), payload, 'wb')
+        timestamps = sorted(normalize_timestamp(row['Timestamp']) for row in rows)
+        segment = {
+            'file': name,
+            'rows': len(rows),
+            'first': timestamps[0],
+            'last': timestamps[-1],
+            'bytes': len(payload),
+            'sha256': hashlib.sha256(payload).hexdigest(),
+            'days': hashes.to_dict()
+        }
+        manifest['segments'].append(segment)
+        self._write_atomic(self.manifest_path, json.dumps(manifest), 'w')
+        # The segment is durable before the active file goes away
+        os.remove(self.path)
+        self._first = {'inode': None, 'period': None}
+        logger.info(f'Rotated {len(rows)} admission rows into {name}')
+        return segment
+
+    def segments(self):
+        return self._load_manifest()['segments']
+
+    def read_segment(self, segment):
+        with gzip.open(os.path.join(self.directory, segment['file']), 'rt', newline='', encoding='utf-8') as f:
+            yield from read_rows(f)
+
+    def read_active(self):
+        try:
+            with open(self.path, 'r', newline='', encoding='utf-8') as f:
+                yield from read_rows(f)
+        except FileNotFoundError:
+            return
+
+    def hashes(self, verify=False):
+        """Per-day hashes of the whole backup: segments from the manifest, the active file by reading it"""
+        hashes = RangeHashes()
+        for segment in self.segments():
+            if verify:
+                hashes.merge(hash_rows(self.read_segment(segment)))
+            else:
+                hashes.merge(RangeHashes.from_dict(segment['days']))
+        return hashes.merge(hash_rows(self.read_active()))
+
+    def corrupt_segments(self):
+        """Segment files whose checksum no longer matches index.json"""
+        corrupt = []
+        for segment in self.segments():
+            try:
+                with open(os.path.join(self.directory, segment['file']), 'rb') as f:
+                    intact = hashlib.sha256(f.read()).hexdigest() == segment['sha256']
+            except FileNotFoundError:
+                intact = False
+            if not intact:
+                corrupt.append(segment['file'])
+        return corrupt
+
+    def iter_days(self, days):
+        """Rows whose day is in `days`, opening only segments whose range covers one"""
+        low, high = min(days), max(days)
+        for segment in self.segments():
+            if segment['last'][:10] < low or segment['first'][:10] > high:
+                continue
+            if not days.intersection(segment['days']):
+                continue
+            for row in self.read_segment(segment):
+                if normalize_timestamp(row['Timestamp'])[:10] in days:
+                    yield row
+        for row in self.read_active():
+            if normalize_timestamp(row['Timestamp'])[:10] in days:
+                yield row
+
+def hash_rows(rows, start=None, end=None):
+    hashes = RangeHashes()
+    for row in rows:
+        day, _, digest = row_digest(row)
+        if (start and day < start) or (end and day > end):
+            continue
+        hashes.add(day, digest)
+    return hashes
+
+def iter_primary_rows(start=None, end=None):
+    """Rows the CSV should hold, built from the primary store and the archive"""
+    from config.database import get_storage_backend, get_collection
+    from utils.archive import get_archive
+
+    range_start = datetime.strptime(start, '%Y-%m-%d') if start else None
+    range_end = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1) if end else None
+    if get_storage_backend() == 'json':
+        try:
+            with open('applications.json', 'r') as f:
+                hot = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            hot = []
+    else:
+        query = {}
+        if range_start or range_end:
+            query['timestamp'] = {
+                **({'$gte': range_start} if range_start else {}),
+                **({'$lt': range_end} if range_end else {})
+            }
+        hot = get_collection('Admissions').find(query).batch_size(5000)
+    for document in hot:
+        yield admission_row(document, str(document['_id']))
+    for document in get_archive().iter_range(range_start, range_end):
+        yield admission_row(document, str(document['_id']))
+
+def _row_index(rows):
+    index = {}
+    for row in rows:
+        _, application_id, digest = row_digest(row)
+        index.setdefault(application_id, []).append(digest)
+    return index
+
+def reconcile(backup, start=None, end=None, verify=False, primary_rows=iter_primary_rows):
+    """Compare backup and primary store top-down; returns a report dict"""
+    ours = RangeHashes({
+        day: entry for day, entry in backup.hashes(verify).days.items()
+        if (not start or day >= start) and (not end or day <= end)
+    })
+    theirs = hash_rows(primary_rows(start, end), start, end)
+    report = {
+        'backupRows': sum(count for count, _ in ours.days.values()),
+        'primaryRows': sum(count for count, _ in theirs.days.values()),
+        'match': ours.rollup(0) == theirs.rollup(0),
+        'months': [],
+        'days': [],
+        'missingFromBackup': [],
+        'missingFromPrimary': [],
+        'different': [],
+        'duplicatedInBackup': []
+    }
+    if verify:
+        report['corruptSegments'] = backup.corrupt_segments()
+        report['match'] = report['match'] and not report['corruptSegments']
+    if ours.rollup(0) == theirs.rollup(0):
+        return report
+
+    backup_months, primary_months = ours.rollup(7), theirs.rollup(7)
+    report['months'] = sorted(
+        month for month in set(backup_months) | set(primary_months)
+        if backup_months.get(month) != primary_months.get(month)
+    )
+    months = set(report['months'])
+    report['days'] = sorted(
+        day for day in set(ours.days) | set(theirs.days)
+        if day[:7] in months and ours.days.get(day) != theirs.days.get(day)
+    )
+
+    # Only the rows of differing days are read again
+    days = set(report['days'])
+    backup_rows = _row_index(backup.iter_days(days))
+    primary_rows = _row_index(
+        row for row in primary_rows(min(days), max(days))
+        if normalize_timestamp(row['Timestamp'])[:10] in days
+    )
+    for application_id in sorted(set(backup_rows) | set(primary_rows)):
+        in_backup, in_primary = backup_rows.get(application_id), primary_rows.get(application_id)
+        if in_backup and len(in_backup) > 1:
+            report['duplicatedInBackup'].append(application_id)
+        if not in_backup:
+            report['missingFromBackup'].append(application_id)
+        elif not in_primary:
+            report['missingFromPrimary'].append(application_id)
+        elif set(in_backup) != set(in_primary):
+            report['different'].append(application_id)
+    return report
+
+def configured_backup():
+    """CsvBackup configured from CSV_BACKUP_* and CSV_ROTATE_* settings"""
+    return CsvBackup(
+        os.getenv('CSV_BACKUP_PATH', 'admissions.csv'),
+        os.getenv('CSV_BACKUP_DIR', 'csv_backups'),
+        max_bytes=int(os.getenv('CSV_ROTATE_BYTES', 10 * 1024 * 1024)),
+        period=os.getenv('CSV_ROTATE_PERIOD', 'month')
+    )
+
+def main():
+    from dotenv import load_dotenv
+    from config.database import connect_db, get_storage_backend
+
+    parser = argparse.ArgumentParser(description='Rotate and verify the admissions CSV backup')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('rotate', help='seal admissions.csv into a compressed segment now')
+    reconcile_parser = subcommands.add_parser('reconcile', help='compare the backup with the primary store')
+    reconcile_parser.add_argument('--from', dest='start', help='first day to compare (YYYY-MM-DD)')
+    reconcile_parser.add_argument('--to', dest='end', help='last day to compare (YYYY-MM-DD)')
+    reconcile_parser.add_argument('--verify', action='store_true',
+                                  help='rehash segment contents instead of trusting index.json')
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    backup = configured_backup()
+    if args.command == 'rotate':
+        segment = backup.rotate()
+        print(f"Rotated {segment['rows']} rows into {segment['file']}" if segment else 'Nothing to rotate')
+        return
+
+    if get_storage_backend() != 'json':
+        connect_db()
+    report = reconcile(backup, args.start, args.end, args.verify)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report['match'] else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+from collections import deque
+import itertools
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """One listener's bounded queue of events"""
+
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.queue = queue.Queue(maxsize=maxsize)
+        # Set when events were dropped because the listener fell behind
+        self.overflowed = False
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class EventBroker:
+    """In-process publish/subscribe with a short replay buffer
+
+    publish() never blocks: a subscriber whose queue is full is marked as
+    overflowed and told to resync. Recent events are kept so a client
+    reconnecting with Last-Event-ID misses nothing that is still buffered.
+    """
+
+    def __init__(self, queue_size=256, history_size=1000):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._lock = threading.Lock()
+
+    def subscribe(self, last_event_id=None, limit=None):
+        """New subscription, or None when `limit` subscribers are already connected"""
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(subscription)
+            if last_event_id is not None:
+                if not any(event['id'] == last_event_id for event in self._history):
+                    # Older than the buffer, or issued by another worker: ids are per process
+                    subscription.overflowed = True
+                else:
+                    missed = [event for event in self._history if event['id'] > last_event_id]
+                    for event in missed[-self.queue_size:]:
+                        subscription.queue.put_nowait(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = {'id': next(self._ids), 'event': event_type, 'data': data}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                subscription.overflowed = True
+        return event
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            'subscribers': len(subscribers),
+            'deepestQueue': max((subscription.queue.qsize() for subscription in subscribers), default=0),
+            'overflowed': sum(subscription.overflowed for subscription in subscribers)
+        }
+
+def format_sse(event, dumps):
+    # Control events carry no id, so the browser keeps its Last-Event-ID for the next reconnect
+    lines = [f"id: {event['id']}"] if event['id'] is not None else []
+    lines.append(f"event: {event['event']}")
+    lines.extend(f'data: {line}' for line in dumps(event['data']).splitlines())
+    return '\n'.join(lines) + '\n\n'
+
+def sse_stream(subscription, dumps, heartbeat=15.0, max_seconds=None):
+    """Yield server-sent events until the client goes away or `max_seconds` pass
+
+    Ending after `max_seconds` hands the thread back; the browser reconnects
+    with Last-Event-ID and resumes from the broker's history.
+    """
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            if subscription.overflowed:
+                subscription.overflowed = False
+                # The client missed events; it should refetch the list once
+                yield format_sse({'id': None, 'event': 'resync', 'data': {}}, dumps)
+            timeout = heartbeat
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    return
+                timeout = min(timeout, heartbeat)
+            event = subscription.get(timeout=timeout)
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                yield format_sse(event, dumps)
+    finally:
+        subscription.close()
+
+def sse_busy(dumps, retry_seconds):
+    """Short stream for a client turned away at the connection limit: retry later, refetch meanwhile"""
+    yield f'retry: {int(retry_seconds * 1000)}\n\n'
+    yield format_sse({'id': None, 'event': 'busy', 'data': {'retryAfter': retry_seconds}}, dumps)
+
+def supports_change_streams(client):
+    """True for replica sets and sharded clusters; standalone servers have no change streams"""
+    hello = client.admin.command('hello')
+    return bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+
+class ChangeStreamRelay:
+    """Publish a collection's change stream into a broker
+
+    Sees writes from every worker and host, unlike in-process publishing.
+    Requires a replica set or sharded cluster.
+    """
+
+    def __init__(self, collection, broker, event_prefix):
+        self.collection = collection
+        self.broker = broker
+        self.event_prefix = event_prefix
+        self._resume_token = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _publish(self, change):
+        operation = change['operationType']
+        if operation == 'insert':
+            self.broker.publish(f'{self.event_prefix}.created', change['fullDocument'])
+        elif operation in ('update', 'replace'):
+            if operation == 'update':
+                data = dict(change['updateDescription']['updatedFields'])
+            else:
+                data = dict(change['fullDocument'])
+            data['_id'] = change['documentKey']['_id']
+            self.broker.publish(f'{self.event_prefix}.updated', data)
+        elif operation == 'delete':
+            self.broker.publish(f'{self.event_prefix}.deleted', {'_id': change['documentKey']['_id']})
+
+    def _run(self):
+        delay = 1
+        while not self._stop.is_set():
+            try:
+                with self.collection.watch(resume_after=self._resume_token) as stream:
+                    delay = 1
+                    while not self._stop.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            continue
+                        self._resume_token = stream.resume_token
+                        self._publish(change)
+            except Exception as e:
+                logger.warning(f'Change stream interrupted, retrying in {delay}s: {str(e)}')
+                self._stop.wait(delay)
+                delay = min(delay * 2, 60)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='change-stream-relay', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,168 @@
+from datetime import datetime
+import heapq
+import itertools
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+def end_of_today():
+    return datetime.utcnow().replace(hour=23, minute=59, second=59, microsecond=999999)
+
+class FollowUpScheduler:
+    """Pending follow-ups kept in a min-heap keyed by followUpDate
+
+    Loaded once per process, then kept current by track() on every contact
+    write, so listing the k due follow-ups costs O(k log n) heap pops
+    instead of a collection scan. Entries are deleted lazily: a heap item
+    is ignored when its contact has been re-tracked or dropped since.
+
+    Writes from other processes are noticed through the collection version:
+    track() advances the scheduler's version only when the write's bump is
+    the next one, otherwise the next due() reloads.
+    """
+
+    def __init__(self, load, get_version, is_pending, summarize):
+        self._load = load
+        self._get_version = get_version
+        self._is_pending = is_pending
+        self._summarize = summarize
+
+        self._heap = []      # (followUpDate, sequence, contact id) not yet due
+        self._entries = {}   # contact id -> (followUpDate, sequence, summary)
+        self._due = set()    # contact ids already promoted off the heap
+        self._sequence = itertools.count()
+        self._version = None
+        self._stale = True
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.reloads = 0
+
+    def _entry(self, data):
+        entry = (data['followUpDate'], next(self._sequence), self._summarize(data))
+        self._entries[str(data['_id'])] = entry
+        return entry
+
+    def _reload(self):
+        version = self._get_version()
+        self._entries = {}
+        self._due = set()
+        self._heap = [(entry[0], entry[1], contact_id) for contact_id, entry in (
+            (str(data['_id']), self._entry(data)) for data in self._load()
+        )]
+        heapq.heapify(self._heap)
+        self._version = version
+        self._stale = False
+        self._pid = os.getpid()
+        self.reloads += 1
+
+    def _refresh(self):
+        if self._stale or self._pid != os.getpid():
+            self._reload()
+            return
+        try:
+            version = self._get_version()
+        except Exception as e:
+            logger.warning(f'Could not read contacts version, serving cached follow-ups: {str(e)}')
+            return
+        if version != self._version:
+            self._reload()
+
+    def _promote(self, until):
+        """Move heap items due by `until` into the due set; returns the newly due summaries"""
+        promoted = []
+        while self._heap and self._heap[0][0] <= until:
+            follow_up_date, sequence, contact_id = heapq.heappop(self._heap)
+            entry = self._entries.get(contact_id)
+            if entry is None or entry[1] != sequence:
+                continue  # superseded or no longer pending
+            self._due.add(contact_id)
+            promoted.append(entry[2])
+        return promoted
+
+    def track(self, data, version=None):
+        """Record a contact write; `version` is the collection version it produced"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return  # not loaded in this process yet; the first due() loads
+            contact_id = str(data['_id'])
+            self._entries.pop(contact_id, None)
+            self._due.discard(contact_id)
+            if self._is_pending(data):
+                follow_up_date, sequence, _ = self._entry(data)
+                heapq.heappush(self._heap, (follow_up_date, sequence, contact_id))
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                # Mostly superseded items; rebuild from the live entries
+                self._heap = [
+                    (entry[0], entry[1], key) for key, entry in self._entries.items() if key not in self._due
+                ]
+                heapq.heapify(self._heap)
+
+            if version is not None and self._version is not None and version == self._version + 1:
+                self._version = version
+            else:
+                # Another process wrote in between (or the bump failed)
+                self._stale = True
+
+    def due(self, until=None):
+        """Summaries of follow-ups due by `until` (end of today), earliest first"""
+        with self._lock:
+            self._refresh()
+            self._promote(until or end_of_today())
+            due = [self._entries[contact_id] for contact_id in self._due]
+        due.sort(key=lambda entry: (entry[0], entry[1]))
+        return [entry[2] for entry in due]
+
+    def tick(self, until=None):
+        """Promote follow-ups that came due; returns the newly due summaries"""
+        with self._lock:
+            first_load = self._pid != os.getpid()
+            already_due = set(self._due)
+            self._refresh()
+            self._promote(until or end_of_today())
+            if first_load:
+                return []  # only report follow-ups that come due while we watch
+            # Compared by id so a reload does not report old follow-ups again
+            return [self._entries[contact_id][2] for contact_id in self._due - already_due]
+
+    def _run(self, on_due, interval):
+        while not self._stop.wait(interval):
+            try:
+                newly_due = self.tick()
+            except Exception as e:
+                logger.warning(f'Follow-up scheduler tick failed: {str(e)}')
+                continue
+            if newly_due:
+                try:
+                    on_due(newly_due)
+                except Exception as e:
+                    logger.error(f'Follow-up callback failed: {str(e)}')
+
+    def start(self, on_due=None, interval=60.0):
+        """Load now and, given a callback, push follow-ups to it as they come due"""
+        try:
+            self.tick()
+        except Exception as e:
+            logger.warning(f'Could not load follow-ups, retrying on first request: {str(e)}')
+        if on_due is None or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(on_due, interval), name='follow-up-scheduler', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tracked': len(self._entries),
+                'due': len(self._due),
+                'heapSize': len(self._heap),
+                'reloads': self.reloads
+            }
@@ -0,0 +1,107 @@
+from datetime import datetime
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from utils.metrics import record_health_check
+
+logger = logging.getLogger(__name__)
+
+STARTING = 'starting'
+READY = 'ready'
+NOT_READY = 'not_ready'
+
+class HealthProber:
+    """Readiness checks run on a background thread; probes read the cached results
+
+    A check is a callable that returns a dict of details (or None) and
+    raises when the dependency is unhealthy. Probe requests never run a
+    check themselves, so they cost the same however often a load balancer
+    sends them. Results older than `max_age` count as failing, so a stuck
+    prober makes the worker unready instead of reporting stale health.
+    """
+
+    def __init__(self, interval=5.0, max_age=None):
+        self.interval = interval
+        self.max_age = max_age or interval * 3
+        self._checks = []  # (name, check, critical)
+        self._results = None  # replaced whole, so readers never see a partial run
+        self._checked_at = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, name, check, critical=True):
+        """Register a check; `critical` may be a callable evaluated on every run"""
+        self._checks.append((name, check, critical))
+
+    def run_once(self):
+        results = {}
+        for name, check, critical in self._checks:
+            start = time.perf_counter()
+            try:
+                result = {'ok': True, 'details': check()}
+            except Exception as e:
+                result = {'ok': False, 'error': str(e) or type(e).__name__}
+            duration = time.perf_counter() - start
+            result['critical'] = bool(critical() if callable(critical) else critical)
+            result['latencyMs'] = round(duration * 1000, 2)
+            record_health_check(name, result['ok'], duration)
+            results[name] = result
+        self._results = results
+        self._checked_at = time.time()
+        return results
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f'Health probe failed: {str(e)}')
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        """Start probing in this process (threads do not survive fork)"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._results = self._checked_at = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def readiness(self):
+        """(ready, report) from the latest results; never blocks on a dependency"""
+        results, checked_at = self._results, self._checked_at
+        if results is None or self._pid != os.getpid():
+            return False, {'status': STARTING, 'checks': {}}
+        age = time.time() - checked_at
+        ready = age <= self.max_age and all(result['ok'] for result in results.values() if result['critical'])
+        return ready, {
+            'status': READY if ready else NOT_READY,
+            'checkedAt': datetime.fromtimestamp(checked_at).isoformat(),
+            'ageSeconds': round(age, 3),
+            'stale': age > self.max_age,
+            'checks': results
+        }
+
+def check_writable(directories, min_free_bytes=0):
+    """Write, fsync and remove a probe file in each directory; returns free space per directory"""
+    free = {}
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=directory, prefix='.health-') as f:
+            f.write(b'ok')
+            f.flush()
+            os.fsync(f.fileno())
+        stat = os.statvfs(directory)
+        free[directory] = stat.f_bavail * stat.f_frsize
+        if free[directory] < min_free_bytes:
+            raise OSError(f'{directory} has only {free[directory] // (1024 * 1024)} MB free')
+    return {'freeBytes': free}
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import logging
+import threading
+import time
+
+from flask import current_app, jsonify, request
+from flask_limiter.util import get_remote_address
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+class _Entry:
+    def __init__(self, fingerprint, expires):
+        self.fingerprint = fingerprint
+        self.expires = expires
+        self.done = threading.Event()
+        self.response = None  # (status, body, content type) once cached
+
+class IdempotencyCache:
+    """Bounded TTL cache of responses to unsafe requests
+
+    The first request for a key runs the view; repeats within `ttl` seconds
+    get its response back without running it. A repeat that arrives while
+    the first is still running waits up to `wait` seconds for it. Server
+    errors are not cached, so a retry after a 5xx runs the view again.
+    """
+
+    def __init__(self, ttl=300, max_entries=10000, wait=10):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait = wait
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires > now and len(self._entries) <= self.max_entries:
+                break
+            if not entry.done.is_set() and entry.expires > now:
+                break  # never evict a request that is still running
+            self._entries.popitem(last=False)
+
+    def begin(self, key, fingerprint):
+        """Return (entry, True) to run the view, or the existing entry and False"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > now:
+                return entry, False
+            entry = _Entry(fingerprint, now + self.ttl)
+            self._entries[key] = entry
+            return entry, True
+
+    def finish(self, key, entry, response):
+        with self._lock:
+            if response is None and self._entries.get(key) is entry:
+                del self._entries[key]
+            entry.response = response
+        entry.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+def _request_key():
+    body = request.get_data(cache=True)
+    fingerprint = hashlib.blake2b(body, digest_size=16).hexdigest()
+    client_key = request.headers.get(IDEMPOTENCY_HEADER)
+    if client_key:
+        # Scoped to the client so a guessed key cannot replay someone else's response
+        key = f'{request.endpoint}|{get_remote_address()}|key|{client_key[:255]}'
+    else:
+        # No key: an identical payload within the window is treated as a retry
+        key = f'{request.endpoint}|payload|{fingerprint}'
+    return key, fingerprint
+
+def _replay(entry):
+    status, body, content_type = entry.response
+    response = current_app.response_class(body, status=status, content_type=content_type)
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+def idempotent(cache):
+    """Replay the first response to repeats of the same request
+
+    Repeats are recognised by the Idempotency-Key header, or by a hash of
+    the request body when no key is sent.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            key, fingerprint = _request_key()
+            entry, owner = cache.begin(key, fingerprint)
+
+            if not owner:
+                if entry.fingerprint != fingerprint:
+                    return jsonify({
+                        'success': False,
+                        'message': 'Idempotency-Key was already used for a different request'
+                    }), 422
+                if entry.done.wait(cache.wait) and entry.response is not None:
+                    cache.hits += 1
+                    return _replay(entry)
+                if not entry.done.is_set():
+                    return jsonify({
+                        'success': False,
+                        'message': 'The original request is still being processed'
+                    }), 409
+                # The original failed and was not cached; run this one
+                entry, owner = cache.begin(key, fingerprint)
+                if not owner:
+                    return jsonify({
+                        'success': False,
+                        'message': 'The original request is still being processed'
+                    }), 409
+
+            cache.misses += 1
+            cached = None
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code < 500 and response.status_code not in (409, 429) \
+                        and not response.is_streamed:
+                    cached = (response.status_code, response.get_data(), response.content_type)
+                return response
+            finally:
+                cache.finish(key, entry, cached)
+        return wrapped
+    return decorator
@@ -0,0 +1,58 @@
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# name -> LazyModule, and name -> seconds its first use spent importing it
+_modules = {}
+_timings = {}
+
+class LazyModule:
+    """Stand-in for a heavy module, imported on first attribute access
+
+    Attributes are copied onto the stand-in as they are used, so after the
+    first access a lookup costs the same as on the real module.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            _timings.setdefault(self._name, time.perf_counter() - start)
+            self.__dict__['_module'] = module
+        return module
+
+    @property
+    def loaded(self):
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attribute):
+        value = getattr(self._load(), attribute)
+        self.__dict__[attribute] = value
+        return value
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+def lazy_module(name):
+    """Shared stand-in for `name`; importing happens on first use"""
+    module = _modules.get(name)
+    if module is None:
+        module = _modules[name] = LazyModule(name)
+    return module
+
+def load_all():
+    """Import every lazy module now (e.g. in a preloading master before fork)"""
+    for module in list(_modules.values()):
+        module._load()
+
+def import_timings():
+    """Seconds each lazy module took to import on first use, for modules loaded so far"""
+    return dict(_timings)
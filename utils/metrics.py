@@ -0,0 +1,253 @@
+from contextlib import contextmanager
+import logging
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    )
+    from prometheus_client import multiprocess
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Buckets tuned for web requests and single DB round trips (seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+if METRICS_AVAILABLE:
+    REQUEST_COUNT = Counter(
+        'acn_http_requests_total', 'HTTP requests by route',
+        ['route', 'method', 'status']
+    )
+    REQUEST_LATENCY = Histogram(
+        'acn_http_request_duration_seconds', 'HTTP request latency by route',
+        ['route', 'method'], buckets=LATENCY_BUCKETS
+    )
+    MONGO_COMMAND_DURATION = Histogram(
+        'acn_mongo_command_duration_seconds', 'MongoDB command duration',
+        ['collection', 'command', 'outcome'], buckets=LATENCY_BUCKETS
+    )
+    MONGO_POOL_CHECKOUT_WAIT = Histogram(
+        'acn_mongo_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection',
+        ['outcome'], buckets=LATENCY_BUCKETS
+    )
+    FILE_STORE_WRITE = Histogram(
+        'acn_file_store_write_duration_seconds', 'Local JSON/CSV store write duration',
+        ['store'], buckets=LATENCY_BUCKETS
+    )
+    RATE_LIMIT_REJECTIONS = Counter(
+        'acn_rate_limit_rejections_total', 'Requests rejected by the rate limiter',
+        ['route']
+    )
+    SPOOL_DEPTH = Gauge(
+        'acn_spool_depth', 'Admissions waiting in the write-behind spool',
+        # Every worker scans the same spool directory, so the latest reading wins
+        multiprocess_mode='livemostrecent'
+    )
+    SPOOL_REPLAYED = Counter(
+        'acn_spool_replayed_total', 'Spooled admissions replayed into MongoDB',
+        ['outcome']
+    )
+    SPOOL_REPLAY_DURATION = Histogram(
+        'acn_spool_replay_batch_duration_seconds', 'Duration of one spool replay batch',
+        buckets=LATENCY_BUCKETS
+    )
+    HEALTH_CHECK_UP = Gauge(
+        'acn_health_check_up', 'Result of the last background readiness check (1 = passing)',
+        ['check'], multiprocess_mode='livemin'
+    )
+    HEALTH_CHECK_DURATION = Histogram(
+        'acn_health_check_duration_seconds', 'Duration of one background readiness check',
+        ['check'], buckets=LATENCY_BUCKETS
+    )
+    SPAM_CHECKS = Counter(
+        'acn_spam_filter_checks_total', 'Contact spam filter checks by result',
+        ['check', 'result']
+    )
+    SPAM_CHECK_DURATION = Histogram(
+        'acn_spam_filter_check_duration_seconds', 'Duration of one spam filter check',
+        ['check'], buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01)
+    )
+
+def _route_label():
+    # Use the URL rule template to keep label cardinality bounded
+    if request.url_rule is not None:
+        return request.url_rule.rule
+    return 'unmatched'
+
+def _before_request():
+    g._metrics_start = time.perf_counter()
+
+def _after_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is not None:
+        route = _route_label()
+        REQUEST_LATENCY.labels(route, request.method).observe(time.perf_counter() - start)
+        REQUEST_COUNT.labels(route, request.method, str(response.status_code)).inc()
+    return response
+
+def metrics_view():
+    registry = None
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        # Aggregate the per-worker files written by every gunicorn worker
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    data = generate_latest(registry) if registry else generate_latest()
+    return Response(data, mimetype=CONTENT_TYPE_LATEST)
+
+def init_metrics(app):
+    """Register request timing hooks and the /metrics endpoint"""
+    if not METRICS_AVAILABLE:
+        logger.warning('prometheus_client not installed, metrics disabled')
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+def record_rate_limit_rejection(request_limit):
+    """Flask-Limiter on_breach callback"""
+    if METRICS_AVAILABLE:
+        RATE_LIMIT_REJECTIONS.labels(_route_label()).inc()
+
+@contextmanager
+def observe_file_write(store):
+    """Time a write to the local JSON or CSV store"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if METRICS_AVAILABLE:
+            FILE_STORE_WRITE.labels(store).observe(time.perf_counter() - start)
+
+def record_spool_depth(depth):
+    if METRICS_AVAILABLE:
+        SPOOL_DEPTH.set(depth)
+
+def record_spool_replay(inserted, duplicates, duration):
+    """Count one replayed batch (duplicates were already in MongoDB)"""
+    if METRICS_AVAILABLE:
+        SPOOL_REPLAYED.labels('inserted').inc(inserted)
+        SPOOL_REPLAYED.labels('duplicate').inc(duplicates)
+        SPOOL_REPLAY_DURATION.observe(duration)
+
+def record_health_check(check, ok, duration):
+    if METRICS_AVAILABLE:
+        HEALTH_CHECK_UP.labels(check).set(1 if ok else 0)
+        HEALTH_CHECK_DURATION.labels(check).observe(duration)
+
+def record_spam_check(check, hit, duration):
+    if METRICS_AVAILABLE:
+        SPAM_CHECKS.labels(check, 'hit' if hit else 'miss').inc()
+        SPAM_CHECK_DURATION.labels(check).observe(duration)
+
+_mongo_listener_classes = []
+
+# This process's MongoDB connection pool, maintained by the pool listener
+_pool_stats = {'open': 0, 'inUse': 0, 'checkoutFailures': 0}
+_pool_lock = threading.Lock()
+
+def _count_pool(field, amount):
+    with _pool_lock:
+        _pool_stats[field] += amount
+
+def get_pool_stats():
+    """Open and checked-out MongoDB connections in this process (None without metrics)"""
+    if not METRICS_AVAILABLE:
+        return None
+    with _pool_lock:
+        return dict(_pool_stats)
+
+def _define_mongo_listeners():
+    # Defined on first connect so importing metrics does not import pymongo
+    from pymongo import monitoring
+
+    class MongoCommandListener(monitoring.CommandListener):
+        """Record MongoDB command durations per collection and operation"""
+
+        def __init__(self):
+            self._pending = {}
+            self._lock = threading.Lock()
+
+        def started(self, event):
+            collection = event.command.get(event.command_name)
+            if not isinstance(collection, str):
+                collection = event.database_name
+            with self._lock:
+                self._pending[(event.connection_id, event.request_id)] = collection
+
+        def _finish(self, event, outcome):
+            with self._lock:
+                collection = self._pending.pop((event.connection_id, event.request_id), 'unknown')
+            MONGO_COMMAND_DURATION.labels(collection, event.command_name, outcome).observe(
+                event.duration_micros / 1e6
+            )
+
+        def succeeded(self, event):
+            self._finish(event, 'success')
+
+        def failed(self, event):
+            self._finish(event, 'failure')
+
+    class MongoPoolListener(monitoring.ConnectionPoolListener):
+        """Record how long threads wait to check a connection out of the pool"""
+
+        def __init__(self):
+            self._local = threading.local()
+
+        def _observe(self, outcome):
+            start = getattr(self._local, 'start', None)
+            if start is not None:
+                MONGO_POOL_CHECKOUT_WAIT.labels(outcome).observe(time.perf_counter() - start)
+                self._local.start = None
+
+        def connection_check_out_started(self, event):
+            # Start and finish events are emitted on the requesting thread
+            self._local.start = time.perf_counter()
+
+        def connection_checked_out(self, event):
+            self._observe('success')
+            _count_pool('inUse', 1)
+
+        def connection_check_out_failed(self, event):
+            self._observe('failure')
+            _count_pool('checkoutFailures', 1)
+
+        def pool_created(self, event):
+            pass
+
+        def pool_ready(self, event):
+            pass
+
+        def pool_cleared(self, event):
+            pass
+
+        def pool_closed(self, event):
+            pass
+
+        def connection_created(self, event):
+            _count_pool('open', 1)
+
+        def connection_ready(self, event):
+            pass
+
+        def connection_closed(self, event):
+            _count_pool('open', -1)
+
+        def connection_checked_in(self, event):
+            _count_pool('inUse', -1)
+
+    return MongoCommandListener, MongoPoolListener
+
+def get_mongo_listeners():
+    """Event listeners to pass to MongoClient"""
+    if not METRICS_AVAILABLE:
+        return []
+    if not _mongo_listener_classes:
+        _mongo_listener_classes.extend(_define_mongo_listeners())
+    return [listener() for listener in _mongo_listener_classes]
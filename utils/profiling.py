@@ -0,0 +1,111 @@
+from collections import Counter
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+class StackSampler:
+    """Statistical profiler: samples one thread's stack into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)})')
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self._thread.start()
+
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump_stats(self, path):
+        # One "frame;frame;frame count" line per stack, ready for flamegraph.pl
+        with open(path, 'w') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f'{stack} {count}\n')
+
+def _should_profile(app):
+    token = app.config.get('PROFILE_TOKEN')
+    supplied = request.headers.get(PROFILE_HEADER)
+    if token and supplied and hmac.compare_digest(supplied, token):
+        return True
+    rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+    return rate > 0 and random.random() < rate
+
+def _profile_path(app, duration):
+    rule = request.url_rule.rule if request.url_rule is not None else request.path
+    route = re.sub(r'[^A-Za-z0-9]+', '_', rule).strip('_') or 'root'
+    extension = 'collapsed' if app.config.get('PROFILE_MODE') == 'sample' else 'prof'
+    filename = (
+        f'{route}-{request.method}-{duration * 1000:.0f}ms-'
+        f'{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}.{extension}'
+    )
+    return os.path.join(app.config['PROFILE_DIR'], filename)
+
+def init_profiling(app):
+    """Register opt-in per-request profiling hooks
+
+    Requests are profiled when they carry X-Profile-Token matching
+    PROFILE_TOKEN, or at random with probability PROFILE_SAMPLE_RATE.
+    PROFILE_MODE selects 'cprofile' (pstats file) or 'sample' (collapsed
+    stacks). Nothing is registered when neither trigger is configured.
+    """
+    if not app.config.get('PROFILE_TOKEN') and not app.config.get('PROFILE_SAMPLE_RATE'):
+        return
+
+    os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+
+    @app.before_request
+    def start_profiler():
+        if not _should_profile(app):
+            return
+        if app.config.get('PROFILE_MODE') == 'sample':
+            profiler = StackSampler(threading.get_ident())
+        else:
+            profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this interpreter
+            return
+        g._profiler = profiler
+        g._profile_start = time.perf_counter()
+
+    @app.teardown_request
+    def stop_profiler(exc=None):
+        profiler = g.pop('_profiler', None)
+        if profiler is None:
+            return
+        profiler.disable()
+        duration = time.perf_counter() - g.pop('_profile_start')
+        try:
+            path = _profile_path(app, duration)
+            profiler.dump_stats(path)
+            logger.info(f'Request profile written to {path}')
+        except Exception as e:
+            logger.error(f'Failed to write request profile: {str(e)}')
@@ -0,0 +1,238 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+# Slot layout: key hash (0 = never used), counter, absolute expiry timestamp
+SLOT = struct.Struct('<Qqd')
+DEFAULT_SLOTS = 16384
+MAX_PROBE = 64
+
+class SharedMemoryStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Rate limit storage backed by an mmap'd open-addressing table so every
+    worker process on the host shares the same counters.
+
+    URI forms:
+        shm://acn-ratelimit             -> /dev/shm/acn-ratelimit (or tempdir)
+        shm:///var/run/acn/ratelimit     -> explicit file path
+        shm://acn-ratelimit?slots=32768  -> custom table size
+    """
+
+    STORAGE_SCHEME = ['shm']
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        parsed = urlparse(uri or 'shm://acn-ratelimit')
+        params = parse_qs(parsed.query)
+        self.slots = int(params.get('slots', [DEFAULT_SLOTS])[0])
+        self.path = self._resolve_path(parsed.netloc, parsed.path)
+
+        self._pid = None
+        self._fd = None
+        self._map = None
+        self._thread_lock = threading.Lock()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @staticmethod
+    def _resolve_path(netloc, path):
+        """Map the URI onto a file, preferring tmpfs when available"""
+        if path and path != '/':
+            return os.path.join('/', netloc, path.lstrip('/')) if netloc else path
+        base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        return os.path.join(base, netloc or 'acn-ratelimit')
+
+    @property
+    def base_exceptions(self):
+        return (OSError, ValueError)
+
+    def _ensure_open(self):
+        """Open (or re-open after fork) the shared table for this process; caller holds _thread_lock"""
+        # flock locks belong to the open file description, which is shared
+        # across fork; each process needs its own descriptor to exclude others
+        if self._pid == os.getpid():
+            return
+        if self._map is not None:
+            # Inherited from the parent: closing our copies leaves its mapping alone
+            self._map.close()
+            os.close(self._fd)
+            self._map = self._fd = None
+        size = self.slots * SLOT.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+        self._pid = os.getpid()
+
+    def _locked(self):
+        return _TableLock(self)
+
+    @staticmethod
+    def _hash(key):
+        digest = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+        return digest or 1
+
+    def _find(self, key, now, create=False):
+        """Return (offset, count, expiry) for key; caller must hold the lock"""
+        key_hash = self._hash(key)
+        start = key_hash % self.slots
+        candidate = None
+        oldest = None
+        for probe in range(min(MAX_PROBE, self.slots)):
+            offset = ((start + probe) % self.slots) * SLOT.size
+            slot_hash, count, expiry = SLOT.unpack_from(self._map, offset)
+            if slot_hash == key_hash:
+                if expiry <= now:
+                    return offset, 0, 0.0
+                return offset, count, expiry
+            if slot_hash == 0:
+                # Never-used slot terminates the probe chain
+                if candidate is None:
+                    candidate = offset
+                break
+            if candidate is None and expiry <= now:
+                candidate = offset
+            if oldest is None or expiry < oldest[1]:
+                oldest = (offset, expiry)
+        if not create:
+            return None, 0, 0.0
+        if candidate is None:
+            # Probe window full of live keys: evict the one expiring soonest
+            candidate = oldest[0]
+        SLOT.pack_into(self._map, candidate, key_hash, 0, 0.0)
+        return candidate, 0, 0.0
+
+    def _incr(self, key, expiry, amount, now):
+        offset, count, expires_at = self._find(key, now, create=True)
+        if count == 0 or expires_at <= now:
+            expires_at = now + expiry
+        count += amount
+        SLOT.pack_into(self._map, offset, self._hash(key), count, expires_at)
+        return count
+
+    def _get(self, key, now):
+        return self._find(key, now)[1]
+
+    def incr(self, key, expiry, amount=1):
+        """Increment the counter for key, starting its window if needed"""
+        with self._locked():
+            return self._incr(key, expiry, amount, time.time())
+
+    def decr(self, key, amount=1):
+        """Decrement the counter for key without going below zero"""
+        with self._locked():
+            offset, count, expires_at = self._find(key, time.time())
+            if offset is None or count == 0:
+                return 0
+            count = max(count - amount, 0)
+            SLOT.pack_into(self._map, offset, self._hash(key), count, expires_at)
+            return count
+
+    def get(self, key):
+        with self._locked():
+            return self._get(key, time.time())
+
+    def get_expiry(self, key):
+        now = time.time()
+        with self._locked():
+            offset, count, expires_at = self._find(key, now)
+        return expires_at if count else now
+
+    def clear(self, key):
+        with self._locked():
+            offset, _, _ = self._find(key, time.time())
+            if offset is not None:
+                # Keep the hash so the slot still links the probe chain
+                SLOT.pack_into(self._map, offset, self._hash(key), 0, 0.0)
+
+    def check(self):
+        try:
+            with self._thread_lock:
+                self._ensure_open()
+            return True
+        except OSError:
+            return False
+
+    def reset(self):
+        with self._locked():
+            now = time.time()
+            live = 0
+            for index in range(self.slots):
+                _, count, expiry = SLOT.unpack_from(self._map, index * SLOT.size)
+                if count and expiry > now:
+                    live += 1
+            self._map[:] = bytes(len(self._map))
+            return live
+
+    def _sliding_window_info(self, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(previous_key, now)
+        current_count = self._get(current_key, now)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return current_key, previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        """Atomically check the weighted window count and record a hit"""
+        if amount > limit:
+            return False
+        with self._locked():
+            now = time.time()
+            current_key, previous_count, previous_ttl, current_count, _ = \
+                self._sliding_window_info(key, expiry, now)
+            weighted = previous_count * previous_ttl / expiry + current_count
+            if int(weighted) + amount > limit:
+                return False
+            self._incr(current_key, 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        with self._locked():
+            _, previous_count, previous_ttl, current_count, current_ttl = \
+                self._sliding_window_info(key, expiry, time.time())
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+class _TableLock:
+    """Serialize table access across threads (mutex) and processes (flock)
+
+    The table is (re)opened under the mutex, so concurrent first requests
+    in a new worker share one mapping.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __enter__(self):
+        self.storage._thread_lock.acquire()
+        try:
+            self.storage._ensure_open()
+            fcntl.flock(self.storage._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self.storage._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.storage._fd, fcntl.LOCK_UN)
+        self.storage._thread_lock.release()
+        return False
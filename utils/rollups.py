@@ -0,0 +1,311 @@
+# Daily rollups of applications, students and contacts
+#
+# One row per (source, day, key) with counts by current status, where key is
+# the course, program or inquiry type. Rows are updated incrementally on
+# every create and status change, so trend queries read one row per day and
+# key instead of scanning documents. Rebuild them from the source data with:
+#
+#   python -m utils.rollups backfill [--source applications] [--from 2026-01-01] [--to 2026-12-31]
+import argparse
+from datetime import date, datetime, timedelta
+import fcntl
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_COLLECTION = 'daily_rollups'
+ROLLUPS_FILE = 'rollups.json'
+
+# source name -> where its documents live and which fields feed the rollup
+SOURCES = {
+    'applications': {'collection': 'Admissions', 'date': 'timestamp', 'key': 'course', 'status': 'status'},
+    'students': {'collection': 'students', 'date': 'createdAt', 'key': 'program', 'status': 'applicationStatus'},
+    'contacts': {'collection': 'contacts', 'date': 'createdAt', 'key': 'inquiryType', 'status': 'status', 'archived': 'archivedAt'},
+}
+GRANULARITIES = ('day', 'week', 'month')
+
+def _day(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return None
+
+def _status_field(status):
+    # Statuses become field names in MongoDB; keep them path-safe
+    return str(status or 'unknown').replace('.', '_').replace('$', '_')
+
+class MongoRollupStore:
+    def __init__(self, collection):
+        self.collection = collection
+        self._indexed = False
+
+    def apply(self, source, day, key, deltas):
+        self.collection.update_one(
+            {'_id': f'{source}|{day}|{key}'},
+            {
+                '$setOnInsert': {'source': source, 'day': day, 'key': key},
+                '$inc': {f'statuses.{_status_field(status)}': amount for status, amount in deltas.items()}
+            },
+            upsert=True
+        )
+
+    def query(self, source, start, end):
+        if not self._indexed:
+            self.collection.create_index([('source', 1), ('day', 1)])
+            self._indexed = True
+        return list(self.collection.find(
+            {'source': source, 'day': {'$gte': start, '$lte': end}},
+            {'_id': 0, 'day': 1, 'key': 1, 'statuses': 1}
+        ))
+
+    def replace(self, source, rows, start=None, end=None):
+        query = {'source': source}
+        if start or end:
+            query['day'] = {'$gte': start or '0000-00-00', '$lte': end or '9999-99-99'}
+        self.collection.delete_many(query)
+        documents = [
+            {'_id': f"{source}|{row['day']}|{row['key']}", 'source': source, **row}
+            for row in rows
+        ]
+        if documents:
+            self.collection.insert_many(documents)
+
+class SQLiteRollupStore:
+    def __init__(self):
+        from config.sqlite_database import get_connection
+        self._connection = get_connection
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS _daily_rollups ('
+            'source TEXT NOT NULL, day TEXT NOT NULL, key TEXT NOT NULL, status TEXT NOT NULL, '
+            'count INTEGER NOT NULL, PRIMARY KEY (source, day, key, status))'
+        )
+
+    def apply(self, source, day, key, deltas):
+        connection = self._connection()
+        connection.executemany(
+            'INSERT INTO _daily_rollups (source, day, key, status, count) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(source, day, key, status) DO UPDATE SET count = count + excluded.count',
+            [(source, day, str(key), _status_field(status), amount) for status, amount in deltas.items()]
+        )
+
+    def query(self, source, start, end):
+        rows = {}
+        for day, key, status, count in self._connection().execute(
+            'SELECT day, key, status, count FROM _daily_rollups WHERE source = ? AND day BETWEEN ? AND ?',
+            (source, start, end)
+        ):
+            row = rows.setdefault((day, key), {'day': day, 'key': key, 'statuses': {}})
+            row['statuses'][status] = count
+        return list(rows.values())
+
+    def replace(self, source, rows, start=None, end=None):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'DELETE FROM _daily_rollups WHERE source = ? AND day BETWEEN ? AND ?',
+                (source, start or '0000-00-00', end or '9999-99-99')
+            )
+            connection.executemany(
+                'INSERT INTO _daily_rollups (source, day, key, status, count) VALUES (?, ?, ?, ?, ?)',
+                [
+                    (source, row['day'], str(row['key']), status, count)
+                    for row in rows for status, count in row['statuses'].items()
+                ]
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+class FileRollupStore:
+    """Rollups for the JSON file store, rewritten atomically under an exclusive lock"""
+
+    def __init__(self, path=ROLLUPS_FILE):
+        self.path = path
+
+    def _update(self, change):
+        with open(self.path + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            rows = self._load()
+            change(rows)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            with tempfile.NamedTemporaryFile('w', dir=directory, delete=False) as f:
+                json.dump(rows, f)
+            os.replace(f.name, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def apply(self, source, day, key, deltas):
+        def change(rows):
+            row = rows.setdefault(f'{source}|{day}|{key}', {'source': source, 'day': day, 'key': key, 'statuses': {}})
+            for status, amount in deltas.items():
+                field = _status_field(status)
+                row['statuses'][field] = row['statuses'].get(field, 0) + amount
+        self._update(change)
+
+    def query(self, source, start, end):
+        return [
+            row for row in self._load().values()
+            if row['source'] == source and start <= row['day'] <= end
+        ]
+
+    def replace(self, source, rows, start=None, end=None):
+        def change(existing):
+            for row_id, row in list(existing.items()):
+                if row['source'] == source and (start or '') <= row['day'] <= (end or '9999-99-99'):
+                    del existing[row_id]
+            for row in rows:
+                existing[f"{source}|{row['day']}|{row['key']}"] = {'source': source, **row}
+        self._update(change)
+
+_store = {'key': None, 'store': None}
+
+def get_rollup_store(backend=None):
+    """Rollup store matching the storage backend (one per process); pass 'json' for the local file store"""
+    from config.database import get_storage_backend, get_collection, get_db
+    backend = backend or get_storage_backend()
+    if _store['key'] == (backend, os.getpid()):
+        return _store['store']
+    if backend == 'sqlite':
+        get_db()
+        store = SQLiteRollupStore()
+    elif backend == 'json':
+        store = FileRollupStore()
+    else:
+        store = MongoRollupStore(get_collection(ROLLUPS_COLLECTION))
+    _store.update(key=(backend, os.getpid()), store=store)
+    return store
+
+def _apply(source, document, deltas, store=None):
+    fields = SOURCES[source]
+    day = _day(document.get(fields['date']))
+    if day is None:
+        return
+    try:
+        (store or get_rollup_store()).apply(source, day, document.get(fields['key']), deltas)
+    except Exception as e:
+        # The write itself succeeded; a backfill repairs the rollup
+        logger.error(f'Failed to update {source} rollup: {str(e)}')
+
+def record_created(source, document, store=None):
+    """Count a newly created document in its day's rollup"""
+    _apply(source, document, {document.get(SOURCES[source]['status']): 1}, store)
+
+def record_status_change(source, document, old_status, new_status, store=None):
+    """Move a document between status counts of its creation day"""
+    if old_status != new_status:
+        _apply(source, document, {old_status: -1, new_status: 1}, store)
+
+def _period(day, granularity):
+    if granularity == 'week':
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if granularity == 'month':
+        return day.strftime('%Y-%m')
+    return day.isoformat()
+
+def query_trends(source, start, end, granularity='day', store=None):
+    """Counts per period between two dates (inclusive); cost follows days, not documents"""
+    rows = (store or get_rollup_store()).query(source, start.isoformat(), end.isoformat())
+
+    periods = {}
+    day = start
+    while day <= end:
+        period = _period(day, granularity)
+        periods.setdefault(period, {'period': period, 'total': 0, 'statuses': {}, 'groups': {}})
+        day += timedelta(days=1)
+
+    for row in rows:
+        bucket = periods[_period(date.fromisoformat(row['day']), granularity)]
+        group = bucket['groups'].setdefault(row['key'], {'total': 0, 'statuses': {}})
+        for status, count in row['statuses'].items():
+            if not count:
+                continue
+            bucket['total'] += count
+            bucket['statuses'][status] = bucket['statuses'].get(status, 0) + count
+            group['total'] += count
+            group['statuses'][status] = group['statuses'].get(status, 0) + count
+    return list(periods.values())
+
+def _iter_hot_documents(source):
+    from config.database import get_storage_backend, get_collection
+    fields = SOURCES[source]
+    if get_storage_backend() == 'json':
+        if source != 'applications':
+            return []
+        try:
+            with open('applications.json', 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+    projection = {fields['date']: 1, fields['key']: 1, fields['status']: 1}
+    # Hot documents already copied to an archive are counted from the archive
+    query = {fields['archived']: {'$exists': False}} if 'archived' in fields else {}
+    return get_collection(fields['collection']).find(query, projection).batch_size(5000)
+
+def _iter_source_documents(source):
+    yield from _iter_hot_documents(source)
+    if source == 'applications':
+        # Archived applications still count towards their day
+        from utils.archive import get_archive
+        yield from get_archive().iter_range()
+    elif source == 'contacts':
+        # So do deleted contacts, including those already purged from the hot collection
+        from config.database import get_storage_backend
+        from utils.contact_archive import get_contact_archiver
+        if get_storage_backend() != 'json':
+            fields = SOURCES[source]
+            yield from get_contact_archiver().iter_archived({fields['date']: 1, fields['key']: 1, fields['status']: 1})
+
+def backfill(source, start=None, end=None, store=None):
+    """Recompute a source's rollups from its documents; returns the number of documents counted"""
+    fields = SOURCES[source]
+    rows = {}
+    counted = 0
+    for document in _iter_source_documents(source):
+        day = _day(document.get(fields['date']))
+        if day is None or (start and day < start) or (end and day > end):
+            continue
+        key = document.get(fields['key'])
+        row = rows.setdefault((day, key), {'day': day, 'key': key, 'statuses': {}})
+        status = _status_field(document.get(fields['status']))
+        row['statuses'][status] = row['statuses'].get(status, 0) + 1
+        counted += 1
+    (store or get_rollup_store()).replace(source, list(rows.values()), start, end)
+    return counted
+
+def main():
+    from dotenv import load_dotenv
+    from config.database import connect_db, get_storage_backend
+
+    parser = argparse.ArgumentParser(description='Maintain daily rollups')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    backfill_parser = subcommands.add_parser('backfill', help='rebuild rollups from the source collections')
+    backfill_parser.add_argument('--source', choices=['all', *SOURCES], default='all')
+    backfill_parser.add_argument('--from', dest='start', help='first day to rebuild (YYYY-MM-DD)')
+    backfill_parser.add_argument('--to', dest='end', help='last day to rebuild (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    if get_storage_backend() != 'json':
+        connect_db()
+
+    sources = list(SOURCES) if args.source == 'all' else [args.source]
+    for source in sources:
+        counted = backfill(source, args.start, args.end)
+        print(f'{source}: rebuilt rollups from {counted} documents')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from utils.bloom import BloomFilter
+from utils.metrics import record_spam_check
+
+logger = logging.getLogger(__name__)
+
+ALLOW = 'allow'
+TAG = 'tag'
+REJECT = 'reject'
+
+LINK_PATTERN = re.compile(r'https?://|www\.', re.IGNORECASE)
+REPEATED_CHARACTER_PATTERN = re.compile(r'(.)\1{9,}')
+SPAM_KEYWORDS = re.compile(
+    r'\b(casino|viagra|cialis|crypto|bitcoin|forex|backlinks?|seo services|payday loan|escort)\b',
+    re.IGNORECASE
+)
+
+class ContentHashSet:
+    """Digests of recent messages, each remembered for `ttl` seconds"""
+
+    def __init__(self, ttl=3600, max_entries=100000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._expires = OrderedDict()  # digest -> expiry, oldest first
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._expires:
+            digest, expires = next(iter(self._expires.items()))
+            if expires > now and len(self._expires) <= self.max_entries:
+                break
+            self._expires.popitem(last=False)
+
+    def __contains__(self, digest):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            return digest in self._expires
+
+    def add(self, digest):
+        now = time.monotonic()
+        with self._lock:
+            self._expires.pop(digest, None)
+            self._expires[digest] = now + self.ttl
+            self._expire(now)
+
+    def __len__(self):
+        return len(self._expires)
+
+class SpamVerdict:
+    def __init__(self, action, score, reasons, digest):
+        self.action = action
+        self.score = score
+        self.reasons = reasons
+        self.digest = digest
+
+class SpamFilter:
+    """Pre-write checks for contact submissions, cheapest first
+
+    A repeat of a recently accepted message is rejected outright. Otherwise
+    a blocklist hit and heuristic signals add up to a score: at `tag_score`
+    the submission is stored with isSpam set and no follow-up, at
+    `reject_score` it is refused. A blocklist hit alone only tags, so a
+    Bloom false positive never loses a genuine enquiry.
+    """
+
+    BLOCKLIST_SCORE = 5
+
+    def __init__(self, blocklist=None, duplicate_ttl=3600, min_duplicate_length=40, tag_score=3, reject_score=6):
+        self.blocklist = blocklist
+        self.recent = ContentHashSet(duplicate_ttl)
+        self.min_duplicate_length = min_duplicate_length
+        self.tag_score = tag_score
+        self.reject_score = reject_score
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_blocklist_file(cls, path, **kwargs):
+        blocklist = None
+        if path:
+            try:
+                blocklist = BloomFilter.from_file(path)
+                logger.info(f'Loaded {blocklist.count} spam blocklist entries from {path}')
+            except FileNotFoundError:
+                logger.info(f'No spam blocklist at {path}')
+        return cls(blocklist, **kwargs)
+
+    def _timed(self, check, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        hit = bool(result)
+        record_spam_check(check, hit, time.perf_counter() - start)
+        with self._lock:
+            checks, hits = self._counts.get(check, (0, 0))
+            self._counts[check] = (checks + 1, hits + hit)
+        return result
+
+    def _digest(self, data):
+        message = ' '.join(str(data.get('message') or '').lower().split())
+        if len(message) < self.min_duplicate_length:
+            return None  # short messages like "please call me" repeat legitimately
+        return hashlib.blake2b(message.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _blocklisted(self, data, request_info):
+        if self.blocklist is None:
+            return False
+        email = str(data.get('email') or '').strip().lower()
+        candidates = [email, '@' + email.rpartition('@')[2]] if '@' in email else []
+        ip = (request_info or {}).get('ip')
+        if ip:
+            # X-Forwarded-For may list proxies after the client address
+            candidates.append(ip.split(',')[0].strip())
+        return any(candidate in self.blocklist for candidate in candidates)
+
+    def _heuristic_score(self, data):
+        message = str(data.get('message') or '')
+        header = f"{data.get('name') or ''} {data.get('subject') or ''}"
+        score = 0
+        links = len(LINK_PATTERN.findall(message))
+        score += 3 if links >= 3 else links
+        if LINK_PATTERN.search(header):
+            score += 3
+        score += 2 * min(len(SPAM_KEYWORDS.findall(f'{header} {message}')), 2)
+        letters = [c for c in message if c.isalpha()]
+        if len(letters) >= 20 and sum(c.isupper() for c in letters) / len(letters) > 0.7:
+            score += 1
+        if REPEATED_CHARACTER_PATTERN.search(message):
+            score += 1
+        return score
+
+    def check(self, data, request_info=None):
+        """Judge a submission before validation or any database work"""
+        digest = self._digest(data)
+        if digest is not None and self._timed('duplicate', self.recent.__contains__, digest):
+            return SpamVerdict(REJECT, self.reject_score, ['duplicate'], digest)
+
+        score, reasons = 0, []
+        if self._timed('blocklist', self._blocklisted, data, request_info):
+            score += self.BLOCKLIST_SCORE
+            reasons.append('blocklist')
+        heuristic_score = self._timed('heuristics', self._heuristic_score, data)
+        if heuristic_score:
+            score += heuristic_score
+            reasons.append('heuristics')
+
+        if score >= self.reject_score:
+            action = REJECT
+        elif score >= self.tag_score:
+            action = TAG
+        else:
+            action = ALLOW
+        return SpamVerdict(action, score, reasons, digest)
+
+    def remember(self, verdict):
+        """Record an accepted submission so an identical one is caught as a duplicate"""
+        if verdict.digest is not None:
+            self.recent.add(verdict.digest)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            'blocklistEntries': self.blocklist.count if self.blocklist is not None else 0,
+            'recentMessages': len(self.recent),
+            'checks': {
+                check: {'checks': checks, 'hits': hits, 'hitRate': round(hits / checks, 4)}
+                for check, (checks, hits) in counts.items()
+            }
+        }
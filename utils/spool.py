@@ -0,0 +1,327 @@
+import fcntl
+import glob
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+
+from utils.lazy import lazy_module
+from utils.metrics import record_spool_depth, record_spool_replay
+
+logger = logging.getLogger(__name__)
+
+json_util = lazy_module('bson.json_util')
+pymongo = lazy_module('pymongo')
+
+DUPLICATE_KEY_ERROR = 11000
+# Records the database rejected for a reason other than a duplicate key
+DEAD_LETTER_FILE = 'dead-letter.ndjson'
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class WriteSpool:
+    """Durable write-behind spool for documents MongoDB could not accept
+
+    Every process appends JSON lines to its own active segment. Appends are
+    fsynced in groups: one fsync covers every record written while the
+    previous one was in flight. A background replayer seals the active
+    segment and drains sealed segments (and segments left behind by dead
+    workers) into MongoDB with insert_many once the database answers a
+    ping, backing off exponentially while it does not. Replays are
+    idempotent because documents carry their own _id (the phone number).
+
+    Each spooled _id also has a marker file under ids/, shared by every
+    worker, so duplicate checks during an outage see other workers'
+    records. A record rejected for any reason other than a duplicate key
+    goes to dead-letter.ndjson so it cannot block the rest of the spool.
+    """
+
+    def __init__(self, directory, replay_batch=500, backoff_base=1.0, backoff_max=300.0, poll_interval=5.0):
+        self.directory = directory
+        self.replay_batch = replay_batch
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+
+        # True while writes should skip MongoDB and go straight to the spool
+        self.degraded = False
+        self.depth = 0
+        self.replayed = 0
+        self.duplicates = 0
+        self.dead_lettered = 0
+        self.failures = 0
+        self.last_replay_at = None
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._syncing = False
+        self._written = 0
+        self._synced = 0
+        self._file = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+
+    def _active_path(self):
+        return os.path.join(self.directory, f'{os.getpid()}.active.jsonl')
+
+    def _open(self):
+        if self._file is None or self._pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            if self._pid != os.getpid():
+                # Forked child: the parent's handle and counters are not ours
+                self._written = self._synced = 0
+            self._file = open(self._active_path(), 'a', encoding='utf-8')
+            self._pid = os.getpid()
+        return self._file
+
+    def _id_path(self, document_id):
+        digest = hashlib.sha1(str(document_id).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'ids', digest)
+
+    def claim(self, document_id):
+        """Mark an _id as spooled; False if any worker has already spooled it"""
+        path = self._id_path(document_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        return True
+
+    def release(self, document_id):
+        try:
+            os.unlink(self._id_path(document_id))
+        except FileNotFoundError:
+            pass
+
+    def append(self, document):
+        """Append a document and return once it is on disk"""
+        line = json_util.dumps(document) + '\n'
+        self.claim(document.get('_id'))
+        with self._lock:
+            spool_file = self._open()
+            spool_file.write(line)
+            spool_file.flush()
+            self._written += 1
+            sequence = self._written
+        self._wait_durable(sequence)
+        self.degraded = True
+        self.depth += 1
+        record_spool_depth(self.depth)
+        self._wake.set()
+
+    def _wait_durable(self, sequence):
+        with self._sync_cond:
+            while self._synced < sequence:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+                self._syncing = True
+                with self._lock:
+                    target = self._written
+                    fd = self._file.fileno()
+                self._sync_cond.release()
+                try:
+                    os.fsync(fd)
+                finally:
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    self._sync_cond.notify_all()
+                self._synced = max(self._synced, target)
+
+    def _seal_active(self):
+        """Rename this process's active segment so it can be replayed"""
+        with self._sync_cond:
+            while self._syncing:
+                self._sync_cond.wait()
+            self._syncing = True
+        try:
+            with self._lock:
+                if self._file is None or self._pid != os.getpid() or self._file.tell() == 0:
+                    return
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                sealed = os.path.join(self.directory, f'{os.getpid()}-{time.time_ns()}.sealed.jsonl')
+                os.rename(self._active_path(), sealed)
+        finally:
+            with self._sync_cond:
+                self._syncing = False
+                self._synced = max(self._synced, self._written)
+                self._sync_cond.notify_all()
+
+    def _segments(self):
+        """Segments any replayer may drain: sealed ones and active ones of dead processes"""
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.jsonl'))):
+            name = os.path.basename(path)
+            if name.endswith('.sealed.jsonl'):
+                yield path
+            elif name.endswith('.active.jsonl'):
+                pid = int(name.split('.')[0])
+                if pid != os.getpid() and not _pid_alive(pid):
+                    yield path
+
+    def _dead_letter(self, documents, reason):
+        """Set records aside with the error that rejected them"""
+        with open(os.path.join(self.directory, DEAD_LETTER_FILE), 'a', encoding='utf-8') as f:
+            for document in documents:
+                f.write(json_util.dumps({'error': reason, 'document': document}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        for document in documents:
+            logger.error(f"Spooled record {document.get('_id')} moved to {DEAD_LETTER_FILE}: {reason}")
+        self.dead_lettered += len(documents)
+
+    def _insert_batch(self, batch, collection):
+        """Insert a batch; returns (inserted, duplicates) after dead-lettering rejected records"""
+        try:
+            result = collection.insert_many(batch, ordered=False)
+            return len(result.inserted_ids), 0
+        except pymongo.errors.BulkWriteError as error:
+            errors = error.details.get('writeErrors', [])
+            rejected = [e for e in errors if e.get('code') != DUPLICATE_KEY_ERROR]
+            for write_error in rejected:
+                self._dead_letter([batch[write_error['index']]], write_error.get('errmsg', str(write_error.get('code'))))
+            return error.details.get('nInserted', 0), len(errors) - len(rejected)
+        except pymongo.errors.InvalidDocument:
+            # Rejected before reaching the server: find the records at fault one by one
+            inserted = duplicates = 0
+            for document in batch:
+                try:
+                    collection.insert_one(document)
+                    inserted += 1
+                except pymongo.errors.DuplicateKeyError:
+                    duplicates += 1
+                except pymongo.errors.InvalidDocument as error:
+                    self._dead_letter([document], str(error))
+            return inserted, duplicates
+
+    def pending(self):
+        """Count spooled records across every segment in the directory"""
+        total = 0
+        for path in glob.glob(os.path.join(self.directory, '*.jsonl')):
+            try:
+                with open(path, 'rb') as f:
+                    total += f.read().count(b'\n')
+            except FileNotFoundError:
+                continue
+        return total
+
+    def _replay_segment(self, path, collection):
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # another worker is draining it
+            if not os.path.exists(path):
+                return  # drained and removed while we waited to open it
+
+            documents = []
+            for line in f:
+                try:
+                    documents.append(json_util.loads(line))
+                except ValueError:
+                    # A torn final line from a crash mid-append was never acknowledged
+                    logger.warning(f'Skipping unreadable spool record in {path}')
+
+            for start in range(0, len(documents), self.replay_batch):
+                batch = documents[start:start + self.replay_batch]
+                started = time.perf_counter()
+                inserted, duplicates = self._insert_batch(batch, collection)
+                record_spool_replay(inserted, duplicates, time.perf_counter() - started)
+                self.replayed += inserted
+                self.duplicates += duplicates
+
+            os.unlink(path)
+            for document in documents:
+                self.release(document.get('_id'))
+            logger.info(f'Replayed {len(documents)} spooled records from {path}')
+
+    def replay(self, collection):
+        """Drain every replayable segment into the collection"""
+        self._seal_active()
+        for path in self._segments():
+            self._replay_segment(path, collection)
+        self.last_replay_at = time.time()
+
+    def _backoff(self):
+        delay = min(self.backoff_base * (2 ** (self.failures - 1)), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _run(self, get_collection, health_check, on_replay):
+        while not self._stop.is_set():
+            if self.failures:
+                # Appends do not cut a backoff short
+                self._stop.wait(self._backoff())
+            else:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+            self.depth = self.pending()
+            record_spool_depth(self.depth)
+            if not self.depth:
+                self.degraded = False
+                continue
+
+            replayed = self.replayed
+            try:
+                if not health_check():
+                    raise ConnectionError('database ping failed')
+                self.replay(get_collection())
+                self.failures = 0
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.warning(f'Spool replay failed (attempt {self.failures}): {str(e)}')
+            if self.replayed != replayed and on_replay is not None:
+                # Replayed records changed the collection even if a later batch failed
+                on_replay()
+
+            self.depth = self.pending()
+            record_spool_depth(self.depth)
+            if not self.depth:
+                self.degraded = False
+
+    def start_replayer(self, get_collection, health_check, on_replay=None):
+        """Start this process's background replayer (idempotent, fork-aware)"""
+        if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread_pid = os.getpid()
+        self.depth = self.pending()
+        self.degraded = self.depth > 0
+        self._thread = threading.Thread(
+            target=self._run, args=(get_collection, health_check, on_replay), name='spool-replayer', daemon=True
+        )
+        self._thread.start()
+
+    def stop_replayer(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self):
+        return {
+            'depth': self.depth,
+            'degraded': self.degraded,
+            'replayed': self.replayed,
+            'duplicates': self.duplicates,
+            'deadLettered': self.dead_lettered,
+            'failures': self.failures,
+            'lastReplayAt': self.last_replay_at,
+            'lastError': self.last_error
+        }
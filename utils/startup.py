@@ -0,0 +1,121 @@
+# Startup timing report
+#
+# Starts a fresh interpreter with -X importtime, imports the app, initializes
+# its resources and serves one request, then reports how long each phase took
+# and which packages the imports of each phase spent their time in:
+#
+#   python app.py --startup-report [--budget-ms 500] [--path /api/health] [--json]
+#
+# With a budget the command exits 1 when time to first request exceeds it.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+PHASE_MARKER = '@@startup-phase '
+PHASES = ('import', 'init_resources', 'first_request')
+
+PROBE = f'''
+import json, sys, time
+def mark(phase):
+    sys.stderr.write({PHASE_MARKER!r} + phase + "\\n")
+    sys.stderr.flush()
+timings = {{}}
+mark("import")
+start = time.perf_counter()
+import app
+timings["import"] = time.perf_counter() - start
+mark("init_resources")
+start = time.perf_counter()
+app.init_resources()
+timings["init_resources"] = time.perf_counter() - start
+mark("first_request")
+start = time.perf_counter()
+response = app.app.test_client().get(sys.argv[1])
+timings["first_request"] = time.perf_counter() - start
+mark("done")
+from utils.lazy import import_timings
+print(json.dumps({{"phases": timings, "status": response.status_code, "lazy": import_timings()}}))
+'''
+
+def parse_importtime(lines):
+    """Self time (us) per top-level package, per phase, from -X importtime output"""
+    phase, packages, modules = None, {}, {}
+    for line in lines:
+        if line.startswith(PHASE_MARKER):
+            phase = line[len(PHASE_MARKER):].strip()
+            continue
+        if not line.startswith('import time:') or phase not in PHASES:
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the column header
+        self_us, name = int(fields[0]), fields[2].strip()
+        package = name.split('.')[0]
+        phase_packages = packages.setdefault(phase, {})
+        phase_packages[package] = phase_packages.get(package, 0) + self_us
+        modules[phase] = modules.get(phase, 0) + 1
+    return packages, modules
+
+def run_probe(path='/api/health'):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE, path],
+        capture_output=True, text=True, cwd=os.getcwd()
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f'Startup probe failed:\n{result.stderr[-4000:]}')
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    packages, modules = parse_importtime(result.stderr.splitlines())
+    return {
+        'processSeconds': round(wall, 4),
+        'timeToFirstRequestSeconds': round(sum(summary['phases'].values()), 4),
+        'firstRequestStatus': summary['status'],
+        'phases': {
+            phase: {
+                'seconds': round(summary['phases'][phase], 4),
+                'modulesImported': modules.get(phase, 0),
+                'packages': dict(sorted(packages.get(phase, {}).items(), key=lambda item: -item[1]))
+            }
+            for phase in PHASES
+        },
+        'lazyImports': {name: round(seconds, 4) for name, seconds in summary['lazy'].items()}
+    }
+
+def format_report(report, top=10):
+    lines = [
+        f"Time to first request: {report['timeToFirstRequestSeconds'] * 1000:.1f} ms "
+        f"(process {report['processSeconds'] * 1000:.1f} ms, first request -> {report['firstRequestStatus']})"
+    ]
+    for phase, data in report['phases'].items():
+        lines.append(f"\n{phase}: {data['seconds'] * 1000:.1f} ms, {data['modulesImported']} modules imported")
+        for package, self_us in list(data['packages'].items())[:top]:
+            lines.append(f'  {self_us / 1000:8.1f} ms  {package}')
+    if report['lazyImports']:
+        lines.append('\nLazy imports loaded (first use):')
+        for name, seconds in report['lazyImports'].items():
+            lines.append(f'  {seconds * 1000:8.1f} ms  {name}')
+    return '\n'.join(lines)
+
+def startup_report(argv=None):
+    parser = argparse.ArgumentParser(description='Report import and initialization time per phase')
+    parser.add_argument('--startup-report', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--path', default='/api/health', help='request served as the first request')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', 0)),
+                        help='exit 1 when time to first request exceeds this')
+    parser.add_argument('--top', type=int, default=10, help='packages listed per phase')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = run_probe(args.path)
+    print(json.dumps(report, indent=2) if args.json else format_report(report, args.top))
+    if args.budget_ms and report['timeToFirstRequestSeconds'] * 1000 > args.budget_ms:
+        print(f'Over the startup budget of {args.budget_ms:.0f} ms', file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(startup_report())
@@ -0,0 +1,61 @@
+from flask import Response, current_app, request, stream_with_context
+
+from utils.circuit_breaker import within_deadline
+
+# Placeholder swapped for the streamed array when the envelope is serialized
+STREAM_MARKER = '__stream_items__'
+
+def get_batch_size():
+    """Get the cursor batch size used for streamed responses"""
+    return int(current_app.config.get('STREAM_BATCH_SIZE', 500))
+
+def should_stream():
+    """Check whether the current request asked for a streamed response"""
+    flag = request.args.get('stream')
+    if flag is not None:
+        return flag.lower() in ('1', 'true', 'yes')
+    return bool(current_app.config.get('STREAM_RESPONSES', False))
+
+def _set_path(envelope, path, value):
+    """Return a copy of the envelope with value placed at the given key path"""
+    envelope = dict(envelope)
+    node = envelope
+    for key in path[:-1]:
+        node[key] = dict(node.get(key, {}))
+        node = node[key]
+    node[path[-1]] = value
+    return envelope
+
+def stream_json_array(items, envelope=None, path=('data',), chunk_size=None):
+    """Stream a JSON document whose array at `path` is written incrementally
+
+    The envelope (e.g. {'success': True}) is serialized once with a marker in
+    place of the array; the marker is then replaced by items encoded one at a
+    time, so only one chunk of items is held in memory at any point.
+    """
+    provider = current_app.json
+    chunk_size = chunk_size or get_batch_size()
+
+    document = _set_path(envelope or {}, path, STREAM_MARKER)
+    prefix, suffix = provider.dumps(document).split(f'"{STREAM_MARKER}"', 1)
+
+    # The body is produced after the view returns: keep the request context and the
+    # endpoint's database deadline around each fetch
+    items = within_deadline(items)
+
+    def generate():
+        buffer = [prefix, '[']
+        count = 0
+        for item in items:
+            if count:
+                buffer.append(',')
+            buffer.append(provider.dumps(item))
+            count += 1
+            if count % chunk_size == 0:
+                yield ''.join(buffer)
+                buffer = []
+        buffer.append(']')
+        buffer.append(suffix)
+        yield ''.join(buffer)
+
+    return Response(stream_with_context(generate()), mimetype='application/json')